@@ -1,3 +1,4 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -30,6 +31,55 @@ def create_app(config_name='default'):
     from .routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Create and backfill the event full-text search index"""
+        from .services.search_service import rebuild_search_index
+        rebuild_search_index()
+    
+    @app.cli.command('rebuild-participant-index')
+    def rebuild_participant_index_command():
+        """Regenerate the event participant access index"""
+        EventParticipant.rebuild()
+    
+    @app.cli.command('install-venue-booking-constraint')
+    def install_venue_booking_constraint_command():
+        """Add the PostgreSQL exclusion constraint against venue double-booking"""
+        from .services.venue_service import install_booking_constraint
+        install_booking_constraint()
+    
+    @app.cli.command('archive-events')
+    def archive_events_command():
+        """Move old completed/cancelled events to the archive tables"""
+        from .services.archive_service import archive_events
+        click.echo(f"Archived {archive_events()} events")
+    
+    @app.cli.command('reconcile-guest-counters')
+    def reconcile_guest_counters_command():
+        """Recompute per-event RSVP/check-in counters from the guest lists"""
+        from .services.guest_counter_service import reconcile_counters
+        click.echo(f"Repaired counters of {reconcile_counters()} events")
+    
+    @app.cli.command('deliver-email')
+    def deliver_email_command():
+        """Send all due queued email from this process"""
+        from .services.email_service import deliver_all
+        click.echo(f"Handled {deliver_all()} queued messages")
+    
+    @app.cli.command('run-workers')
+    def run_workers_command():
+        """Run the background loops in this process until interrupted"""
+        threads = start_background_workers(app)
+        if not threads:
+            click.echo("No background workers are configured")
+            return
+        click.echo(f"Started {', '.join(thread.name for thread in threads)}")
+        for thread in threads:
+            thread.join()
+    
+    if app.config.get('BACKGROUND_WORKERS') and not app.testing:
+        start_background_workers(app)
+    
     # Shell context
     @app.shell_context_processor
     def make_shell_context():
@@ -37,9 +87,25 @@ def create_app(config_name='default'):
     
     return app
 
+def start_background_workers(app):
+    """Start the archiver, counter reconciler, email workers and reminder scheduler"""
+    from .services.archive_service import start_archiver
+    from .services.email_service import start_email_workers
+    from .services.guest_counter_service import start_counter_reconciler
+    from .services.reminder_service import start_reminder_scheduler
+    threads = [start_archiver(app), start_counter_reconciler(app), *start_email_workers(app),
+               start_reminder_scheduler(app)]
+    return [thread for thread in threads if thread is not None]
+
 # Import models to ensure they are registered with SQLAlchemy
 from .models.user import User, UserRole
 from .models.event import Event, EventType, EventStatus, EventGuest, EventVendor, EventStaff
 from .models.venue import Venue
 from .models.task import Task, TaskStatus, TaskAssignment
 from .models.budget import Budget, BudgetItem, Expense
+from .models.participant import EventParticipant, ParticipantRole
+from .models.guest_counter import EventGuestCounter
+from .models.reservation import EventCapacity, WaitlistEntry
+from .models.email import EmailCampaign, OutboxMessage
+from .models.scheduler import SchedulerLease
+from .models import archive  # noqa: F401 (registers the archive tables)
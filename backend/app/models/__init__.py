@@ -0,0 +1,6 @@
+from .. import db
+from .user import User, UserRole
+from .event import Event, EventType, EventStatus, EventGuest, EventVendor, EventStaff, EventOccurrenceException
+from .venue import Venue
+from .task import Task, TaskStatus, TaskPriority, TaskAssignment, TaskDependency, TaskReminder
+from .budget import Budget, BudgetItem, BudgetStatus, Expense, ExpenseCategory
@@ -0,0 +1,64 @@
+from .. import db
+from .event import Event, EventGuest, EventVendor, EventStaff, EventOccurrenceException
+from .task import Task, TaskAssignment, TaskDependency
+from .budget import Budget, BudgetItem, Expense
+
+# Cold storage for finished events.
+#
+# Each archive table mirrors a live table column for column (minus foreign
+# keys, so archived rows never block deletes of users or venues) plus an
+# ``archived_at`` stamp. Rows keep their original primary keys, so archived
+# events stay addressable by the same id.
+
+def _copy_type(type_):
+    # Schema-bound types (enums) must not be shared between tables
+    return type_.copy() if isinstance(type_, db.Enum) else type_
+
+def _archive_table(model):
+    source = model.__table__
+    columns = [
+        db.Column(column.name, _copy_type(column.type), primary_key=column.primary_key,
+                  autoincrement=False, nullable=column.nullable)
+        for column in source.columns
+    ]
+    return db.Table(
+        f'{source.name}_archive', db.metadata,
+        *columns,
+        db.Column('archived_at', db.DateTime, nullable=False, server_default=db.func.now())
+    )
+
+events_archive = _archive_table(Event)
+event_guests_archive = _archive_table(EventGuest)
+event_vendors_archive = _archive_table(EventVendor)
+event_staff_archive = _archive_table(EventStaff)
+event_occurrence_exceptions_archive = _archive_table(EventOccurrenceException)
+tasks_archive = _archive_table(Task)
+task_assignments_archive = _archive_table(TaskAssignment)
+task_dependencies_archive = _archive_table(TaskDependency)
+budgets_archive = _archive_table(Budget)
+budget_items_archive = _archive_table(BudgetItem)
+expenses_archive = _archive_table(Expense)
+
+db.Index('ix_events_archive_organizer_id', events_archive.c.organizer_id)
+for _table in (event_guests_archive, event_vendors_archive, event_staff_archive,
+               event_occurrence_exceptions_archive, tasks_archive, task_dependencies_archive,
+               budgets_archive):
+    db.Index(f'ix_{_table.name}_event_id', _table.c.event_id)
+db.Index('ix_task_assignments_archive_task_id', task_assignments_archive.c.task_id)
+db.Index('ix_budget_items_archive_budget_id', budget_items_archive.c.budget_id)
+db.Index('ix_expenses_archive_budget_item_id', expenses_archive.c.budget_item_id)
+
+# (live model, archive table) pairs in the order rows are copied
+ARCHIVED_TABLES = [
+    (Event, events_archive),
+    (EventGuest, event_guests_archive),
+    (EventVendor, event_vendors_archive),
+    (EventStaff, event_staff_archive),
+    (EventOccurrenceException, event_occurrence_exceptions_archive),
+    (Task, tasks_archive),
+    (TaskAssignment, task_assignments_archive),
+    (TaskDependency, task_dependencies_archive),
+    (Budget, budgets_archive),
+    (BudgetItem, budget_items_archive),
+    (Expense, expenses_archive),
+]
@@ -0,0 +1,42 @@
+from sqlalchemy import event as sa_event, select
+from ..utils.db import dialect_name
+
+# ON DELETE CASCADE for SQLite.
+#
+# Rows owned by another row declare ondelete='CASCADE'. Other databases
+# apply it, but SQLite only enforces foreign keys with PRAGMA
+# foreign_keys=ON, which the rest of the schema (relying on ORM cascades
+# and unconstrained deletes) isn't written for. ``cascade_deletes`` has a
+# model's deletes follow the declared cascades on SQLite instead: the
+# children are looked up in the metadata when a row is deleted, so tables
+# defined in later modules are covered, and grandchildren go first.
+
+def _cascading_children(table):
+    for child in table.metadata.tables.values():
+        for fk in child.foreign_keys:
+            if fk.column.table is table and (fk.ondelete or '').upper() == 'CASCADE':
+                yield child, fk.parent, fk.column
+
+def _delete_children(connection, table, criteria, seen):
+    """Delete the rows cascading from the rows of ``table`` matching ``criteria``"""
+    for child, column, referenced in _cascading_children(table):
+        if child in seen:
+            continue
+        child_criteria = column.in_(select(referenced).where(criteria))
+        _delete_children(connection, child, child_criteria, seen | {child})
+        connection.execute(child.delete().where(child_criteria))
+
+def cascade_deletes(model):
+    """Apply the ON DELETE CASCADE foreign keys to ``model`` on SQLite"""
+    table = model.__table__
+
+    @sa_event.listens_for(model, 'after_delete')
+    def _deleted(mapper, connection, target):
+        if dialect_name(connection) != 'sqlite':
+            return
+        for child, column, referenced in _cascading_children(table):
+            if child is table:
+                continue
+            value = getattr(target, mapper.get_property_by_column(referenced).key)
+            _delete_children(connection, child, column == value, {table, child})
+            connection.execute(child.delete().where(column == value))
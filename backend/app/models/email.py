@@ -0,0 +1,68 @@
+from datetime import datetime
+from .. import db
+
+class EmailCampaign(db.Model):
+    """One "send invitations" request for an event.
+
+    ``subject``/``body`` are rendered once with the event's details and keep
+    ``$first_name``-style placeholders for the per-guest substitution done at
+    send time. ``rsvp_statuses`` (comma separated, empty for all) selects the
+    guests; they are copied into the outbox by a background worker, so the
+    request only writes this row.
+    """
+    __tablename__ = 'email_campaigns'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False, default='invitation')
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    rsvp_statuses = db.Column(db.String(100))
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, expanded
+    total = db.Column(db.Integer)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expanded_at = db.Column(db.DateTime)
+
+    def to_dict(self, progress=None):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'kind': self.kind,
+            'subject': self.subject,
+            'rsvp_statuses': self.rsvp_statuses.split(',') if self.rsvp_statuses else None,
+            'status': self.status,
+            'total': self.total,
+            'progress': progress,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expanded_at': self.expanded_at.isoformat() if self.expanded_at else None
+        }
+
+class OutboxMessage(db.Model):
+    """A queued email, durable until it is sent or gives up.
+
+    Workers claim due rows (``queued`` with ``next_attempt_at`` passed, or
+    ``sending`` with an expired lease after a crash) with SKIP LOCKED.
+    The guest's address and names are copied in when the campaign is
+    expanded, so sending needs no joins.
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_due', 'status', 'next_attempt_at'),
+        db.Index('ix_email_outbox_campaign', 'campaign_id', 'status'),
+        db.UniqueConstraint('campaign_id', 'guest_id', name='uq_email_outbox_guest'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('email_campaigns.id', ondelete='CASCADE'), nullable=False)
+    guest_id = db.Column(db.Integer, nullable=False)
+    to_email = db.Column(db.String(120), nullable=False)
+    first_name = db.Column(db.String(64))
+    last_name = db.Column(db.String(64))
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+    sent_at = db.Column(db.DateTime)
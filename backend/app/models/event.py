@@ -1,6 +1,8 @@
 from datetime import datetime
 from enum import Enum
+from sqlalchemy import DDL, event as sa_event
 from .. import db
+from .cascade import cascade_deletes
 
 class EventType(str, Enum):
     CONFERENCE = 'conference'
@@ -36,6 +38,10 @@ class Event(db.Model):
     cover_image = db.Column(db.String(255))
     organizer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'))
+    # RRULE for recurring series; start/end_time describe the first occurrence
+    recurrence_rule = db.Column(db.String(500))
+    # End of the last occurrence, NULL for unbounded series (used to prune date-window scans)
+    recurrence_end = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -46,8 +52,68 @@ class Event(db.Model):
     tasks = db.relationship('Task', back_populates='event', lazy=True, cascade='all, delete-orphan')
     budget = db.relationship('Budget', back_populates='event', uselist=False, cascade='all, delete-orphan')
     venue = db.relationship('Venue', back_populates='events')
+    occurrence_exceptions = db.relationship('EventOccurrenceException', back_populates='event',
+                                            lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
+    @classmethod
+    def participant_counts(cls, event_ids):
+        """Get guest/vendor/staff counts for many events in one query.
+
+        Each relationship is aggregated in its own grouped subquery and outer
+        joined onto the events, so no participant rows are loaded. Guests
+        come from the maintained per-event counters rather than event_guests.
+        """
+        from .guest_counter import EventGuestCounter
+        event_ids = list(event_ids)
+        if not event_ids:
+            return {}
+        
+        def grouped(model):
+            return db.session.query(
+                model.event_id.label('event_id'),
+                db.func.count(model.id).label('total')
+            ).filter(model.event_id.in_(event_ids)).group_by(model.event_id).subquery()
+        
+        guests = EventGuestCounter.summed().filter(
+            EventGuestCounter.event_id.in_(event_ids)
+        ).subquery()
+        vendors = grouped(EventVendor)
+        staff = grouped(EventStaff)
+        
+        rows = db.session.query(
+            cls.id,
+            db.func.coalesce(guests.c.total, 0),
+            db.func.coalesce(vendors.c.total, 0),
+            db.func.coalesce(staff.c.total, 0)
+        ).outerjoin(guests, guests.c.event_id == cls.id) \
+         .outerjoin(vendors, vendors.c.event_id == cls.id) \
+         .outerjoin(staff, staff.c.event_id == cls.id) \
+         .filter(cls.id.in_(event_ids)).all()
+        
+        return {
+            event_id: {'guest_count': g, 'vendor_count': v, 'staff_count': s}
+            for event_id, g, v, s in rows
+        }
+    
+    @property
+    def cover_thumbnail(self):
+        """URL of the list-sized cover variant (content-addressed uploads only)"""
+        from ..services.upload_service import default_width
+        width = default_width()
+        if width and self.cover_image and self.cover_image.startswith('/api/uploads/'):
+            return f'{self.cover_image}?w={width}'
+        return self.cover_image
+    
+    def to_dict(self, counts=None):
+        """Serialize the event.
+
+        ``counts`` is this event's entry from ``Event.participant_counts``;
+        list endpoints pass it so a page of events needs one count query.
+        """
+        if counts is None:
+            counts = Event.participant_counts([self.id]).get(
+                self.id, {'guest_count': 0, 'vendor_count': 0, 'staff_count': 0}
+            )
         return {
             'id': self.id,
             'title': self.title,
@@ -62,13 +128,78 @@ class Event(db.Model):
             'event_type': self.event_type.value,
             'status': self.status.value,
             'cover_image': self.cover_image,
+            'cover_thumbnail': self.cover_thumbnail,
             'organizer_id': self.organizer_id,
             'venue_id': self.venue_id,
+            'recurrence_rule': self.recurrence_rule,
+            'recurrence_end': self.recurrence_end.isoformat() if self.recurrence_end else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'guest_count': len(self.guests),
-            'vendor_count': len(self.vendors),
-            'staff_count': len(self.staff)
+            'guest_count': counts['guest_count'],
+            'vendor_count': counts['vendor_count'],
+            'staff_count': counts['staff_count']
+        }
+
+# Full-text search structures behind services/search_service.py. Neither is
+# a mapped column (PostgreSQL's tsvector is written with SQL, SQLite's FTS5
+# table is virtual), so they are created and dropped with the events table
+SEARCH_FTS_TABLE = 'events_fts'
+
+SEARCH_INDEX_DDL = {
+    'postgresql': [
+        "ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector",
+        "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING GIN (search_vector)",
+    ],
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} "
+        "USING fts5(title, description, tokenize='porter unicode61')",
+    ],
+}
+
+for _dialect, _statements in SEARCH_INDEX_DDL.items():
+    for _statement in _statements:
+        sa_event.listen(Event.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+sa_event.listen(Event.__table__, 'before_drop',
+                DDL(f"DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}").execute_if(dialect='sqlite'))
+
+class EventOccurrenceException(db.Model):
+    """An edited or cancelled occurrence of a recurring event.
+
+    Regular occurrences are never stored; they are expanded from the series'
+    rule at query time. ``original_start`` identifies the occurrence the rule
+    generated, and the nullable columns override the series' values.
+    """
+    __tablename__ = 'event_occurrence_exceptions'
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'original_start', name='uq_event_occurrence_exception'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False, index=True)
+    original_start = db.Column(db.DateTime, nullable=False)
+    is_cancelled = db.Column(db.Boolean, default=False, nullable=False)
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    title = db.Column(db.String(200))
+    description = db.Column(db.Text)
+    location = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    event = db.relationship('Event', back_populates='occurrence_exceptions')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'original_start': self.original_start.isoformat(),
+            'is_cancelled': self.is_cancelled,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'title': self.title,
+            'description': self.description,
+            'location': self.location
         }
 
 class EventGuest(db.Model):
@@ -80,7 +211,7 @@ class EventGuest(db.Model):
     first_name = db.Column(db.String(64), nullable=False)
     last_name = db.Column(db.String(64), nullable=False)
     phone = db.Column(db.String(20))
-    rsvp_status = db.Column(db.String(20), default='pending')  # pending, accepted, declined
+    rsvp_status = db.Column(db.String(20), default='pending')  # pending, accepted, declined, waitlisted
     check_in_time = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -102,6 +233,10 @@ class EventGuest(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+# One guest row per email and event, whatever its case; guest imports
+# upsert against it
+db.Index('uq_event_guests_event_email', EventGuest.event_id, db.func.lower(EventGuest.email), unique=True)
+
 class EventVendor(db.Model):
     __tablename__ = 'event_vendors'
     
@@ -136,6 +271,9 @@ class EventVendor(db.Model):
 class EventStaff(db.Model):
     __tablename__ = 'event_staff'
     
+    # Set on a new row to skip the double-booking check (staffing_service)
+    allow_conflicts = False
+    
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
     staff_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -159,3 +297,5 @@ class EventStaff(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+cascade_deletes(Event)
@@ -0,0 +1,208 @@
+import random
+from flask import current_app, has_app_context
+from sqlalchemy import event as sa_event, inspect
+from .. import db
+from ..utils.db import conflict_insert
+from .event import EventGuest
+
+# Columns counted per event; rsvp_status values outside RSVP_COLUMNS only
+# count towards ``total``
+RSVP_COLUMNS = ('accepted', 'declined', 'pending', 'waitlisted')
+COUNTER_COLUMNS = RSVP_COLUMNS + ('checked_in', 'total')
+
+class EventGuestCounter(db.Model):
+    """Per-event guest totals by RSVP status and check-in state.
+
+    Maintained by the EventGuest mapper listeners below in the same
+    transaction as the guest change, and by ``apply_deltas`` for Core bulk
+    writes. Each event has up to GUEST_COUNTER_SHARDS rows; writers pick a
+    shard at random so hot events don't serialize on one row, and readers
+    sum the shards. ``reconcile`` recomputes events from event_guests to
+    repair drift.
+    """
+    __tablename__ = 'event_guest_counters'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0)
+    accepted = db.Column(db.Integer, nullable=False, default=0)
+    declined = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    waitlisted = db.Column(db.Integer, nullable=False, default=0)
+    checked_in = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def counts_for(cls, event_ids):
+        """{event_id: {column: value}} summed over shards, in one query"""
+        event_ids = list(event_ids)
+        if not event_ids:
+            return {}
+        rows = db.session.query(
+            cls.event_id, *[db.func.sum(getattr(cls, column)) for column in COUNTER_COLUMNS]
+        ).filter(cls.event_id.in_(event_ids)).group_by(cls.event_id)
+        return {
+            row[0]: {column: int(value or 0) for column, value in zip(COUNTER_COLUMNS, row[1:])}
+            for row in rows
+        }
+
+    @classmethod
+    def summed(cls):
+        """Subquery of (event_id, total guests) for joining into list queries"""
+        return db.session.query(
+            cls.event_id.label('event_id'), db.func.sum(cls.total).label('total')
+        ).group_by(cls.event_id)
+
+    @classmethod
+    def reconcile(cls, event_ids):
+        """Recompute the counters of ``event_ids`` from event_guests (no commit)
+
+        Returns the ids whose stored counts had drifted. Counter rows are
+        locked first on PostgreSQL, so concurrent increments queue behind
+        the rewrite and are applied on top of the recomputed values.
+        """
+        event_ids = list(event_ids)
+        if not event_ids:
+            return []
+        table = cls.__table__
+        db.session.execute(
+            db.select([table.c.event_id]).where(table.c.event_id.in_(event_ids)).with_for_update()
+        ).all()
+        stored = cls.counts_for(event_ids)
+
+        guests = EventGuest.__table__
+        actual = {
+            row[0]: dict(zip(COUNTER_COLUMNS, (int(value or 0) for value in row[1:])))
+            for row in db.session.execute(
+                db.select([
+                    guests.c.event_id,
+                    *[db.func.sum(db.case([(guests.c.rsvp_status == status, 1)], else_=0))
+                      for status in RSVP_COLUMNS],
+                    db.func.count(guests.c.check_in_time),
+                    db.func.count(guests.c.id)
+                ]).where(guests.c.event_id.in_(event_ids)).group_by(guests.c.event_id)
+            )
+        }
+
+        zero = dict.fromkeys(COUNTER_COLUMNS, 0)
+        drifted = [
+            event_id for event_id in event_ids
+            if stored.get(event_id, zero) != actual.get(event_id, zero)
+        ]
+        if drifted:
+            db.session.execute(table.delete().where(table.c.event_id.in_(drifted)))
+            rows = [dict(actual[event_id], event_id=event_id, shard=0)
+                    for event_id in drifted if event_id in actual]
+            if rows:
+                db.session.execute(table.insert(), rows)
+        return drifted
+
+def _shard_count():
+    if has_app_context():
+        return max(1, current_app.config.get('GUEST_COUNTER_SHARDS', 1))
+    return 1
+
+def guest_state(rsvp_status, check_in_time):
+    return (rsvp_status or 'pending', check_in_time is not None)
+
+def guest_delta(old, new):
+    """Counter changes for a guest moving from state ``old`` to ``new``
+
+    States are ``guest_state`` tuples, or None for a guest that doesn't
+    exist before (insert) or after (delete) the change.
+    """
+    delta = dict.fromkeys(COUNTER_COLUMNS, 0)
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        status, checked_in = state
+        delta['total'] += sign
+        if status in RSVP_COLUMNS:
+            delta[status] += sign
+        if checked_in:
+            delta['checked_in'] += sign
+    return delta
+
+def _upsert(connection):
+    table = EventGuestCounter.__table__
+    insert = conflict_insert(table, connection)
+    if insert is None:
+        return None
+    return insert.on_conflict_do_update(
+        index_elements=[table.c.event_id, table.c.shard],
+        set_={column: table.c[column] + insert.excluded[column] for column in COUNTER_COLUMNS}
+    )
+
+def apply_deltas(connection, deltas):
+    """Add ``{event_id: delta}`` to the counters in the connection's transaction
+
+    The increments are relative (``col = col + delta``), so concurrent
+    writers never overwrite each other; PostgreSQL and SQLite use one
+    batched upsert.
+    """
+    shards = _shard_count()
+    rows = [
+        dict(delta, event_id=event_id, shard=random.randrange(shards))
+        for event_id, delta in deltas.items() if any(delta.values())
+    ]
+    if not rows:
+        return
+    statement = _upsert(connection)
+    if statement is not None:
+        connection.execute(statement, rows)
+        return
+
+    table = EventGuestCounter.__table__
+    for row in rows:
+        updated = connection.execute(
+            table.update()
+            .where(table.c.event_id == row['event_id'], table.c.shard == row['shard'])
+            .values({column: table.c[column] + row[column] for column in COUNTER_COLUMNS})
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert(), row)
+
+def merge_deltas(deltas, event_id, delta):
+    """Accumulate ``delta`` into a ``{event_id: delta}`` dict"""
+    total = deltas.setdefault(event_id, dict.fromkeys(COUNTER_COLUMNS, 0))
+    for column, value in delta.items():
+        total[column] += value
+    return deltas
+
+def _load_previous(target, value, oldvalue, initiator):
+    return value
+
+# Load the previous value when these change on an expired instance, so
+# after_update can tell which counters the guest is leaving
+for _attribute in (EventGuest.event_id, EventGuest.rsvp_status, EventGuest.check_in_time):
+    sa_event.listen(_attribute, 'set', _load_previous, active_history=True, retval=True)
+
+@sa_event.listens_for(EventGuest, 'after_insert')
+def _guest_inserted(mapper, connection, target):
+    apply_deltas(connection, {
+        target.event_id: guest_delta(None, guest_state(target.rsvp_status, target.check_in_time))
+    })
+
+@sa_event.listens_for(EventGuest, 'after_update')
+def _guest_updated(mapper, connection, target):
+    state = inspect(target)
+
+    def before(name):
+        history = state.attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(target, name)
+
+    if not any(state.attrs[name].history.has_changes()
+               for name in ('event_id', 'rsvp_status', 'check_in_time')):
+        return
+    old_event_id = before('event_id')
+    deltas = {}
+    merge_deltas(deltas, old_event_id,
+                 guest_delta(guest_state(before('rsvp_status'), before('check_in_time')), None))
+    merge_deltas(deltas, target.event_id,
+                 guest_delta(None, guest_state(target.rsvp_status, target.check_in_time)))
+    apply_deltas(connection, deltas)
+
+@sa_event.listens_for(EventGuest, 'after_delete')
+def _guest_deleted(mapper, connection, target):
+    apply_deltas(connection, {
+        target.event_id: guest_delta(guest_state(target.rsvp_status, target.check_in_time), None)
+    })
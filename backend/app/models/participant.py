@@ -0,0 +1,155 @@
+from sqlalchemy import event as sa_event, inspect
+from .. import db
+from .event import EventGuest, EventVendor, EventStaff
+from .user import User
+
+class ParticipantRole:
+    GUEST = 'guest'
+    VENDOR = 'vendor'
+    STAFF = 'staff'
+
+# Which participant role grants a user of a given role access to an event
+PARTICIPANT_ROLE_FOR_USER = {
+    'staff': ParticipantRole.STAFF,
+    'vendor': ParticipantRole.VENDOR,
+    'attendee': ParticipantRole.GUEST,
+}
+
+def participant_role_for(user):
+    """Get the participant role that grants ``user`` access, if any"""
+    # UserRole members hash by name, so look up by the plain value
+    return PARTICIPANT_ROLE_FOR_USER.get(getattr(user.role, 'value', user.role))
+
+class EventParticipant(db.Model):
+    """Denormalized (user, event, role) index over guests, vendors and staff.
+
+    Rows are derived from event_guests/event_vendors/event_staff by the mapper
+    listeners below and are never written directly. ``source_id`` is the id
+    of the originating row so updates and deletes can find their entry.
+    Guests are linked by email, compared case-insensitively, so a guest only
+    appears here once a user with that email exists.
+    """
+    __tablename__ = 'event_participants'
+    __table_args__ = (
+        db.Index('ix_event_participants_user_event', 'user_id', 'event_id', 'role'),
+        db.Index('ix_event_participants_event', 'event_id'),
+        db.UniqueConstraint('role', 'source_id', name='uq_event_participants_source'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    source_id = db.Column(db.Integer, nullable=False)
+
+    @classmethod
+    def has_access(cls, event_id, user_id, role):
+        """Check a single (user, event, role) entry with one indexed lookup"""
+        return db.session.query(
+            db.session.query(cls.id).filter_by(
+                user_id=user_id, event_id=event_id, role=role
+            ).exists()
+        ).scalar()
+
+    @classmethod
+    def event_ids_for(cls, user_id, role):
+        """Subquery of the event ids a user participates in with a role"""
+        return db.session.query(cls.event_id).filter_by(user_id=user_id, role=role).subquery()
+
+    @classmethod
+    def rebuild(cls):
+        """Regenerate the whole index from the participant tables"""
+        table = cls.__table__
+        db.session.execute(table.delete())
+        db.session.execute(table.insert().from_select(
+            ['event_id', 'user_id', 'role', 'source_id'],
+            db.select([EventStaff.event_id, EventStaff.staff_id,
+                       db.literal(ParticipantRole.STAFF), EventStaff.id])
+        ))
+        db.session.execute(table.insert().from_select(
+            ['event_id', 'user_id', 'role', 'source_id'],
+            db.select([EventVendor.event_id, EventVendor.vendor_id,
+                       db.literal(ParticipantRole.VENDOR), EventVendor.id])
+        ))
+        db.session.execute(table.insert().from_select(
+            ['event_id', 'user_id', 'role', 'source_id'],
+            db.select([EventGuest.event_id, User.id,
+                       db.literal(ParticipantRole.GUEST), EventGuest.id])
+            .select_from(EventGuest)
+            .join(User, db.func.lower(User.email) == db.func.lower(EventGuest.email))
+        ))
+        db.session.commit()
+
+# Source tables and the column holding the participating user for each
+_SOURCES = {
+    EventStaff: (ParticipantRole.STAFF, 'staff_id'),
+    EventVendor: (ParticipantRole.VENDOR, 'vendor_id'),
+    EventGuest: (ParticipantRole.GUEST, None),
+}
+
+def _user_id_for(connection, target, user_column):
+    if user_column:
+        return getattr(target, user_column)
+    if not target.email:
+        return None
+    users = User.__table__
+    return connection.execute(
+        db.select([users.c.id]).where(db.func.lower(users.c.email) == target.email.lower())
+    ).scalar()
+
+def _insert_entry(connection, target, role, user_column):
+    user_id = _user_id_for(connection, target, user_column)
+    if user_id is None:
+        return
+    connection.execute(EventParticipant.__table__.insert().values(
+        event_id=target.event_id, user_id=user_id, role=role, source_id=target.id
+    ))
+
+def _delete_entry(connection, target, role):
+    table = EventParticipant.__table__
+    connection.execute(table.delete().where(
+        db.and_(table.c.role == role, table.c.source_id == target.id)
+    ))
+
+def _register(model, role, user_column):
+    watched = ['event_id', user_column or 'email']
+
+    @sa_event.listens_for(model, 'after_insert')
+    def after_insert(mapper, connection, target):
+        _insert_entry(connection, target, role, user_column)
+
+    @sa_event.listens_for(model, 'after_update')
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in watched):
+            _delete_entry(connection, target, role)
+            _insert_entry(connection, target, role, user_column)
+
+    @sa_event.listens_for(model, 'after_delete')
+    def after_delete(mapper, connection, target):
+        _delete_entry(connection, target, role)
+
+for _model, (_role, _column) in _SOURCES.items():
+    _register(_model, _role, _column)
+
+@sa_event.listens_for(User, 'after_insert')
+def _link_guest_entries(mapper, connection, target):
+    """Pick up guest invitations that were sent before the user registered"""
+    guests = EventGuest.__table__
+    connection.execute(EventParticipant.__table__.insert().from_select(
+        ['event_id', 'user_id', 'role', 'source_id'],
+        db.select([guests.c.event_id, db.literal(target.id),
+                   db.literal(ParticipantRole.GUEST), guests.c.id])
+        .where(db.func.lower(guests.c.email) == target.email.lower())
+    ))
+
+@sa_event.listens_for(User, 'after_update')
+def _relink_guest_entries(mapper, connection, target):
+    """Follow a changed email to the guest rows that now belong to the user"""
+    if not inspect(target).attrs.email.history.has_changes():
+        return
+    table = EventParticipant.__table__
+    connection.execute(table.delete().where(
+        db.and_(table.c.user_id == target.id, table.c.role == ParticipantRole.GUEST)
+    ))
+    _link_guest_entries(mapper, connection, target)
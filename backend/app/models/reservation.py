@@ -0,0 +1,56 @@
+from datetime import datetime
+from .. import db
+
+class EventCapacity(db.Model):
+    """Seat ledger for an event with ``max_attendees``.
+
+    Kept apart from the events row so a burst of RSVPs only contends on this
+    small row, and each seat is taken with one conditional UPDATE
+    (``reserved < capacity``) rather than a count followed by an insert.
+    Events without a limit have no row.
+    """
+    __tablename__ = 'event_capacity'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    capacity = db.Column(db.Integer, nullable=False)
+    reserved = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'event_id': self.event_id,
+            'capacity': self.capacity,
+            'reserved': self.reserved,
+            'available': max(self.capacity - self.reserved, 0)
+        }
+
+class WaitlistEntry(db.Model):
+    """A guest waiting for a seat at a full event.
+
+    Entries are promoted by descending ``priority``, then in arrival order
+    (``id``), which the composite index serves directly.
+    """
+    __tablename__ = 'event_waitlist'
+    __table_args__ = (
+        db.Index('ix_event_waitlist_order', 'event_id', db.text('priority DESC'), 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    guest_id = db.Column(db.Integer, db.ForeignKey('event_guests.id', ondelete='CASCADE'),
+                         nullable=False, unique=True)
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    guest = db.relationship('EventGuest')
+
+    def to_dict(self, position=None):
+        data = {
+            'id': self.id,
+            'event_id': self.event_id,
+            'guest_id': self.guest_id,
+            'priority': self.priority,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+        if position is not None:
+            data['position'] = position
+        return data
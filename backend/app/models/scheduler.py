@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+from .. import db
+from ..utils.db import conflict_insert
+
+class SchedulerLease(db.Model):
+    """Time-limited ownership of a background job shared by all workers.
+
+    The holder renews the lease while it runs; once ``expires_at`` passes
+    (the holder stopped or crashed) any other worker may take it over.
+    """
+    __tablename__ = 'scheduler_leases'
+
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def acquire(cls, name, holder, seconds, now=None):
+        """Take or renew the lease ``name`` for ``holder``; True if it is held (no commit)"""
+        now = now or datetime.utcnow()
+        table = cls.__table__
+        values = {'holder': holder, 'expires_at': now + timedelta(seconds=seconds)}
+        renewed = db.session.execute(table.update().where(
+            table.c.name == name,
+            db.or_(table.c.holder == holder, table.c.expires_at < now)
+        ).values(values)).rowcount
+        if renewed:
+            return True
+
+        insert = conflict_insert(table)
+        if insert is not None:
+            insert = insert.on_conflict_do_nothing()
+        elif db.session.query(table.c.name).filter(table.c.name == name).first() is not None:
+            return False
+        else:
+            insert = table.insert()
+        return db.session.execute(insert.values(name=name, **values)).rowcount == 1
+
+    @classmethod
+    def release(cls, name, holder):
+        """Give the lease up early (no commit)"""
+        table = cls.__table__
+        db.session.execute(table.delete().where(table.c.name == name, table.c.holder == holder))
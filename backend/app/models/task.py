@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from .. import db
+from .cascade import cascade_deletes
 
 class TaskStatus(str, Enum):
     TODO = 'todo'
@@ -21,31 +22,48 @@ class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    due_date = db.Column(db.DateTime)
+    due_date = db.Column(db.DateTime, index=True)
+    estimated_hours = db.Column(db.Float)
     status = db.Column(db.Enum(TaskStatus), default=TaskStatus.TODO)
     priority = db.Column(db.Enum(TaskPriority), default=TaskPriority.MEDIUM)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     event = db.relationship('Event', back_populates='tasks')
     creator = db.relationship('User', foreign_keys=[created_by])
     assignments = db.relationship('TaskAssignment', back_populates='task', cascade='all, delete-orphan')
     
-    def to_dict(self):
+    def user_ids(self):
+        """IDs of every user this task's serialization names"""
+        ids = {self.created_by}
+        for assignment in self.assignments:
+            ids.update((assignment.assignee_id, assignment.assigned_by))
+        return ids
+
+    def to_dict(self, names=None):
+        """Serialize the task with its assignments.
+
+        ``names`` maps user IDs to display names (see ``User.display_names``);
+        list endpoints pass one lookup for the whole page instead of loading
+        the creator, assignees and assigners of every task.
+        """
+        if names is None:
+            names = _relationship_names(self)
         return {
             'id': self.id,
             'title': self.title,
             'description': self.description,
             'due_date': self.due_date.isoformat() if self.due_date else None,
+            'estimated_hours': self.estimated_hours,
             'status': self.status.value,
             'priority': self.priority.value,
             'event_id': self.event_id,
             'created_by': self.created_by,
-            'created_by_name': f"{self.creator.first_name} {self.creator.last_name}" if self.creator else None,
-            'assignees': [a.to_dict() for a in self.assignments],
+            'created_by_name': names.get(self.created_by),
+            'assignees': [a.to_dict(names) for a in self.assignments],
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -66,16 +84,60 @@ class TaskAssignment(db.Model):
     assignee = db.relationship('User', foreign_keys=[assignee_id], back_populates='assigned_tasks')
     assigner = db.relationship('User', foreign_keys=[assigned_by])
     
-    def to_dict(self):
+    def to_dict(self, names=None):
+        if names is None:
+            names = {}
+            for user in (self.assignee, self.assigner):
+                if user is not None:
+                    names[user.id] = f"{user.first_name} {user.last_name}"
         return {
             'id': self.id,
             'task_id': self.task_id,
             'assignee_id': self.assignee_id,
-            'assignee_name': f"{self.assignee.first_name} {self.assignee.last_name}" if self.assignee else None,
+            'assignee_name': names.get(self.assignee_id),
             'assigned_by': self.assigned_by,
-            'assigned_by_name': f"{self.assigner.first_name} {self.assigner.last_name}" if self.assigner else None,
+            'assigned_by_name': names.get(self.assigned_by),
             'assigned_at': self.assigned_at.isoformat() if self.assigned_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'notes': self.notes,
             'status': 'completed' if self.completed_at else 'pending'
         }
+
+class TaskDependency(db.Model):
+    """``task_id`` cannot start before ``depends_on_id`` is done.
+
+    Both tasks belong to ``event_id``, which is stored on the edge so an
+    event's whole graph is read with one indexed query.
+    """
+    __tablename__ = 'task_dependencies'
+    __table_args__ = (
+        db.CheckConstraint('task_id <> depends_on_id', name='ck_task_dependencies_not_self'),
+    )
+
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True)
+    depends_on_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True,
+                              index=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TaskReminder(db.Model):
+    """A due-date reminder that went out.
+
+    Keyed on the due date it was sent for, so moving the due date arms the
+    reminders again, and a restarted scheduler skips what was already sent.
+    """
+    __tablename__ = 'task_reminders'
+
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True)
+    due_date = db.Column(db.DateTime, primary_key=True)
+    lead_minutes = db.Column(db.Integer, primary_key=True)
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+cascade_deletes(Task)
+
+def _relationship_names(task):
+    """Display names taken from the task's loaded (or lazily loaded) users"""
+    users = [task.creator]
+    for assignment in task.assignments:
+        users.extend((assignment.assignee, assignment.assigner))
+    return {user.id: f"{user.first_name} {user.last_name}" for user in users if user is not None}
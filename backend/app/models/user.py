@@ -24,13 +24,16 @@ class User(db.Model):
     role = db.Column(db.Enum(UserRole), default=UserRole.ATTENDEE, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     email_verified = db.Column(db.Boolean, default=False)
+    # Bumped to revoke every calendar feed URL issued so far
+    calendar_feed_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     organized_events = db.relationship('Event', backref='organizer', lazy=True, foreign_keys='Event.organizer_id')
     event_staff = db.relationship('EventStaff', back_populates='staff', lazy=True)
-    assigned_tasks = db.relationship('TaskAssignment', back_populates='assignee', lazy=True)
+    assigned_tasks = db.relationship('TaskAssignment', back_populates='assignee', lazy=True,
+                                     foreign_keys='TaskAssignment.assignee_id')
     
     def __init__(self, **kwargs):
         super(User, self).__init__(**kwargs)
@@ -67,6 +70,15 @@ class User(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    @classmethod
+    def display_names(cls, user_ids):
+        """Get "First Last" for many users in one query, as {user_id: name}"""
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return {}
+        rows = db.session.query(cls.id, cls.first_name, cls.last_name).filter(cls.id.in_(user_ids))
+        return {user_id: f"{first_name} {last_name}" for user_id, first_name, last_name in rows}
+
     @classmethod
     def get_by_email(cls, email):
         return cls.query.filter_by(email=email.lower()).first()
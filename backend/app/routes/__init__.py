@@ -3,7 +3,7 @@ from flask_restx import Api
 from flask_cors import CORS
 
 # Import route modules here
-from . import auth, events, users, venues, tasks, budget, ai
+from . import auth, events, users, venues, tasks, budget, uploads, ai
 
 api_bp = Blueprint('api', __name__)
 CORS(api_bp, resources={r"/*": {"origins": "*"}})
@@ -28,6 +28,7 @@ def create_api(blueprint):
     from .venues import api as venues_ns
     from .tasks import api as tasks_ns
     from .budget import api as budget_ns
+    from .uploads import api as uploads_ns
     
     api.add_namespace(auth_ns)
     api.add_namespace(users_ns)
@@ -35,6 +36,7 @@ def create_api(blueprint):
     api.add_namespace(venues_ns)
     api.add_namespace(tasks_ns)
     api.add_namespace(budget_ns)
+    api.add_namespace(uploads_ns)
     
     return api
 
@@ -1,8 +1,9 @@
 from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, inputs
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Budget, BudgetItem, BudgetStatus, ExpenseCategory, Event
 from ..services.auth_service import get_current_user
+from ..utils.pagination import keyset_paginate, InvalidCursor
 
 api = Namespace('budgets', description='Budget operations')
 
@@ -27,12 +28,17 @@ budget_item_model = api.model('BudgetItem', {
     'notes': fields.String(description='Item notes')
 })
 
+# Sort key used for cursor pagination of the budget list
+BUDGET_CURSOR_ORDER = [(Budget.created_at, True), (Budget.id, True)]
+
 # Query parameters
 budget_parser = api.parser()
 budget_parser.add_argument('status', type=str, help='Filter by status')
 budget_parser.add_argument('event_id', type=int, help='Filter by event ID')
 budget_parser.add_argument('page', type=int, default=1, help='Page number')
 budget_parser.add_argument('per_page', type=int, default=20, help='Items per page')
+budget_parser.add_argument('cursor', type=str, help='Opaque cursor for keyset pagination on (created_at DESC, id DESC) (empty for the first page)')
+budget_parser.add_argument('include_total', type=inputs.boolean, default=False, help='Include the total count in cursor mode')
 
 @api.route('/')
 class BudgetList(Resource):
@@ -65,6 +71,18 @@ class BudgetList(Resource):
         # Pagination
         page = args.get('page', 1)
         per_page = args.get('per_page', 20)
+        
+        if args.get('cursor') is not None:
+            try:
+                result = keyset_paginate(
+                    query, BUDGET_CURSOR_ORDER,
+                    cursor=args['cursor'], per_page=per_page, include_total=args['include_total']
+                )
+            except InvalidCursor as e:
+                return {"error": str(e)}, 400
+            result['items'] = [budget.to_dict() for budget in result['items']]
+            return result
+        
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return {
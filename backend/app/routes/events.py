@@ -1,10 +1,26 @@
 from flask import request, current_app
-from flask_restx import Namespace, Resource, fields
+from werkzeug.wsgi import get_input_stream
+from flask_restx import Namespace, Resource, fields, inputs
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..services.event_service import (
-    get_events, get_event_by_id, create_event,
+    get_events, get_event_by_id, get_event_dashboard, create_event, bulk_update_status,
     update_event, delete_event, upload_event_cover, is_authorized_for_event
 )
+from ..services.event_cache import get_event_cache
+from ..services.calendar_service import feed_token, rotate_feed_token, user_from_token, user_feed, event_feed
+from ..services.import_service import import_events, import_guests
+from ..services.checkin_service import get_ticket, scan_ticket
+from ..services.guest_counter_service import get_guest_stats
+from ..services.reservation_service import respond, get_waitlist
+from ..services.email_service import queue_invitations, get_campaign
+from ..services.staffing_service import get_staff_conflicts, get_event_staff_conflicts, assign_staff
+from ..services.task_graph_service import get_critical_path
+from ..services.recurrence_service import (
+    get_occurrences, update_occurrence, cancel_occurrence, restore_occurrence
+)
+from ..services.export_service import (
+    export_events, export_event_guests, export_budget_items, export_expenses
+)
 from ..models import Event, EventStatus, EventType, EventGuest, EventVendor, EventStaff
 from .. import db
 
@@ -23,7 +39,48 @@ event_model = api.model('Event', {
     'is_public': fields.Boolean(description='Whether the event is public', default=True),
     'event_type': fields.String(description='Type of event', enum=[t.value for t in EventType], default='other'),
     'status': fields.String(description='Event status', enum=[s.value for s in EventStatus], default='draft'),
-    'venue_id': fields.Integer(description='ID of the venue')
+    'venue_id': fields.Integer(description='ID of the venue'),
+    'recurrence_rule': fields.String(description='RFC 5545 RRULE for recurring events (e.g. "FREQ=WEEKLY;BYDAY=TU")')
+})
+
+bulk_status_model = api.model('EventBulkStatus', {
+    'event_ids': fields.List(fields.Integer, required=True, description='Events to update'),
+    'status': fields.String(required=True, description='New status', enum=[s.value for s in EventStatus])
+})
+
+check_in_model = api.model('CheckIn', {
+    'code': fields.String(required=True, description='Code from the scanned ticket')
+})
+
+rsvp_model = api.model('Rsvp', {
+    'status': fields.String(required=True, description='Response', enum=['accepted', 'declined']),
+    'guest_id': fields.Integer(description='Guest to respond for (organizers only; default: yourself)'),
+    'priority': fields.Integer(description='Waitlist priority, higher first (organizers only)')
+})
+
+invitation_model = api.model('Invitations', {
+    'subject': fields.String(description='Subject template (default: "You\'re invited: $event_title")'),
+    'body': fields.String(description='Body template; $event_title, $event_start, $event_location, '
+                                      '$event_description, $message, $first_name, $last_name and $email '
+                                      'are substituted'),
+    'message': fields.String(description='Personal note for the default template'),
+    'rsvp_statuses': fields.List(fields.String, description='Only invite guests with these RSVP statuses')
+})
+
+staff_assignment_model = api.model('StaffAssignment', {
+    'staff_id': fields.Integer(required=True, description='User to assign'),
+    'role': fields.String(required=True, description='Role at the event'),
+    'responsibilities': fields.String(description='Responsibilities'),
+    'allow_conflicts': fields.Boolean(description='Assign even if it double-books the staff member', default=False)
+})
+
+occurrence_model = api.model('EventOccurrence', {
+    'start_time': fields.DateTime(description='New start time of this occurrence'),
+    'end_time': fields.DateTime(description='New end time of this occurrence'),
+    'title': fields.String(description='Title override'),
+    'description': fields.String(description='Description override'),
+    'location': fields.String(description='Location override'),
+    'is_cancelled': fields.Boolean(description='Whether this occurrence is cancelled')
 })
 
 # Query parameters
@@ -35,6 +92,8 @@ event_parser.add_argument('end_date', type=str, help='Filter by end date (YYYY-M
 event_parser.add_argument('search', type=str, help='Search term')
 event_parser.add_argument('page', type=int, default=1, help='Page number')
 event_parser.add_argument('per_page', type=int, default=20, help='Items per page')
+event_parser.add_argument('cursor', type=str, help='Opaque cursor for keyset pagination (empty for the first page)')
+event_parser.add_argument('include_total', type=inputs.boolean, default=False, help='Include the total count in cursor mode')
 
 @api.route('/')
 class EventList(Resource):
@@ -49,13 +108,18 @@ class EventList(Resource):
         user = db.session.get(User, user_id)
         
         # Convert string dates to datetime objects
-        filters = {k: v for k, v in args.items() if v is not None and k not in ['page', 'per_page']}
+        filters = {
+            k: v for k, v in args.items()
+            if v is not None and k not in ['page', 'per_page', 'cursor', 'include_total']
+        }
         
         return get_events(
             user=user,
             filters=filters,
             page=args['page'],
-            per_page=args['per_page']
+            per_page=args['per_page'],
+            cursor=args['cursor'],
+            include_total=args['include_total']
         )
     
     @jwt_required()
@@ -69,6 +133,356 @@ class EventList(Resource):
         user = db.session.get(User, user_id)
         return create_event(request.get_json(), user)
 
+import_parser = api.parser()
+import_parser.add_argument('format', type=str, choices=('csv', 'ndjson'), default='ndjson',
+                           location='args', help='Format of the request body')
+
+def import_stream():
+    """The raw import body, or None if it is over IMPORT_MAX_CONTENT_LENGTH
+
+    Read from the WSGI input rather than request.stream (and the parsers
+    only look at the query string), so the MAX_CONTENT_LENGTH meant for
+    file uploads doesn't cap imports.
+    """
+    limit = current_app.config.get('IMPORT_MAX_CONTENT_LENGTH')
+    if limit is not None and (request.content_length or 0) > limit:
+        return None
+    return get_input_stream(request.environ)
+
+@api.route('/bulk-status')
+class EventBulkStatus(Resource):
+    @jwt_required()
+    @api.expect(bulk_status_model, validate=True)
+    @api.response(200, 'Statuses updated (see errors for events that were not)')
+    @api.response(400, 'Invalid input')
+    @api.response(401, 'Not authenticated')
+    @api.response(409, 'Venue conflict')
+    def post(self):
+        """Change the status of many events at once"""
+        data = request.get_json()
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return bulk_update_status(data.get('event_ids'), data.get('status'), user)
+
+@api.route('/import')
+class EventImport(Resource):
+    @jwt_required()
+    @api.expect(import_parser)
+    @api.response(200, 'Import finished (see per-row errors)')
+    @api.response(400, 'Unreadable import file')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(413, 'Import file too large')
+    def post(self):
+        """Bulk import events from a streamed CSV or NDJSON body"""
+        args = import_parser.parse_args()
+        stream = import_stream()
+        if stream is None:
+            return {"error": "Import file is too large"}, 413
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return import_events(stream, args['format'], user)
+
+guest_import_parser = api.parser()
+guest_import_parser.add_argument('format', type=str, choices=('csv', 'ndjson'), default='csv',
+                                 location='args', help='Format of the request body')
+guest_import_parser.add_argument('update_existing', type=inputs.boolean, default=True,
+                                 location='args', help='Update guests whose email is already on the list')
+
+@api.route('/<int:event_id>/guests/import')
+@api.param('event_id', 'The event identifier')
+class EventGuestImport(Resource):
+    @jwt_required()
+    @api.expect(guest_import_parser)
+    @api.response(200, 'Import finished (see per-row errors)')
+    @api.response(400, 'Unreadable import file')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    @api.response(413, 'Import file too large')
+    def post(self, event_id):
+        """Bulk import guests from a streamed CSV or NDJSON body, deduplicated by email"""
+        args = guest_import_parser.parse_args()
+        stream = import_stream()
+        if stream is None:
+            return {"error": "Import file is too large"}, 413
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return import_guests(event_id, stream, args['format'], user, args['update_existing'])
+
+@api.route('/<int:event_id>/guests/<int:guest_id>/ticket')
+@api.param('event_id', 'The event identifier')
+@api.param('guest_id', 'The guest identifier')
+class EventGuestTicket(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Guest not found')
+    def get(self, event_id, guest_id):
+        """Get the signed ticket code for a guest's QR code"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_ticket(event_id, guest_id, user)
+
+@api.route('/<int:event_id>/check-in')
+@api.param('event_id', 'The event identifier')
+class EventCheckIn(Resource):
+    @jwt_required()
+    @api.expect(check_in_model, validate=True)
+    @api.response(200, 'Checked in')
+    @api.response(400, 'Invalid ticket')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    @api.response(409, 'Already checked in')
+    def post(self, event_id):
+        """Check a guest in by scanning their ticket"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return scan_ticket(event_id, request.get_json().get('code'), user)
+
+@api.route('/<int:event_id>/rsvp')
+@api.param('event_id', 'The event identifier')
+class EventRsvp(Resource):
+    @jwt_required()
+    @api.expect(rsvp_model, validate=True)
+    @api.response(200, 'Response recorded (accepted, declined or waitlisted)')
+    @api.response(400, 'Invalid response or event not open')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event or guest not found')
+    def post(self, event_id):
+        """Accept or decline an event, joining the waitlist when it is full"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        data = request.get_json()
+        return respond(event_id, user, data.get('status'), data.get('guest_id'), data.get('priority'))
+
+@api.route('/<int:event_id>/waitlist')
+@api.param('event_id', 'The event identifier')
+class EventWaitlist(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Get the seat ledger and the waitlist in promotion order"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_waitlist(event_id, user)
+
+@api.route('/<int:event_id>/invitations')
+@api.param('event_id', 'The event identifier')
+class EventInvitations(Resource):
+    @jwt_required()
+    @api.expect(invitation_model)
+    @api.response(202, 'Invitations queued')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    @api.response(503, 'Email is not configured')
+    def post(self, event_id):
+        """Queue invitation emails to the event's guests"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return queue_invitations(event_id, request.get_json() or {}, user)
+
+@api.route('/<int:event_id>/invitations/<int:campaign_id>')
+@api.param('event_id', 'The event identifier')
+@api.param('campaign_id', 'The invitation campaign identifier')
+class EventInvitationStatus(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Campaign not found')
+    def get(self, event_id, campaign_id):
+        """Get an invitation campaign's delivery progress"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_campaign(event_id, campaign_id, user)
+
+staff_conflict_parser = api.parser()
+staff_conflict_parser.add_argument('staff_id', type=int, help='Only this staff member (default: everyone)')
+staff_conflict_parser.add_argument('start_date', type=str, help='Window start (ISO 8601, default: now)')
+staff_conflict_parser.add_argument('end_date', type=str, help='Window end (ISO 8601, default: horizon)')
+
+@api.route('/staff-conflicts')
+class StaffConflicts(Resource):
+    @jwt_required()
+    @api.expect(staff_conflict_parser)
+    @api.response(200, 'Success')
+    @api.response(400, 'Invalid date window')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    def get(self):
+        """List overlapping bookings of staff members in a date window"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        args = staff_conflict_parser.parse_args()
+        return get_staff_conflicts(user, args.get('staff_id'), args.get('start_date'), args.get('end_date'))
+
+@api.route('/<int:event_id>/staff')
+@api.param('event_id', 'The event identifier')
+class EventStaffList(Resource):
+    @jwt_required()
+    @api.expect(staff_assignment_model, validate=True)
+    @api.response(201, 'Staff assigned')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event or user not found')
+    @api.response(409, 'Staff member is booked at overlapping times')
+    def post(self, event_id):
+        """Assign a staff member to the event"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return assign_staff(event_id, request.get_json(), user)
+
+@api.route('/<int:event_id>/staff-conflicts')
+@api.param('event_id', 'The event identifier')
+class EventStaffConflicts(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """List the event's staff who are booked elsewhere at the same time"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_event_staff_conflicts(event_id, user)
+
+export_parser = api.parser()
+export_parser.add_argument('format', type=str, choices=('csv', 'ndjson'), default='ndjson',
+                           help='Export format')
+
+@api.route('/export')
+class EventExport(Resource):
+    @jwt_required()
+    @api.expect(export_parser)
+    @api.response(200, 'Streamed export')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    def get(self):
+        """Stream all events the current user organizes"""
+        args = export_parser.parse_args()
+        user = db.session.get(User, get_jwt_identity())
+        return export_events(user, args['format'])
+
+@api.route('/<int:event_id>/guests/export')
+@api.param('event_id', 'The event identifier')
+class EventGuestExport(Resource):
+    @jwt_required()
+    @api.expect(export_parser)
+    @api.response(200, 'Streamed export')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Stream an event's guest list"""
+        args = export_parser.parse_args()
+        user = db.session.get(User, get_jwt_identity())
+        return export_event_guests(event_id, user, args['format'])
+
+@api.route('/<int:event_id>/budget-items/export')
+@api.param('event_id', 'The event identifier')
+class EventBudgetItemExport(Resource):
+    @jwt_required()
+    @api.expect(export_parser)
+    @api.response(200, 'Streamed export')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Stream an event's budget line items"""
+        args = export_parser.parse_args()
+        user = db.session.get(User, get_jwt_identity())
+        return export_budget_items(event_id, user, args['format'])
+
+@api.route('/<int:event_id>/expenses/export')
+@api.param('event_id', 'The event identifier')
+class EventExpenseExport(Resource):
+    @jwt_required()
+    @api.expect(export_parser)
+    @api.response(200, 'Streamed export')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Stream the expenses recorded against an event's budget"""
+        args = export_parser.parse_args()
+        user = db.session.get(User, get_jwt_identity())
+        return export_expenses(event_id, user, args['format'])
+
+@api.route('/calendar')
+class CalendarFeedUrl(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    def get(self):
+        """Get the private iCalendar feed URL for the current user"""
+        user = db.session.get(User, get_jwt_identity())
+        token = feed_token(user)
+        return {
+            'token': token,
+            'url': api.url_for(UserCalendarFeed, token=token, _external=True)
+        }
+    
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    def post(self):
+        """Issue a new feed URL, revoking every earlier one"""
+        user = db.session.get(User, get_jwt_identity())
+        token = rotate_feed_token(user)
+        return {
+            'token': token,
+            'url': api.url_for(UserCalendarFeed, token=token, _external=True)
+        }
+
+@api.route('/calendar/<string:token>.ics')
+@api.param('token', 'Signed feed token from /events/calendar')
+class UserCalendarFeed(Resource):
+    @api.response(200, 'iCalendar feed')
+    @api.response(304, 'Not modified')
+    @api.response(404, 'Unknown feed')
+    def get(self, token):
+        """iCalendar feed of the events listed for a user (supports conditional GET)"""
+        user = user_from_token(token)
+        if user is None:
+            return {"error": "Unknown calendar feed"}, 404
+        return user_feed(user)
+
+@api.route('/<int:event_id>/calendar.ics')
+@api.param('event_id', 'The event identifier')
+class EventCalendarFeed(Resource):
+    @jwt_required(optional=True)
+    @api.response(200, 'iCalendar feed')
+    @api.response(304, 'Not modified')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """iCalendar feed for a single event (supports conditional GET)"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id) if user_id is not None else None
+        return event_feed(event_id, user)
+
+@api.route('/cache-stats')
+class EventCacheStats(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    def get(self):
+        """Get hit/miss counters for the event list cache (admin only)"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        if not user or user.role != 'admin':
+            return {"error": "Admin access required"}, 403
+        return get_event_cache().stats()
+
 @api.route('/<int:event_id>')
 @api.param('event_id', 'The event identifier')
 class EventResource(Resource):
@@ -107,6 +521,113 @@ class EventResource(Resource):
         user = db.session.get(User, user_id)
         return delete_event(event_id, user)
 
+@api.route('/<int:event_id>/dashboard')
+@api.param('event_id', 'The event identifier')
+class EventDashboard(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Get an event with its venue, budget, tasks and staff in one call"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_event_dashboard(event_id, user)
+
+@api.route('/<int:event_id>/guest-stats')
+@api.param('event_id', 'The event identifier')
+class EventGuestStats(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Get accepted/declined/pending/checked-in guest totals"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_guest_stats(event_id, user)
+
+@api.route('/<int:event_id>/critical-path')
+@api.param('event_id', 'The event identifier')
+class EventCriticalPath(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Get the critical path, per-task slack and earliest completion of the event's tasks"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_critical_path(event_id, user)
+
+occurrence_parser = api.parser()
+occurrence_parser.add_argument('start_date', type=str, help='Window start (ISO 8601)')
+occurrence_parser.add_argument('end_date', type=str, help='Window end (ISO 8601)')
+
+@api.route('/<int:event_id>/occurrences')
+@api.param('event_id', 'The event identifier')
+class EventOccurrenceList(Resource):
+    @jwt_required()
+    @api.expect(occurrence_parser)
+    @api.response(200, 'Success')
+    @api.response(400, 'Invalid date window')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def get(self, event_id):
+        """Get the occurrences of an event inside a date window"""
+        args = occurrence_parser.parse_args()
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_occurrences(event_id, user, args.get('start_date'), args.get('end_date'))
+
+@api.route('/<int:event_id>/occurrences/<string:recurrence_id>')
+@api.param('event_id', 'The event identifier')
+@api.param('recurrence_id', 'Original start time of the occurrence (ISO 8601)')
+class EventOccurrenceResource(Resource):
+    @jwt_required()
+    @api.expect(occurrence_model)
+    @api.response(200, 'Occurrence updated')
+    @api.response(400, 'Invalid input')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def put(self, event_id, recurrence_id):
+        """Edit a single occurrence of a recurring event"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return update_occurrence(event_id, recurrence_id, request.get_json() or {}, user)
+    
+    @jwt_required()
+    @api.response(200, 'Occurrence cancelled')
+    @api.response(400, 'Invalid occurrence')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def delete(self, event_id, recurrence_id):
+        """Cancel a single occurrence of a recurring event"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return cancel_occurrence(event_id, recurrence_id, user)
+
+@api.route('/<int:event_id>/occurrences/<string:recurrence_id>/restore')
+@api.param('event_id', 'The event identifier')
+@api.param('recurrence_id', 'Original start time of the occurrence (ISO 8601)')
+class EventOccurrenceRestore(Resource):
+    @jwt_required()
+    @api.response(200, 'Occurrence restored')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Event not found')
+    def post(self, event_id, recurrence_id):
+        """Undo edits to (or the cancellation of) an occurrence"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return restore_occurrence(event_id, recurrence_id, user)
+
 @api.route('/<int:event_id>/upload-cover')
 @api.param('event_id', 'The event identifier')
 class EventCoverUpload(Resource):
@@ -1,8 +1,14 @@
 from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, inputs
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import Task, TaskStatus, TaskPriority, TaskAssignment, User, db
 from ..services.auth_service import get_current_user
+from ..services.task_service import (
+    FIELD_PARSERS, task_query, serialize_tasks, serialize_task, bulk_update_tasks,
+    parse_assignee_ids, sync_assignments, bulk_assign
+)
+from ..services.task_graph_service import get_dependencies, add_dependencies, remove_dependency
+from ..utils.pagination import keyset_paginate, InvalidCursor
 
 api = Namespace('tasks', description='Task operations')
 
@@ -11,6 +17,7 @@ task_model = api.model('Task', {
     'title': fields.String(required=True, description='Task title'),
     'description': fields.String(description='Task description'),
     'due_date': fields.DateTime(description='Due date (ISO 8601 format)'),
+    'estimated_hours': fields.Float(description='Estimated hours of work, used for the critical path'),
     'status': fields.String(description='Task status', enum=[s.value for s in TaskStatus], default='todo'),
     'priority': fields.String(description='Task priority', enum=[p.value for p in TaskPriority], default='medium'),
     'event_id': fields.Integer(required=True, description='ID of the associated event'),
@@ -24,6 +31,33 @@ task_assignment_model = api.model('TaskAssignment', {
     'notes': fields.String(description='Assignment notes')
 })
 
+task_bulk_update_model = api.model('TaskBulkUpdateItem', {
+    'id': fields.Integer(required=True, description='Task ID'),
+    'status': fields.String(description='New status', enum=[s.value for s in TaskStatus]),
+    'priority': fields.String(description='New priority', enum=[p.value for p in TaskPriority]),
+    'due_date': fields.String(description='New due date (ISO 8601), or null to clear it')
+})
+
+task_bulk_model = api.model('TaskBulkUpdate', {
+    'updates': fields.List(fields.Nested(task_bulk_update_model), required=True,
+                           description='Partial updates, applied all together or not at all')
+})
+
+task_bulk_assign_model = api.model('TaskBulkAssign', {
+    'task_ids': fields.List(fields.Integer, required=True, description='Tasks to assign'),
+    'assignee_ids': fields.List(fields.Integer, required=True, description='Users to assign to every task'),
+    'replace': fields.Boolean(default=False,
+                              description='Make these users the only assignees instead of adding them')
+})
+
+task_dependency_model = api.model('TaskDependencies', {
+    'depends_on_ids': fields.List(fields.Integer, required=True,
+                                  description='IDs of tasks of the same event that must finish first')
+})
+
+# Sort key used for cursor pagination of the task list
+TASK_CURSOR_ORDER = [(Task.created_at, True), (Task.id, True)]
+
 # Query parameters
 task_parser = api.parser()
 task_parser.add_argument('status', type=str, help='Filter by status')
@@ -34,6 +68,8 @@ task_parser.add_argument('due_before', type=str, help='Filter by due date before
 task_parser.add_argument('due_after', type=str, help='Filter by due date after (YYYY-MM-DD)')
 task_parser.add_argument('page', type=int, default=1, help='Page number')
 task_parser.add_argument('per_page', type=int, default=20, help='Items per page')
+task_parser.add_argument('cursor', type=str, help='Opaque cursor for keyset pagination on (created_at DESC, id DESC) (empty for the first page)')
+task_parser.add_argument('include_total', type=inputs.boolean, default=False, help='Include the total count in cursor mode')
 
 @api.route('/')
 class TaskList(Resource):
@@ -47,7 +83,7 @@ class TaskList(Resource):
         user_id = get_jwt_identity()
         user = db.session.get(User, user_id)
         
-        query = Task.query
+        query = task_query()
         
         # Apply filters
         if args.get('status'):
@@ -81,10 +117,22 @@ class TaskList(Resource):
         # Pagination
         page = args.get('page', 1)
         per_page = args.get('per_page', 20)
+        
+        if args.get('cursor') is not None:
+            try:
+                result = keyset_paginate(
+                    query, TASK_CURSOR_ORDER,
+                    cursor=args['cursor'], per_page=per_page, include_total=args['include_total']
+                )
+            except InvalidCursor as e:
+                return {"error": str(e)}, 400
+            result['items'] = serialize_tasks(result['items'])
+            return result
+        
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return {
-            'items': [task.to_dict() for task in pagination.items],
+            'items': serialize_tasks(pagination.items),
             'total': pagination.total,
             'pages': pagination.pages,
             'current_page': page,
@@ -127,12 +175,40 @@ class TaskList(Resource):
             
             return {
                 "message": "Task created successfully",
-                "task": task.to_dict()
+                "task": serialize_task(task)
             }, 201
         except Exception as e:
             db.session.rollback()
             return {"error": f"Failed to create task: {str(e)}"}, 500
 
+@api.route('/bulk')
+class TaskBulkUpdate(Resource):
+    @jwt_required()
+    @api.expect(task_bulk_model)
+    @api.response(200, 'Tasks updated')
+    @api.response(400, 'Invalid input (nothing was updated)')
+    @api.response(401, 'Not authenticated')
+    @api.response(409, 'Tasks changed concurrently')
+    def patch(self):
+        """Change status, priority or due date of many tasks in one transaction"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        data = request.get_json() or {}
+        return bulk_update_tasks(data.get('updates'), user)
+
+@api.route('/bulk-assign')
+class TaskBulkAssign(Resource):
+    @jwt_required()
+    @api.expect(task_bulk_assign_model)
+    @api.response(200, 'Assignments updated')
+    @api.response(400, 'Invalid input (nothing was updated)')
+    @api.response(401, 'Not authenticated')
+    def post(self):
+        """Assign users to many tasks, changing only the assignments that differ"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return bulk_assign(request.get_json() or {}, user)
+
 @api.route('/<int:task_id>')
 @api.param('task_id', 'The task identifier')
 class TaskResource(Resource):
@@ -143,7 +219,7 @@ class TaskResource(Resource):
     @api.response(404, 'Task not found')
     def get(self, task_id):
         """Get task by ID"""
-        task = Task.query.get_or_404(task_id)
+        task = task_query().get_or_404(task_id)
         user_id = get_jwt_identity()
         user = db.session.get(User, user_id)
         
@@ -153,7 +229,7 @@ class TaskResource(Resource):
         ):
             return {"error": "Not authorized to view this task"}, 403
         
-        return task.to_dict()
+        return serialize_task(task)
     
     @jwt_required()
     @api.expect(task_model)
@@ -174,31 +250,34 @@ class TaskResource(Resource):
         
         data = request.get_json()
         
+        # Status, priority and due date arrive as JSON strings
+        for key, parse in FIELD_PARSERS.items():
+            if key in data:
+                try:
+                    data[key] = parse(data[key])
+                except (TypeError, ValueError):
+                    return {"error": f"Invalid {key}: {data[key]}"}, 400
+        
+        if 'assignee_ids' in data:
+            assignee_ids, error = parse_assignee_ids(data['assignee_ids'])
+            if error:
+                return error
+        
         try:
             # Update task fields
             for key, value in data.items():
                 if hasattr(task, key) and key not in ['assignee_ids']:
                     setattr(task, key, value)
             
-            # Update assignees if provided
+            # Update assignees if provided, touching only the ones that change
             if 'assignee_ids' in data:
-                # Remove existing assignments
-                TaskAssignment.query.filter_by(task_id=task.id).delete()
-                
-                # Add new assignments
-                for assignee_id in data['assignee_ids']:
-                    assignment = TaskAssignment(
-                        task_id=task.id,
-                        assignee_id=assignee_id,
-                        assigned_by=user_id
-                    )
-                    db.session.add(assignment)
+                sync_assignments({task.id: assignee_ids}, user_id)
             
             db.session.commit()
             
             return {
                 "message": "Task updated successfully",
-                "task": task.to_dict()
+                "task": serialize_task(task)
             }
         except Exception as e:
             db.session.rollback()
@@ -260,8 +339,51 @@ class CompleteTask(Resource):
             
             return {
                 "message": "Task marked as completed",
-                "task": task.to_dict()
+                "task": serialize_task(task)
             }
         except Exception as e:
             db.session.rollback()
             return {"error": f"Failed to complete task: {str(e)}"}, 500
+
+@api.route('/<int:task_id>/dependencies')
+@api.param('task_id', 'The task identifier')
+class TaskDependencies(Resource):
+    @jwt_required()
+    @api.response(200, 'Success')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Task not found')
+    def get(self, task_id):
+        """Get the tasks this task waits for and the tasks waiting for it"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return get_dependencies(task_id, user)
+    
+    @jwt_required()
+    @api.expect(task_dependency_model, validate=True)
+    @api.response(201, 'Dependencies added')
+    @api.response(400, 'Invalid input')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Task not found')
+    @api.response(409, 'Dependency would create a cycle')
+    def post(self, task_id):
+        """Make this task wait for other tasks of the same event"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return add_dependencies(task_id, request.get_json(), user)
+
+@api.route('/<int:task_id>/dependencies/<int:depends_on_id>')
+@api.param('task_id', 'The task identifier')
+@api.param('depends_on_id', 'The prerequisite task identifier')
+class TaskDependencyResource(Resource):
+    @jwt_required()
+    @api.response(200, 'Dependency removed')
+    @api.response(401, 'Not authenticated')
+    @api.response(403, 'Not authorized')
+    @api.response(404, 'Dependency not found')
+    def delete(self, task_id, depends_on_id):
+        """Remove a dependency"""
+        user_id = get_jwt_identity()
+        user = db.session.get(User, user_id)
+        return remove_dependency(task_id, depends_on_id, user)
@@ -0,0 +1,40 @@
+from flask import request, send_file, abort
+from flask_restx import Namespace, Resource
+
+from ..services.upload_service import resolve
+
+api = Namespace('uploads', description='Uploaded files')
+
+# Stored names are content hashes, so a URL never changes meaning and
+# clients/CDNs may cache it forever. Originals served in place of a
+# variant that is still being generated get a short lifetime instead.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+FALLBACK_MAX_AGE = 60
+
+upload_parser = api.parser()
+upload_parser.add_argument('w', type=int, help='Thumbnail width')
+
+@api.route('/<string:name>')
+@api.param('name', 'Stored file name (<sha256>.<ext>)')
+class UploadedFile(Resource):
+    @api.expect(upload_parser)
+    @api.response(200, 'Success')
+    @api.response(304, 'Not modified')
+    @api.response(404, 'File not found')
+    def get(self, name):
+        """Serve a stored upload or one of its thumbnails"""
+        width = upload_parser.parse_args().get('w')
+        path, is_variant = resolve(name, width)
+        if path is None:
+            abort(404)
+
+        response = send_file(path, conditional=False, etag=False)
+        digest = name.partition('.')[0]
+        response.set_etag(f'{digest}-{width}' if is_variant else digest)
+        response.cache_control.public = True
+        if width is not None and not is_variant:
+            response.cache_control.max_age = FALLBACK_MAX_AGE
+        else:
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response.make_conditional(request)
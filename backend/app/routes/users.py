@@ -1,8 +1,9 @@
 from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, inputs
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, User, UserRole
 from ..services.auth_service import get_current_user
+from ..utils.pagination import keyset_paginate, InvalidCursor
 
 api = Namespace('users', description='User operations')
 
@@ -23,6 +24,9 @@ user_update_model = api.model('UserUpdate', {
     'is_active': fields.Boolean(description='Whether the user account is active')
 })
 
+# Sort key used for cursor pagination of the user list
+USER_CURSOR_ORDER = [(User.last_name, False), (User.first_name, False), (User.id, False)]
+
 # Query parameters
 user_parser = api.parser()
 user_parser.add_argument('search', type=str, help='Search term')
@@ -30,6 +34,8 @@ user_parser.add_argument('role', type=str, help='Filter by role')
 user_parser.add_argument('is_active', type=str, help='Filter by active status (true/false)')
 user_parser.add_argument('page', type=int, default=1, help='Page number')
 user_parser.add_argument('per_page', type=int, default=20, help='Items per page')
+user_parser.add_argument('cursor', type=str, help='Opaque cursor for keyset pagination on (last_name, first_name, id) (empty for the first page)')
+user_parser.add_argument('include_total', type=inputs.boolean, default=False, help='Include the total count in cursor mode')
 
 @api.route('/')
 class UserList(Resource):
@@ -71,6 +77,18 @@ class UserList(Resource):
         # Pagination
         page = args.get('page', 1)
         per_page = args.get('per_page', 20)
+        
+        if args.get('cursor') is not None:
+            try:
+                result = keyset_paginate(
+                    query, USER_CURSOR_ORDER,
+                    cursor=args['cursor'], per_page=per_page, include_total=args['include_total']
+                )
+            except InvalidCursor as e:
+                return {"error": str(e)}, 400
+            result['items'] = [user.to_dict() for user in result['items']]
+            return result
+        
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return {
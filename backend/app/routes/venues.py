@@ -1,8 +1,11 @@
 from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, inputs
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import Venue, db
 from ..services.auth_service import get_current_user
+from ..utils.pagination import keyset_paginate, InvalidCursor
+from ..services.venue_service import find_available_venues
+from datetime import datetime
 
 api = Namespace('venues', description='Venue operations')
 
@@ -26,6 +29,9 @@ venue_model = api.model('Venue', {
     'is_active': fields.Boolean(description='Whether the venue is active', default=True)
 })
 
+# Sort key used for cursor pagination of the venue list
+VENUE_CURSOR_ORDER = [(Venue.name, False), (Venue.id, False)]
+
 # Query parameters
 venue_parser = api.parser()
 venue_parser.add_argument('search', type=str, help='Search term')
@@ -34,6 +40,8 @@ venue_parser.add_argument('country', type=str, help='Filter by country')
 venue_parser.add_argument('min_capacity', type=int, help='Minimum capacity')
 venue_parser.add_argument('page', type=int, default=1, help='Page number')
 venue_parser.add_argument('per_page', type=int, default=20, help='Items per page')
+venue_parser.add_argument('cursor', type=str, help='Opaque cursor for keyset pagination on (name, id) (empty for the first page)')
+venue_parser.add_argument('include_total', type=inputs.boolean, default=False, help='Include the total count in cursor mode')
 
 @api.route('/')
 class VenueList(Resource):
@@ -76,6 +84,18 @@ class VenueList(Resource):
         # Pagination
         page = args.get('page', 1)
         per_page = args.get('per_page', 20)
+        
+        if args.get('cursor') is not None:
+            try:
+                result = keyset_paginate(
+                    query, VENUE_CURSOR_ORDER,
+                    cursor=args['cursor'], per_page=per_page, include_total=args['include_total']
+                )
+            except InvalidCursor as e:
+                return {"error": str(e)}, 400
+            result['items'] = [venue.to_dict() for venue in result['items']]
+            return result
+        
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return {
@@ -112,6 +132,33 @@ class VenueList(Resource):
             db.session.rollback()
             return {"error": f"Failed to create venue: {str(e)}"}, 500
 
+availability_parser = api.parser()
+availability_parser.add_argument('start_time', type=str, required=True, help='Start of the slot (ISO 8601)')
+availability_parser.add_argument('end_time', type=str, required=True, help='End of the slot (ISO 8601)')
+availability_parser.add_argument('min_capacity', type=int, help='Minimum capacity')
+
+@api.route('/availability')
+class VenueAvailability(Resource):
+    @jwt_required()
+    @api.expect(availability_parser)
+    @api.response(200, 'Success')
+    @api.response(400, 'Invalid time range')
+    @api.response(401, 'Not authenticated')
+    def get(self):
+        """Get active venues that are free for a time slot"""
+        args = availability_parser.parse_args()
+        try:
+            start_time = datetime.fromisoformat(args['start_time'])
+            end_time = datetime.fromisoformat(args['end_time'])
+        except ValueError:
+            return {"error": "start_time and end_time must be ISO 8601 datetimes"}, 400
+        
+        if end_time <= start_time:
+            return {"error": "end_time must be after start_time"}, 400
+        
+        venues = find_available_venues(start_time, end_time, args.get('min_capacity'))
+        return {'items': [venue.to_dict() for venue in venues]}
+
 @api.route('/<int:venue_id>')
 @api.param('venue_id', 'The venue identifier')
 class VenueResource(Resource):
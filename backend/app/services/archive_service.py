@@ -0,0 +1,205 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, or_
+from .. import db
+from ..models.event import (
+    Event, EventStatus, EventGuest, EventVendor, EventStaff, EventOccurrenceException
+)
+from ..models.task import Task, TaskAssignment, TaskDependency, TaskReminder
+from ..models.budget import Budget, BudgetItem, Expense
+from ..models.participant import EventParticipant
+from ..models.guest_counter import EventGuestCounter
+from ..models.reservation import EventCapacity, WaitlistEntry
+from ..models.email import EmailCampaign, OutboxMessage
+from ..models.archive import (
+    ARCHIVED_TABLES, events_archive, event_guests_archive, event_vendors_archive,
+    event_staff_archive
+)
+from . import event_cache, search_service, venue_service
+
+# Hot/cold split for finished events.
+#
+# Completed and cancelled events whose last occurrence ended more than
+# EVENT_ARCHIVE_AFTER_DAYS ago are moved, with everything that hangs off
+# them, into the *_archive tables. Each batch is one transaction: rows are
+# copied with INSERT ... SELECT and then deleted from the live tables, so an
+# event is always in exactly one place. Candidates are locked with SKIP
+# LOCKED on PostgreSQL, so several workers can run the job at once.
+
+ARCHIVABLE_STATUSES = [EventStatus.COMPLETED, EventStatus.CANCELLED]
+
+def _cutoff():
+    days = current_app.config.get('EVENT_ARCHIVE_AFTER_DAYS', 365)
+    return datetime.utcnow() - timedelta(days=days)
+
+def _candidate_ids(cutoff, limit):
+    rows = db.session.query(Event.id).filter(
+        Event.status.in_(ARCHIVABLE_STATUSES),
+        Event.end_time < cutoff,
+        or_(Event.recurrence_rule.is_(None), Event.recurrence_end < cutoff)
+    ).order_by(Event.end_time, Event.id).limit(limit).with_for_update(skip_locked=True)
+    return [event_id for (event_id,) in rows]
+
+def _row_criteria(event_ids):
+    """WHERE clause selecting each live table's rows for ``event_ids``"""
+    task_ids = select(Task.id).where(Task.event_id.in_(event_ids))
+    budget_ids = select(Budget.id).where(Budget.event_id.in_(event_ids))
+    item_ids = select(BudgetItem.id).where(BudgetItem.budget_id.in_(budget_ids))
+    return {
+        Event: Event.id.in_(event_ids),
+        EventGuest: EventGuest.event_id.in_(event_ids),
+        EventVendor: EventVendor.event_id.in_(event_ids),
+        EventStaff: EventStaff.event_id.in_(event_ids),
+        EventOccurrenceException: EventOccurrenceException.event_id.in_(event_ids),
+        Task: Task.event_id.in_(event_ids),
+        TaskAssignment: TaskAssignment.task_id.in_(task_ids),
+        TaskDependency: TaskDependency.event_id.in_(event_ids),
+        Budget: Budget.event_id.in_(event_ids),
+        BudgetItem: BudgetItem.budget_id.in_(budget_ids),
+        Expense: Expense.budget_item_id.in_(item_ids),
+    }
+
+def _invalidate(event_ids):
+    """Queue cache invalidation for every list that may contain the events"""
+    tags = {event_cache.ADMIN_TAG}
+    tags.update(event_cache.event_tag(event_id) for event_id in event_ids)
+    organizers = db.session.query(Event.organizer_id).filter(Event.id.in_(event_ids)).distinct()
+    participants = db.session.query(EventParticipant.user_id).filter(
+        EventParticipant.event_id.in_(event_ids)
+    ).distinct()
+    guests = db.session.query(EventGuest.email).filter(EventGuest.event_id.in_(event_ids)).distinct()
+    tags.update(event_cache.user_tag(user_id) for (user_id,) in organizers)
+    tags.update(event_cache.user_tag(user_id) for (user_id,) in participants)
+    tags.update(event_cache.guest_tag(email) for (email,) in guests)
+    event_cache.invalidate_on_commit(tags)
+
+def archive_batch(event_ids):
+    """Move events and their dependent rows to the archive tables (no commit)"""
+    criteria = _row_criteria(event_ids)
+    _invalidate(event_ids)
+
+    for model, archive in ARCHIVED_TABLES:
+        columns = list(model.__table__.columns)
+        db.session.execute(
+            archive.insert().from_select(
+                [column.name for column in columns],
+                select(*columns).where(criteria[model])
+            )
+        )
+
+    # Children first so foreign keys hold at every step
+    db.session.execute(EventParticipant.__table__.delete().where(
+        EventParticipant.event_id.in_(event_ids)
+    ))
+    for model in (EventGuestCounter, EventCapacity, WaitlistEntry):
+        db.session.execute(model.__table__.delete().where(model.event_id.in_(event_ids)))
+    db.session.execute(TaskReminder.__table__.delete().where(
+        TaskReminder.task_id.in_(select(Task.id).where(Task.event_id.in_(event_ids)))
+    ))
+    campaign_ids = select(EmailCampaign.id).where(EmailCampaign.event_id.in_(event_ids))
+    db.session.execute(OutboxMessage.__table__.delete().where(OutboxMessage.campaign_id.in_(campaign_ids)))
+    db.session.execute(EmailCampaign.__table__.delete().where(EmailCampaign.event_id.in_(event_ids)))
+    for model, _ in reversed(ARCHIVED_TABLES):
+        db.session.execute(model.__table__.delete().where(criteria[model]))
+    search_service.remove_events(event_ids)
+
+def archive_events(batch_size=None, max_batches=None):
+    """Archive every eligible event, one batch per transaction; returns the count"""
+    batch_size = batch_size or current_app.config.get('EVENT_ARCHIVE_BATCH_SIZE', 500)
+    cutoff = _cutoff()
+    archived = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        try:
+            event_ids = _candidate_ids(cutoff, batch_size)
+            if not event_ids:
+                db.session.rollback()
+                break
+            archive_batch(event_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for event_id in event_ids:
+            venue_service.forget_booking(event_id)
+        archived += len(event_ids)
+        batches += 1
+        if len(event_ids) < batch_size:
+            break
+
+    if archived:
+        current_app.logger.info(f"Archived {archived} events in {batches} batches")
+    return archived
+
+def start_archiver(app):
+    """Run archive_events every EVENT_ARCHIVE_INTERVAL seconds in a daemon thread"""
+    interval = app.config.get('EVENT_ARCHIVE_INTERVAL', 0)
+    if not interval:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    archive_events()
+                except Exception as e:
+                    app.logger.error(f"Event archiving failed: {e}")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='event-archiver', daemon=True)
+    thread.start()
+    return thread
+
+def _serialize(row):
+    data = {}
+    for key, value in row._mapping.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data[key] = getattr(value, 'value', value)
+    return data
+
+def _count(table, event_id):
+    return db.session.execute(
+        select(db.func.count()).select_from(table).where(table.c.event_id == event_id)
+    ).scalar()
+
+def _is_archived_participant(event_id, user):
+    checks = [
+        select(event_staff_archive.c.id).where(
+            event_staff_archive.c.event_id == event_id, event_staff_archive.c.staff_id == user.id
+        ),
+        select(event_vendors_archive.c.id).where(
+            event_vendors_archive.c.event_id == event_id, event_vendors_archive.c.vendor_id == user.id
+        ),
+        select(event_guests_archive.c.id).where(
+            event_guests_archive.c.event_id == event_id,
+            db.func.lower(event_guests_archive.c.email) == (user.email or '').lower()
+        ),
+    ]
+    return any(db.session.execute(check.limit(1)).first() for check in checks)
+
+def get_archived_event(event_id, user):
+    """Serialized archived event, an authorization error, or None if not archived"""
+    row = db.session.execute(
+        select(events_archive).where(events_archive.c.id == event_id)
+    ).first()
+    if row is None:
+        return None
+
+    if user.role != 'admin' and row.organizer_id != user.id and not row.is_public \
+            and not _is_archived_participant(event_id, user):
+        return {"error": "Not authorized to view this event"}, 403
+
+    data = _serialize(row)
+    data.update({
+        'archived': True,
+        'guest_count': _count(event_guests_archive, event_id),
+        'vendor_count': _count(event_vendors_archive, event_id),
+        'staff_count': _count(event_staff_archive, event_id),
+    })
+    return data
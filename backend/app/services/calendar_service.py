@@ -0,0 +1,223 @@
+import hashlib
+from datetime import datetime
+from flask import Response, current_app, request
+from itsdangerous import URLSafeSerializer, BadSignature
+from .. import db
+from ..models.event import Event, EventStatus
+from ..models.user import User
+from . import event_cache, recurrence_service
+
+# iCalendar (RFC 5545) feeds.
+#
+# Each feed has a cheap validator - MAX(updated_at) and COUNT(*) over the
+# events in it - that is computed before anything else. It drives the ETag
+# and Last-Modified headers, so polls of unchanged feeds get a 304 without
+# loading or rendering events. Rendered bodies are kept in the event cache
+# under the same tags as the event lists and are only served while their
+# stored validator still matches.
+
+FEED_SALT = 'calendar-feed'
+PRODID = '-//Event Management//Calendar Feed//EN'
+
+ICS_STATUS = {
+    EventStatus.DRAFT: 'TENTATIVE',
+    EventStatus.PUBLISHED: 'CONFIRMED',
+    EventStatus.COMPLETED: 'CONFIRMED',
+    EventStatus.CANCELLED: 'CANCELLED',
+}
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=FEED_SALT)
+
+def feed_token(user):
+    """Signed token identifying a user's feed, for clients that can't send a JWT
+
+    The token carries the user's feed version, so rotating the feed revokes
+    every URL handed out before.
+    """
+    return _serializer().dumps({'user_id': user.id, 'v': user.calendar_feed_version or 0})
+
+def user_from_token(token):
+    """Active user a feed token belongs to, or None if it is invalid or revoked"""
+    try:
+        data = _serializer().loads(token)
+        user_id, version = data['user_id'], data.get('v', 0)
+    except (BadSignature, KeyError, TypeError, AttributeError):
+        return None
+    user = db.session.get(User, user_id)
+    if user is None or not user.is_active or (user.calendar_feed_version or 0) != version:
+        return None
+    return user
+
+def rotate_feed_token(user):
+    """Revoke the user's feed URLs and return a new token"""
+    db.session.query(User).filter(User.id == user.id).update(
+        {User.calendar_feed_version: db.func.coalesce(User.calendar_feed_version, 0) + 1},
+        synchronize_session=False
+    )
+    db.session.commit()
+    db.session.refresh(user)
+    return feed_token(user)
+
+def _escape(value):
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;') \
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+def _fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Don't split a multi-byte character
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+def _format_time(name, value, timezone):
+    stamp = value.strftime('%Y%m%dT%H%M%S')
+    if not timezone or timezone.upper() == 'UTC':
+        return f'{name}:{stamp}Z'
+    return f'{name};TZID={timezone}:{stamp}'
+
+def render_event(event, host, exceptions=None):
+    """VEVENT lines for an event; series also get RRULE/EXDATE and one
+    RECURRENCE-ID override per edited occurrence"""
+    exceptions = exceptions or {}
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.id}@{host}',
+        f"DTSTAMP:{(event.updated_at or event.created_at or datetime.utcnow()).strftime('%Y%m%dT%H%M%SZ')}",
+        _format_time('DTSTART', event.start_time, event.timezone),
+        _format_time('DTEND', event.end_time, event.timezone),
+        f'SUMMARY:{_escape(event.title)}',
+        f'STATUS:{ICS_STATUS.get(event.status, "CONFIRMED")}',
+    ]
+    if event.recurrence_rule:
+        lines.append(f'RRULE:{event.recurrence_rule}')
+        for original_start, exception in sorted(exceptions.items()):
+            if exception.is_cancelled:
+                lines.append(_format_time('EXDATE', original_start, event.timezone))
+    if event.description:
+        lines.append(f'DESCRIPTION:{_escape(event.description)}')
+    if event.location:
+        lines.append(f'LOCATION:{_escape(event.location)}')
+    if event.virtual_meeting_url:
+        lines.append(f'URL:{event.virtual_meeting_url}')
+    if event.updated_at:
+        lines.append(f"LAST-MODIFIED:{event.updated_at.strftime('%Y%m%dT%H%M%SZ')}")
+    lines.append('END:VEVENT')
+    
+    duration = event.end_time - event.start_time
+    for original_start, exception in sorted(exceptions.items()):
+        if exception.is_cancelled:
+            continue
+        start = exception.start_time or original_start
+        lines.extend([
+            'BEGIN:VEVENT',
+            f'UID:event-{event.id}@{host}',
+            _format_time('RECURRENCE-ID', original_start, event.timezone),
+            f"DTSTAMP:{(exception.updated_at or datetime.utcnow()).strftime('%Y%m%dT%H%M%SZ')}",
+            _format_time('DTSTART', start, event.timezone),
+            _format_time('DTEND', exception.end_time or start + duration, event.timezone),
+            f'SUMMARY:{_escape(exception.title or event.title)}',
+            f'STATUS:{ICS_STATUS.get(event.status, "CONFIRMED")}',
+        ])
+        if exception.description or event.description:
+            lines.append(f'DESCRIPTION:{_escape(exception.description or event.description)}')
+        if exception.location or event.location:
+            lines.append(f'LOCATION:{_escape(exception.location or event.location)}')
+        lines.append('END:VEVENT')
+    return lines
+
+def render_calendar(events, name, host, exceptions=None):
+    """Render a VCALENDAR; ``exceptions`` is ``recurrence_service.load_exceptions`` output"""
+    exceptions = exceptions or {}
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    for event in events:
+        lines.extend(render_event(event, host, exceptions.get(event.id)))
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+def feed_validator(query):
+    """(etag, last_modified) for the events matched by ``query``
+
+    The newest update catches edits and the count and id sum catch events
+    joining or leaving the feed (an event dropping out of a user's
+    visibility doesn't change any updated_at).
+    """
+    last_modified, count, id_sum = query.order_by(None).with_entities(
+        db.func.max(Event.updated_at), db.func.count(Event.id), db.func.sum(Event.id)
+    ).one()
+    raw = f'{last_modified.isoformat() if last_modified else "-"}:{count}:{id_sum or 0}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest(), last_modified
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match and request.if_none_match.contains(etag):
+        return True
+    if not request.if_none_match and last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def feed_response(cache_key, tags, query, name):
+    """Serve an .ics feed for the events matched by ``query`` with conditional GET"""
+    etag, last_modified = feed_validator(query)
+    if _not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        body = None
+        cache = event_cache.get_event_cache() if event_cache.is_enabled() else None
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None and cached['etag'] == etag:
+                body = cached['body']
+        if body is None:
+            snapshot = cache.generations(tags) if cache is not None else None
+            events = query.order_by(Event.start_time).all()
+            exceptions = recurrence_service.load_exceptions(
+                event.id for event in events if event.recurrence_rule
+            )
+            body = render_calendar(events, name, request.host, exceptions)
+            if cache is not None:
+                cache.set(cache_key, {'etag': etag, 'body': body}, tags, snapshot=snapshot)
+        response = Response(body, mimetype='text/calendar')
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('CALENDAR_FEED_MAX_AGE', 300)
+    return response
+
+def user_feed(user):
+    """Calendar of every event listed for ``user``"""
+    from .event_service import filter_visible_events
+    query = filter_visible_events(Event.query, user)
+    return feed_response(
+        f'ics:user:{user.id}', event_cache.scope_tags(user), query,
+        f'{user.first_name} {user.last_name} - Events'
+    )
+
+def event_feed(event_id, user):
+    """Calendar containing a single event"""
+    from .event_service import is_authorized_for_event
+    event = Event.query.get_or_404(event_id)
+    if user is None:
+        if not event.is_public:
+            return {"error": "Not authorized to view this event"}, 403
+    elif not is_authorized_for_event(event, user):
+        return {"error": "Not authorized to view this event"}, 403
+
+    query = Event.query.filter(Event.id == event_id)
+    return feed_response(f'ics:event:{event_id}', [event_cache.event_tag(event_id)], query, event.title)
@@ -0,0 +1,263 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import bindparam, select
+from .. import db
+from ..models.event import Event, EventGuest, EventStaff
+from ..models.guest_counter import apply_deltas, guest_delta, guest_state, merge_deltas
+
+# Door check-in.
+#
+# Tickets are signed (event_id, guest_id) pairs, so validating a scan needs
+# no database access. Each live event has an in-memory roster - the
+# accepted guests' ids and who is already checked in - loaded on the first
+# scan, so tickets of invited, declined or waitlisted guests are refused and
+# duplicates are caught from memory too. Accepted scans go into a
+# write-behind buffer that a background thread flushes as one batched
+# UPDATE every CHECKIN_FLUSH_INTERVAL seconds, or sooner once
+# CHECKIN_FLUSH_SIZE scans are waiting. The UPDATE only fills empty
+# check_in_time columns, so a scan accepted by two workers is stored (and
+# added to the event's checked-in counter) once.
+
+TICKET_SALT = 'guest-ticket'
+
+CHECKED_IN = 'checked_in'
+DUPLICATE = 'duplicate'
+INVALID = 'invalid'
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=TICKET_SALT)
+
+def ticket_code(guest):
+    """Signed code to print in a guest's QR ticket"""
+    return _serializer().dumps([guest.event_id, guest.id])
+
+def parse_ticket(code):
+    """(event_id, guest_id) from a ticket code, or None if it isn't genuine"""
+    try:
+        event_id, guest_id = _serializer().loads(code)
+        return int(event_id), int(guest_id)
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+class EventRoster:
+    """Guests of one live event, who may scan tickets, and who is already in"""
+
+    def __init__(self, event_id, organizer_id, staff_ids, guests):
+        self.event_id = event_id
+        self.organizer_id = organizer_id
+        self.staff_ids = set(staff_ids)
+        self.valid = set(guests)
+        self.checked_in = {guest_id: at for guest_id, at in guests.items() if at}
+        self.loaded_at = time.monotonic()
+
+    def can_scan(self, user):
+        return user.role == 'admin' or user.id == self.organizer_id or user.id in self.staff_ids
+
+class CheckInRegistry:
+    """Rosters of live events plus the write-behind buffer of accepted scans
+
+    ``load_roster(event_id)`` returns an EventRoster (or None for unknown
+    events) and ``write_batch(rows)`` persists a list of
+    ``{'guest_id', 'checked_in_at'}`` dicts.
+    """
+
+    def __init__(self, load_roster, write_batch, flush_size=200, roster_ttl=300, miss_reload=5):
+        self.load_roster = load_roster
+        self.write_batch = write_batch
+        self.flush_size = flush_size
+        self.roster_ttl = roster_ttl
+        self.miss_reload = miss_reload
+        self._rosters = {}
+        self._pending = []
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def roster(self, event_id, max_age=None):
+        max_age = self.roster_ttl if max_age is None else max_age
+        with self._lock:
+            roster = self._rosters.get(event_id)
+            if roster is not None and time.monotonic() - roster.loaded_at < max_age:
+                return roster
+
+        # Load without the lock so scans for other events keep flowing
+        fresh = self.load_roster(event_id)
+        with self._lock:
+            if fresh is None:
+                self._rosters.pop(event_id, None)
+                return None
+            # Accepted scans may not have reached the database yet
+            if roster is not None:
+                for guest_id, at in roster.checked_in.items():
+                    fresh.checked_in.setdefault(guest_id, at)
+            for row in self._pending:
+                if row['guest_id'] in fresh.valid:
+                    fresh.checked_in.setdefault(row['guest_id'], row['checked_in_at'])
+            self._rosters[event_id] = fresh
+            return fresh
+
+    def check_in(self, event_id, guest_id, at=None):
+        """Record a scan; returns (CHECKED_IN | DUPLICATE | INVALID, check-in time)"""
+        at = at or datetime.utcnow()
+        roster = self.roster(event_id)
+        if roster is None:
+            return INVALID, None
+        if guest_id not in roster.valid and time.monotonic() - roster.loaded_at >= self.miss_reload:
+            # The guest may have been added or accepted since the roster was loaded
+            roster = self.roster(event_id, max_age=0)
+
+        with self._lock:
+            if roster is None or guest_id not in roster.valid:
+                return INVALID, None
+            previous = roster.checked_in.get(guest_id)
+            if previous is not None:
+                return DUPLICATE, previous
+            roster.checked_in[guest_id] = at
+            self._pending.append({'guest_id': guest_id, 'checked_in_at': at})
+            if len(self._pending) >= self.flush_size:
+                self._wake.set()
+        return CHECKED_IN, at
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write buffered check-ins; they are put back if the write fails"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        try:
+            self.write_batch(batch)
+        except Exception:
+            with self._lock:
+                self._pending[:0] = batch
+            raise
+        return len(batch)
+
+    def start(self, interval, logger=None):
+        """Flush from a daemon thread every ``interval`` seconds (and at exit)"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                self._wake.wait(interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    if logger:
+                        logger.error(f"Check-in flush failed: {e}")
+
+        self._thread = threading.Thread(target=run, name='checkin-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+def _load_roster(connection, event_id):
+    events, staff, guests = Event.__table__, EventStaff.__table__, EventGuest.__table__
+    event = connection.execute(
+        select(events.c.id, events.c.organizer_id).where(events.c.id == event_id)
+    ).first()
+    if event is None:
+        return None
+    staff_ids = connection.execute(
+        select(staff.c.staff_id).where(staff.c.event_id == event_id)
+    ).scalars().all()
+    roster = connection.execute(
+        select(guests.c.id, guests.c.check_in_time)
+        .where(guests.c.event_id == event_id, guests.c.rsvp_status == 'accepted')
+    )
+    return EventRoster(event.id, event.organizer_id, staff_ids, dict(roster.all()))
+
+def _write_batch(connection, rows):
+    """Store check-ins and bump the events' counters in one transaction
+
+    The still-empty rows are selected FOR UPDATE first, so each check-in is
+    counted once even when two workers flush the same guest.
+    """
+    guests = EventGuest.__table__
+    at = {row['guest_id']: row['checked_in_at'] for row in rows}
+    claimed = connection.execute(
+        select(guests.c.id, guests.c.event_id, guests.c.rsvp_status)
+        .where(guests.c.id.in_(list(at)), guests.c.check_in_time.is_(None))
+        .with_for_update()
+    ).all()
+    if not claimed:
+        return
+    connection.execute(
+        guests.update()
+        .where(guests.c.id == bindparam('guest_id'))
+        .where(guests.c.check_in_time.is_(None))
+        .values(check_in_time=bindparam('checked_in_at'), updated_at=bindparam('checked_in_at')),
+        [{'guest_id': guest_id, 'checked_in_at': at[guest_id]} for guest_id, _, _ in claimed]
+    )
+    deltas = {}
+    for _, event_id, rsvp_status in claimed:
+        merge_deltas(deltas, event_id, guest_delta(
+            guest_state(rsvp_status, None), guest_state(rsvp_status, True)
+        ))
+    apply_deltas(connection, deltas)
+
+def get_checkin_registry():
+    """Get the app's check-in registry, starting its flusher on first use"""
+    registry = current_app.extensions.get('checkin_registry')
+    if registry is None:
+        app = current_app._get_current_object()
+        # Own connections, not db.session: these also run on the flusher
+        # thread and must not touch a request's transaction
+        engine = db.get_engine(app)
+
+        def load_roster(event_id):
+            with engine.connect() as connection:
+                return _load_roster(connection, event_id)
+
+        def write_batch(rows):
+            with engine.begin() as connection:
+                _write_batch(connection, rows)
+
+        registry = CheckInRegistry(
+            load_roster, write_batch,
+            flush_size=app.config.get('CHECKIN_FLUSH_SIZE', 200),
+            roster_ttl=app.config.get('CHECKIN_ROSTER_TTL', 300)
+        )
+        registry.start(app.config.get('CHECKIN_FLUSH_INTERVAL', 1.0), app.logger)
+        current_app.extensions['checkin_registry'] = registry
+    return registry
+
+def get_ticket(event_id, guest_id, user):
+    """Ticket code for a guest (organizers and admins)"""
+    guest = EventGuest.query.filter_by(id=guest_id, event_id=event_id).first_or_404()
+    event = db.session.get(Event, event_id)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to issue tickets for this event"}, 403
+    return {'guest_id': guest.id, 'event_id': event_id, 'code': ticket_code(guest)}
+
+def scan_ticket(event_id, code, user):
+    """Check a guest in from a scanned ticket without touching the database"""
+    ticket = parse_ticket(code or '')
+    if ticket is None or ticket[0] != event_id:
+        return {"error": "Invalid ticket"}, 400
+
+    registry = get_checkin_registry()
+    roster = registry.roster(event_id)
+    if roster is None:
+        return {"error": "Event not found"}, 404
+    if not roster.can_scan(user):
+        return {"error": "Not authorized to check in guests for this event"}, 403
+
+    result, at = registry.check_in(event_id, ticket[1])
+    if result == INVALID:
+        return {"error": "Ticket is no longer valid"}, 400
+    if result == DUPLICATE:
+        return {
+            "error": "Guest is already checked in",
+            "guest_id": ticket[1],
+            "checked_in_at": at.isoformat()
+        }, 409
+    return {"message": "Checked in", "guest_id": ticket[1], "checked_in_at": at.isoformat()}
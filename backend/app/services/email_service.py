@@ -0,0 +1,423 @@
+import random
+import smtplib
+import string
+import threading
+import time
+from datetime import datetime, timedelta
+from email.errors import MessageError
+from email.message import EmailMessage
+from email.utils import make_msgid
+from flask import abort, current_app
+from sqlalchemy import bindparam
+from .. import db
+from ..models.event import Event, EventGuest
+from ..models.email import EmailCampaign, OutboxMessage
+
+# Invitation email.
+#
+# "Send invitations" only stores an EmailCampaign: its subject and body are
+# rendered once with the event's details, leaving the guest placeholders
+# for later, so the request costs the same for 10 guests or 10,000.
+# Background workers then copy the selected guests into the email_outbox
+# table with one INSERT ... SELECT, and claim due outbox rows in batches
+# (SKIP LOCKED, with a lease so rows held by a crashed worker come back).
+# Each batch goes out over one SMTP connection, throttled by a per-process
+# token bucket; the worker renews its lease while a slow batch is still
+# going out. Temporary failures are retried with exponential backoff up
+# to EMAIL_MAX_ATTEMPTS; permanent (5xx) rejections and rows that cannot
+# be turned into a message fail at once, as do rows whose last attempt
+# never recorded a result once they are out of attempts. Delivery is
+# at-least-once: a worker dying between sending and recording can cause a
+# resend after its lease expires.
+#
+# For local testing point MAIL_SERVER/MAIL_PORT at an SMTP stand-in such as
+# `python -m aiosmtpd -n -l localhost:1025` with MAIL_USE_TLS=false.
+
+DEFAULT_SUBJECT = "You're invited: $event_title"
+DEFAULT_BODY = """Hi $first_name,
+
+You're invited to $event_title.
+
+When: $event_start
+Where: $event_location
+
+$event_description
+$message
+"""
+
+QUEUED = 'queued'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+
+def _escape(value):
+    return str(value or '').replace('$', '$$')
+
+def render_partial(template, values):
+    """Substitute ``values`` into a string.Template, leaving every other
+    placeholder and ``$$`` escape in place for a later substitution"""
+    def replace(match):
+        name = match.group('named') or match.group('braced')
+        if name in values:
+            return values[name]
+        return match.group(0)
+    return string.Template.pattern.sub(replace, template)
+
+def event_values(event, message=None):
+    """Event placeholders for invitation templates"""
+    start = event.start_time.strftime('%A %d %B %Y, %H:%M') if event.start_time else ''
+    return {
+        'event_title': event.title,
+        'event_start': f"{start} {event.timezone or 'UTC'}".strip(),
+        'event_location': event.location or event.virtual_meeting_url or 'To be announced',
+        'event_description': event.description or '',
+        'message': message or ''
+    }
+
+def render_for_event(event, subject, body, message=None):
+    """Render subject and body templates with the event's details, once"""
+    values = {name: _escape(value) for name, value in event_values(event, message).items()}
+    return render_partial(subject, values), render_partial(body, values)
+
+def personalize(template, guest):
+    """Fill the guest placeholders of a template rendered for its event"""
+    return template.safe_substitute(
+        first_name=guest['first_name'] or '',
+        last_name=guest['last_name'] or '',
+        email=guest['to_email']
+    )
+
+def retry_delay(attempts, base):
+    """Seconds before retry number ``attempts``: exponential with jitter, capped at a day"""
+    delay = min(base * 2 ** max(attempts - 1, 0), 86400)
+    return delay * random.uniform(0.5, 1.0)
+
+class RateLimiter:
+    """Token bucket shared by the sending threads of one process"""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for one token; rate 0 means unlimited"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+class SmtpTransport:
+    """Sends batches of messages over a single SMTP connection"""
+
+    def __init__(self, host, port, use_tls=False, username=None, password=None, timeout=30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['MAIL_SERVER'], config['MAIL_PORT'], config.get('MAIL_USE_TLS', False),
+                   config.get('MAIL_USERNAME'), config.get('MAIL_PASSWORD'),
+                   config.get('MAIL_TIMEOUT', 30))
+
+    def send_batch(self, messages, throttle=None):
+        """Send ``messages``; returns one result per message
+
+        A result is None when the server accepted the message, otherwise
+        ``(permanent, error)``. Connection problems mark the rest of the
+        batch as temporary failures.
+        """
+        results = []
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.use_tls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                for message in messages:
+                    if throttle:
+                        throttle()
+                    try:
+                        refused = smtp.send_message(message)
+                        results.append((True, f"Refused: {refused}") if refused else None)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        results.append((True, f"Refused: {e.recipients}"))
+                    except smtplib.SMTPResponseException as e:
+                        results.append((e.smtp_code >= 500, f"{e.smtp_code} {e.smtp_error!r}"))
+        except (smtplib.SMTPException, OSError) as e:
+            error = (False, f"{type(e).__name__}: {e}")
+            results.extend([error] * (len(messages) - len(results)))
+        return results
+
+def get_email_sender():
+    """The app's (transport, rate limiter), created on first use"""
+    sender = current_app.extensions.get('email_sender')
+    if sender is None:
+        config = current_app.config
+        sender = (SmtpTransport.from_config(config), RateLimiter(config.get('EMAIL_RATE_LIMIT', 10)))
+        current_app.extensions['email_sender'] = sender
+    return sender
+
+def queue_invitations(event_id, data, user):
+    """Queue invitations to an event's guests; does not wait for delivery"""
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to invite guests to this event"}, 403
+    if not current_app.config.get('MAIL_DEFAULT_SENDER'):
+        return {"error": "Email delivery is not configured"}, 503
+
+    statuses = data.get('rsvp_statuses') or []
+    if not isinstance(statuses, list) or not all(isinstance(s, str) for s in statuses):
+        return {"error": "rsvp_statuses must be a list of statuses"}, 400
+
+    subject, body = render_for_event(
+        event,
+        data.get('subject') or DEFAULT_SUBJECT,
+        data.get('body') or DEFAULT_BODY,
+        data.get('message')
+    )
+    try:
+        campaign = EmailCampaign(
+            event_id=event.id,
+            subject=subject[:255],
+            body=body,
+            rsvp_statuses=','.join(statuses) or None,
+            created_by=user.id
+        )
+        db.session.add(campaign)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to queue invitations: {str(e)}"}, 500
+    return {"message": "Invitations queued", "campaign": campaign.to_dict()}, 202
+
+def expand_campaigns(limit=10):
+    """Copy the guests of queued campaigns into the outbox; returns the count"""
+    expanded = 0
+    for _ in range(limit):
+        campaign = EmailCampaign.query.filter_by(status=QUEUED).order_by(EmailCampaign.id) \
+            .with_for_update(skip_locked=True).first()
+        if campaign is None:
+            db.session.rollback()
+            break
+        guests = EventGuest.__table__
+        selected = db.select([
+            db.literal(campaign.id), guests.c.id, guests.c.email, guests.c.first_name, guests.c.last_name
+        ]).where(guests.c.event_id == campaign.event_id)
+        if campaign.rsvp_statuses:
+            selected = selected.where(guests.c.rsvp_status.in_(campaign.rsvp_statuses.split(',')))
+        result = db.session.execute(OutboxMessage.__table__.insert().from_select(
+            ['campaign_id', 'guest_id', 'to_email', 'first_name', 'last_name'], selected
+        ))
+        campaign.total = result.rowcount
+        campaign.status = 'expanded'
+        campaign.expanded_at = datetime.utcnow()
+        db.session.commit()
+        expanded += 1
+    return expanded
+
+def claim_batch(size, lease, max_attempts=None):
+    """Lease up to ``size`` due outbox rows to this worker; returns them as dicts
+
+    Rows taken over from an expired lease that are already out of attempts
+    are failed instead of being claimed again.
+    """
+    now = datetime.utcnow()
+    locked_until = now + timedelta(seconds=lease)
+    rows = OutboxMessage.query.filter(db.or_(
+        db.and_(OutboxMessage.status == QUEUED, OutboxMessage.next_attempt_at <= now),
+        db.and_(OutboxMessage.status == SENDING, OutboxMessage.locked_until < now)
+    )).order_by(OutboxMessage.id).limit(size).with_for_update(skip_locked=True).all()
+    claimed = []
+    for row in rows:
+        if max_attempts and row.attempts >= max_attempts:
+            # The last attempt never recorded a result (the batch raised or the worker died)
+            row.status = FAILED
+            row.locked_until = None
+            row.last_error = row.last_error or f"Gave up after {row.attempts} attempts without a result"
+            continue
+        row.status = SENDING
+        row.locked_until = locked_until
+        row.attempts += 1
+        claimed.append({
+            'id': row.id, 'campaign_id': row.campaign_id, 'to_email': row.to_email,
+            'first_name': row.first_name, 'last_name': row.last_name, 'attempts': row.attempts,
+            'locked_until': locked_until
+        })
+    db.session.commit()
+    return claimed
+
+def extend_lease(rows, lease):
+    """Push back the lease on claimed rows this worker still holds"""
+    if not rows:
+        return 0
+    outbox = OutboxMessage.__table__
+    held = rows[0]['locked_until']
+    locked_until = datetime.utcnow() + timedelta(seconds=lease)
+    renewed = db.session.execute(outbox.update().where(
+        outbox.c.id.in_([row['id'] for row in rows]),
+        outbox.c.status == SENDING,
+        outbox.c.locked_until == held
+    ).values(locked_until=locked_until)).rowcount
+    db.session.commit()
+    for row in rows:
+        row['locked_until'] = locked_until
+    return renewed
+
+def build_message(row, campaigns, sender):
+    """The EmailMessage for one claimed row"""
+    subject, body = campaigns[row['campaign_id']]
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = row['to_email']
+    message['Subject'] = personalize(subject, row)
+    message['Message-ID'] = make_msgid(idstring=f"outbox.{row['id']}")
+    message.set_content(personalize(body, row))
+    return message
+
+def build_messages(rows, campaigns, sender):
+    """([(row, EmailMessage)], [(row, error)]) for claimed rows
+
+    ``campaigns`` maps id to compiled templates. A row that cannot become a
+    message (e.g. a CR/LF in a value that lands in a header) is reported
+    with its error instead of failing the batch.
+    """
+    built, failed = [], []
+    for row in rows:
+        try:
+            built.append((row, build_message(row, campaigns, sender)))
+        except (ValueError, TypeError, MessageError) as e:
+            failed.append((row, f"Invalid message: {e}"))
+    return built, failed
+
+def record_results(rows, results, max_attempts, retry_base):
+    """Mark sent rows, and reschedule or fail the rest, in batched UPDATEs"""
+    now = datetime.utcnow()
+    outbox = OutboxMessage.__table__
+    sent = [row['id'] for row, result in zip(rows, results) if result is None]
+    retried = []
+    for row, result in zip(rows, results):
+        if result is None:
+            continue
+        permanent, error = result
+        gave_up = permanent or row['attempts'] >= max_attempts
+        retried.append({
+            'row_id': row['id'],
+            'new_status': FAILED if gave_up else QUEUED,
+            'next_at': now + timedelta(seconds=retry_delay(row['attempts'], retry_base)),
+            'error': error[:500]
+        })
+    if sent:
+        db.session.execute(outbox.update().where(outbox.c.id.in_(sent)).values(
+            status=SENT, sent_at=now, locked_until=None, last_error=None
+        ))
+    if retried:
+        db.session.execute(outbox.update().where(outbox.c.id == bindparam('row_id')).values(
+            status=bindparam('new_status'), next_attempt_at=bindparam('next_at'),
+            locked_until=None, last_error=bindparam('error')
+        ), retried)
+    db.session.commit()
+    return len(sent), len(retried)
+
+def deliver_batch():
+    """Expand queued campaigns, then claim and send one batch; returns rows handled"""
+    config = current_app.config
+    expand_campaigns()
+    lease = config.get('EMAIL_LEASE_SECONDS', 300)
+    max_attempts = config.get('EMAIL_MAX_ATTEMPTS', 5)
+    rows = claim_batch(config.get('EMAIL_BATCH_SIZE', 100), lease, max_attempts)
+    if not rows:
+        return 0
+
+    campaign_ids = {row['campaign_id'] for row in rows}
+    campaigns = {
+        campaign.id: (string.Template(campaign.subject), string.Template(campaign.body))
+        for campaign in EmailCampaign.query.filter(EmailCampaign.id.in_(campaign_ids))
+    }
+    transport, limiter = get_email_sender()
+    built, invalid = build_messages(rows, campaigns, config['MAIL_DEFAULT_SENDER'])
+
+    # Throttled batches can outlast the lease; renew it at half time so no
+    # other worker takes over rows that are still being sent
+    renew_at = time.monotonic() + lease / 2
+
+    def throttle():
+        nonlocal renew_at
+        limiter.acquire()
+        if time.monotonic() >= renew_at:
+            extend_lease(rows, lease)
+            renew_at = time.monotonic() + lease / 2
+
+    results = transport.send_batch([message for _, message in built], throttle=throttle)
+    sent, failed = record_results(
+        [row for row, _ in built] + [row for row, _ in invalid],
+        results + [(True, error) for _, error in invalid],
+        max_attempts, config.get('EMAIL_RETRY_DELAY', 60)
+    )
+    if failed:
+        current_app.logger.warning(f"Email batch: {sent} sent, {failed} failed or rescheduled")
+    return len(rows)
+
+def deliver_all():
+    """Drain the outbox from the current thread (CLI and tests); returns rows handled"""
+    handled = 0
+    while True:
+        count = deliver_batch()
+        if not count:
+            return handled
+        handled += count
+
+def start_email_workers(app):
+    """Start EMAIL_WORKERS daemon threads that deliver queued email"""
+    workers = app.config.get('EMAIL_WORKERS', 0)
+    if not workers or not app.config.get('MAIL_DEFAULT_SENDER'):
+        return []
+    poll = app.config.get('EMAIL_POLL_INTERVAL', 2)
+
+    def run():
+        while True:
+            handled = 0
+            with app.app_context():
+                try:
+                    handled = deliver_batch()
+                except Exception as e:
+                    app.logger.error(f"Email delivery failed: {e}")
+                finally:
+                    db.session.remove()
+            if not handled:
+                time.sleep(poll)
+
+    threads = [threading.Thread(target=run, name=f'email-worker-{i}', daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def get_campaign(event_id, campaign_id, user):
+    """Campaign with its delivery progress (counts by outbox status)"""
+    campaign = EmailCampaign.query.filter_by(id=campaign_id, event_id=event_id).first_or_404()
+    event = db.session.get(Event, event_id)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to view this campaign"}, 403
+    progress = dict.fromkeys((QUEUED, SENDING, SENT, FAILED), 0)
+    progress.update(db.session.query(OutboxMessage.status, db.func.count()).filter(
+        OutboxMessage.campaign_id == campaign.id
+    ).group_by(OutboxMessage.status).all())
+    return campaign.to_dict(progress)
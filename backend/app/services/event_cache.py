@@ -0,0 +1,130 @@
+import hashlib
+import json
+from flask import current_app, has_app_context
+from sqlalchemy import event as sa_event, inspect
+from sqlalchemy.orm import Session
+from .. import db
+from ..models.event import EventGuest, EventVendor, EventStaff
+from ..models.participant import EventParticipant
+from ..models.user import User
+from ..utils.cache import LRUCache, RedisCache, TaggedCache
+
+# Response cache for GET /api/events/.
+#
+# Entries are keyed on the caller's visibility scope plus the normalized
+# filters and page, and tagged with that scope and with every event on the
+# page. Writes register tags to bump; they are applied once the surrounding
+# transaction commits so readers never re-cache uncommitted state.
+
+_PENDING_KEY = 'event_cache_pending_tags'
+
+def get_event_cache():
+    """Get the app's event list cache, creating it on first use"""
+    cache = current_app.extensions.get('event_cache')
+    if cache is None:
+        config = current_app.config
+        ttl = config.get('EVENT_CACHE_TTL', 60)
+        if config.get('EVENT_CACHE_BACKEND') == 'redis' and config.get('EVENT_CACHE_URL'):
+            backend = RedisCache(config['EVENT_CACHE_URL'], prefix='events:', default_ttl=ttl)
+        else:
+            # Also the local stand-in for the shared backend when no URL is set
+            backend = LRUCache(max_entries=config.get('EVENT_CACHE_MAX_ENTRIES', 1024), default_ttl=ttl)
+        cache = TaggedCache(backend)
+        current_app.extensions['event_cache'] = cache
+    return cache
+
+def is_enabled():
+    return current_app.config.get('EVENT_CACHE_ENABLED', True)
+
+def event_tag(event_id):
+    return f'event:{event_id}'
+
+def user_tag(user_id):
+    return f'scope:user:{user_id}'
+
+def guest_tag(email):
+    return f'scope:guest:{(email or "").lower()}'
+
+def tasks_tag(event_id):
+    return f'tasks:{event_id}'
+
+ADMIN_TAG = 'scope:admin'
+
+def scope_tags(user):
+    """Tags covering everything that decides which events ``user`` can list"""
+    if user.role == 'admin':
+        return [ADMIN_TAG]
+    tags = [user_tag(user.id)]
+    if user.role == 'attendee':
+        tags.append(guest_tag(user.email))
+    return tags
+
+def list_key(user, filters, page, per_page, cursor, include_total):
+    """Cache key for one page of the event list as seen by ``user``"""
+    scope = 'admin' if user.role == 'admin' else f"{getattr(user.role, 'value', user.role)}:{user.id}"
+    normalized = {
+        'filters': {k: str(v) for k, v in sorted((filters or {}).items())},
+        'page': page,
+        'per_page': per_page,
+        'cursor': cursor,
+        'include_total': bool(include_total)
+    }
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+    return f'list:{scope}:{digest}'
+
+def invalidate_on_commit(tags):
+    """Queue tags to be invalidated when the current transaction commits"""
+    db.session.info.setdefault(_PENDING_KEY, set()).update(tags)
+
+def invalidate_event(event, include_participants=True):
+    """Queue invalidation of every list that contains or may now contain ``event``"""
+    tags = [ADMIN_TAG, event_tag(event.id), user_tag(event.organizer_id)]
+    if include_participants:
+        user_ids = db.session.query(EventParticipant.user_id).filter(
+            EventParticipant.event_id == event.id
+        ).distinct()
+        tags.extend(user_tag(user_id) for (user_id,) in user_ids)
+    invalidate_on_commit(tags)
+
+@sa_event.listens_for(Session, 'after_commit')
+def _apply_pending(session):
+    tags = session.info.pop(_PENDING_KEY, None)
+    if tags and has_app_context():
+        get_event_cache().invalidate(tags)
+
+@sa_event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+def _participant_tags(target):
+    tags = [event_tag(target.event_id)]
+    if isinstance(target, EventGuest):
+        tags.append(guest_tag(target.email))
+    elif isinstance(target, EventStaff):
+        tags.append(user_tag(target.staff_id))
+    elif isinstance(target, EventVendor):
+        tags.append(user_tag(target.vendor_id))
+    return tags
+
+def _register(model):
+    # Participant changes alter counts on every list holding the event and
+    # membership of the participant's own list
+    def queue(mapper, connection, target):
+        session = Session.object_session(target)
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, set()).update(_participant_tags(target))
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        sa_event.listen(model, name, queue)
+
+for _model in (EventGuest, EventVendor, EventStaff):
+    _register(_model)
+
+@sa_event.listens_for(User, 'after_update')
+def _user_email_changed(mapper, connection, target):
+    # Guest invitations follow the email, so the user's lists change with it
+    if not inspect(target).attrs.email.history.has_changes():
+        return
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(user_tag(target.id))
@@ -1,16 +1,65 @@
 from datetime import datetime
+from flask import abort, current_app
 from ..models import db, Event, EventStatus, EventType, EventGuest, EventVendor, EventStaff, User, Venue
 from ..models.task import Task, TaskStatus, TaskPriority, TaskAssignment
 from ..models.budget import Budget, BudgetStatus, BudgetItem, ExpenseCategory
-from sqlalchemy import or_, and_, func
-import uuid
-import os
-from werkzeug.utils import secure_filename
+from ..models.participant import EventParticipant, participant_role_for
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload, selectinload
 from ..utils.helpers import allowed_file
+from ..utils.pagination import keyset_paginate, InvalidCursor
+from . import (
+    search_service, event_cache, venue_service, upload_service, recurrence_service, archive_service,
+    notification_service, guest_counter_service, reservation_service
+)
+from .venue_service import VenueConflict
+from .recurrence_service import InvalidRecurrence
 
-def get_events(user, filters=None, page=1, per_page=20):
-    """Get events with optional filtering and pagination"""
+# Sort key used for cursor pagination of the event list
+EVENT_CURSOR_ORDER = [(Event.start_time, True), (Event.id, True)]
+
+# Status changes allowed by bulk transitions; completed events are final
+STATUS_TRANSITIONS = {
+    EventStatus.DRAFT: {EventStatus.PUBLISHED, EventStatus.CANCELLED},
+    EventStatus.PUBLISHED: {EventStatus.DRAFT, EventStatus.COMPLETED, EventStatus.CANCELLED},
+    EventStatus.CANCELLED: {EventStatus.DRAFT},
+    EventStatus.COMPLETED: set(),
+}
+
+def get_events(user, filters=None, page=1, per_page=20, cursor=None, include_total=False):
+    """Get events with optional filtering and pagination
+
+    Passing ``cursor`` (an empty string for the first page) switches to keyset
+    pagination on ``(start_time DESC, id DESC)``, which avoids the OFFSET scan
+    and only counts rows when ``include_total`` is set.
+
+    Responses are cached per visibility scope and invalidated by event and
+    participant writes (see ``event_cache``).
+    
+    Recurring series match a date window when any occurrence falls inside
+    it; their items then carry the expanded ``occurrences`` for the window.
+    """
+    if not event_cache.is_enabled():
+        return _query_events(user, filters, page, per_page, cursor, include_total)
+    
+    cache = event_cache.get_event_cache()
+    key = event_cache.list_key(user, filters, page, per_page, cursor, include_total)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    
+    scope_tags = event_cache.scope_tags(user)
+    snapshot = cache.generations(scope_tags)
+    result = _query_events(user, filters, page, per_page, cursor, include_total)
+    if isinstance(result, dict):
+        tags = scope_tags + [event_cache.event_tag(item['id']) for item in result['items']]
+        cache.set(key, result, tags, snapshot=snapshot)
+    return result
+
+def _query_events(user, filters, page, per_page, cursor, include_total):
     query = Event.query
+    search_rank = None
+    window = None
     
     # Apply filters
     if filters:
@@ -18,55 +67,139 @@ def get_events(user, filters=None, page=1, per_page=20):
             query = query.filter(Event.status == filters['status'])
         if 'event_type' in filters:
             query = query.filter(Event.event_type == filters['event_type'])
-        if 'start_date' in filters:
-            query = query.filter(Event.start_time >= filters['start_date'])
-        if 'end_date' in filters:
-            query = query.filter(Event.end_time <= filters['end_date'])
-        if 'search' in filters:
-            search = f"%{filters['search']}%"
-            query = query.filter(
-                or_(
-                    Event.title.ilike(search),
-                    Event.description.ilike(search)
+        if 'start_date' in filters or 'end_date' in filters:
+            try:
+                window = (
+                    recurrence_service.parse_bound(filters.get('start_date')),
+                    recurrence_service.parse_bound(filters.get('end_date'))
+                )
+            except InvalidRecurrence as e:
+                return {"error": str(e)}, 400
+            query = query.filter(recurrence_service.window_filter(*window))
+        if filters.get('search', '').strip():
+            matches = search_service.search_subquery(filters['search'])
+            if matches is not None:
+                query = query.join(matches, matches.c.event_id == Event.id)
+                search_rank = matches.c.rank
+            else:
+                search = f"%{filters['search']}%"
+                query = query.filter(
+                    or_(
+                        Event.title.ilike(search),
+                        Event.description.ilike(search)
+                    )
                 )
-            )
     
-    # Filter by user role
-    if user.role == 'organizer':
-        query = query.filter(Event.organizer_id == user.id)
-    elif user.role == 'staff':
-        query = query.join(EventStaff).filter(EventStaff.staff_id == user.id)
-    elif user.role == 'vendor':
-        query = query.join(EventVendor).filter(EventVendor.vendor_id == user.id)
-    elif user.role == 'attendee':
-        query = query.join(EventGuest).filter(
-            and_(
-                EventGuest.email == user.email,
-                Event.status.in_(['published', 'in_progress'])
+    query = filter_visible_events(query, user)
+    
+    if cursor is not None:
+        try:
+            result = keyset_paginate(
+                query, EVENT_CURSOR_ORDER,
+                cursor=cursor, per_page=per_page, include_total=include_total
             )
-        )
+        except InvalidCursor as e:
+            return {"error": str(e)}, 400
+        result['items'] = serialize_events(result['items'], window)
+        return result
     
-    # Order and paginate
+    # Order and paginate (best search matches first when searching)
+    if search_rank is not None:
+        query = query.order_by(search_rank.desc())
     query = query.order_by(Event.start_time.desc())
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
     return {
-        'items': [event.to_dict() for event in pagination.items],
+        'items': serialize_events(pagination.items, window),
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page,
         'per_page': per_page
     }
 
+def filter_visible_events(query, user):
+    """Restrict an event query to the events ``user`` sees in their lists"""
+    if user.role == 'organizer':
+        query = query.filter(Event.organizer_id == user.id)
+    elif participant_role_for(user):
+        query = query.filter(Event.id.in_(
+            EventParticipant.event_ids_for(user.id, participant_role_for(user))
+        ))
+        if user.role == 'attendee':
+            query = query.filter(Event.status.in_(['published', 'in_progress']))
+    return query
+
+def serialize_events(events, window=None):
+    """Serialize a page of events with one batched participant count query
+
+    With a ``(start, end)`` date window, recurring series also get their
+    occurrences inside it (exceptions are loaded in one more query).
+    """
+    counts = Event.participant_counts(event.id for event in events)
+    items = [event.to_dict(counts=counts.get(event.id)) for event in events]
+    if window is not None:
+        recurrence_service.attach_occurrences(events, items, *window)
+    return items
+
 def get_event_by_id(event_id, user):
-    """Get a single event by ID with authorization"""
-    event = Event.query.get_or_404(event_id)
+    """Get a single event by ID with authorization (archived events included)"""
+    event = Event.query.get(event_id)
+    if event is None:
+        archived = archive_service.get_archived_event(event_id, user)
+        if archived is None:
+            abort(404)
+        return archived
     
     # Check authorization
     if not is_authorized_for_event(event, user):
         return {"error": "Not authorized to view this event"}, 403
     
-    return event.to_dict(detailed=True)
+    return serialize_events([event])[0]
+
+def get_event_dashboard(event_id, user):
+    """Get an event with its venue, budget, tasks and staff in one response
+
+    Everything is eager loaded: one joined query for the event, venue and
+    budget (with its creator/approver), then one selectin query each for
+    tasks, assignments, budget items and staff, each joined to the users it
+    names, plus one read of the guest counters. The query count does not
+    grow with the number of rows.
+    """
+    event = Event.query.options(
+        joinedload(Event.venue),
+        joinedload(Event.budget).joinedload(Budget.creator),
+        joinedload(Event.budget).joinedload(Budget.approver),
+        joinedload(Event.budget).selectinload(Budget.items).joinedload(BudgetItem.vendor),
+        selectinload(Event.tasks).joinedload(Task.creator),
+        selectinload(Event.tasks).selectinload(Task.assignments).options(
+            joinedload(TaskAssignment.assignee),
+            joinedload(TaskAssignment.assigner)
+        ),
+        selectinload(Event.staff).joinedload(EventStaff.staff)
+    ).filter(Event.id == event_id).first()
+    if event is None:
+        abort(404)
+    
+    if not is_authorized_for_event(event, user):
+        return {"error": "Not authorized to view this event"}, 403
+    
+    # Same visibility rules as the budget and task endpoints
+    can_manage = user.role in ['admin', 'organizer'] or event.organizer_id == user.id
+    tasks = event.tasks if can_manage else [
+        task for task in event.tasks
+        if any(a.assignee_id == user.id for a in task.assignments)
+    ]
+    
+    return {
+        'event': serialize_events([event])[0],
+        'venue': event.venue.to_dict() if event.venue else None,
+        'budget': event.budget.to_dict() if event.budget and can_manage else None,
+        'tasks': [task.to_dict() for task in sorted(
+            tasks, key=lambda t: (t.due_date is None, t.due_date or datetime.min, t.id)
+        )],
+        'staff': [member.to_dict() for member in event.staff],
+        'guest_stats': guest_counter_service.guest_counts([event.id])[event.id]
+    }
 
 def create_event(event_data, user):
     """Create a new event"""
@@ -78,25 +211,33 @@ def create_event(event_data, user):
         if not event_data.get('start_time') or not event_data.get('end_time'):
             return {"error": "Start and end times are required"}, 400
         
+        start_time = datetime.fromisoformat(event_data['start_time'])
+        end_time = datetime.fromisoformat(event_data['end_time'])
+        if end_time <= start_time:
+            return {"error": "End time must be after start time"}, 400
+        
         # Create the event
         event = Event(
             title=event_data['title'],
             description=event_data.get('description', ''),
-            start_time=datetime.fromisoformat(event_data['start_time']),
-            end_time=datetime.fromisoformat(event_data['end_time']),
+            start_time=start_time,
+            end_time=end_time,
             timezone=event_data.get('timezone', 'UTC'),
             location=event_data.get('location', ''),
             virtual_meeting_url=event_data.get('virtual_meeting_url'),
             max_attendees=event_data.get('max_attendees'),
             is_public=event_data.get('is_public', True),
             event_type=EventType(event_data.get('event_type', 'other')),
-            status=EventStatus.draft,
+            status=EventStatus.DRAFT,
             organizer_id=user.id,
             venue_id=event_data.get('venue_id')
         )
+        recurrence_service.apply_rule(event, event_data.get('recurrence_rule'))
+        venue_service.check_venue_available(event)
         
         db.session.add(event)
         db.session.flush()  # Get the event ID
+        search_service.index_event(event)
         
         # Create a default budget
         budget = Budget(
@@ -107,11 +248,21 @@ def create_event(event_data, user):
         )
         db.session.add(budget)
         
+        event_cache.invalidate_event(event, include_participants=False)
         db.session.commit()
+        venue_service.record_booking(event)
         
         return {"message": "Event created successfully", "event": event.to_dict()}, 201
+    except InvalidRecurrence as e:
+        db.session.rollback()
+        return {"error": str(e)}, 400
+    except VenueConflict as e:
+        db.session.rollback()
+        return {"error": str(e), "conflicting_event_id": e.event_id}, 409
     except Exception as e:
         db.session.rollback()
+        if venue_service.is_booking_conflict(e):
+            return {"error": "Venue is already booked for an overlapping event"}, 409
         return {"error": f"Failed to create event: {str(e)}"}, 500
 
 def update_event(event_id, event_data, user):
@@ -141,12 +292,42 @@ def update_event(event_id, event_data, user):
                 else:
                     setattr(event, field, event_data[field])
         
+        if event.end_time <= event.start_time:
+            db.session.rollback()
+            return {"error": "End time must be after start time"}, 400
+        
+        if any(field in event_data for field in ['recurrence_rule', 'start_time', 'end_time']):
+            recurrence_service.apply_rule(event, event_data.get('recurrence_rule', event.recurrence_rule))
+            recurrence_service.prune_exceptions(event)
+        
+        if any(field in event_data for field in ['venue_id', 'start_time', 'end_time', 'status', 'recurrence_rule']) \
+                and event.status != EventStatus.CANCELLED:
+            venue_service.check_venue_available(event)
+        
+        promoted = []
+        if 'max_attendees' in event_data:
+            promoted = reservation_service.capacity_changed(event)
+        
         event.updated_at = datetime.utcnow()
+        if 'title' in event_data or 'description' in event_data:
+            search_service.index_event(event)
+        event_cache.invalidate_event(event)
         db.session.commit()
+        venue_service.record_booking(event)
+        reservation_service.notify_promoted(event.id, promoted)
+        reservation_service.promote_deferred()
         
         return {"message": "Event updated successfully", "event": event.to_dict()}
+    except InvalidRecurrence as e:
+        db.session.rollback()
+        return {"error": str(e)}, 400
+    except VenueConflict as e:
+        db.session.rollback()
+        return {"error": str(e), "conflicting_event_id": e.event_id}, 409
     except Exception as e:
         db.session.rollback()
+        if venue_service.is_booking_conflict(e):
+            return {"error": "Venue is already booked for an overlapping event"}, 409
         return {"error": f"Failed to update event: {str(e)}"}, 500
 
 def delete_event(event_id, user):
@@ -159,13 +340,133 @@ def delete_event(event_id, user):
     
     try:
         # In a real app, you might want to soft delete or archive instead
+        search_service.remove_event(event.id)
+        event_cache.invalidate_event(event)
         db.session.delete(event)
         db.session.commit()
+        venue_service.forget_booking(event_id)
         return {"message": "Event deleted successfully"}
     except Exception as e:
         db.session.rollback()
         return {"error": f"Failed to delete event: {str(e)}"}, 500
 
+def bulk_update_status(event_ids, status, user):
+    """Move many events to ``status`` at once
+
+    Existence, ownership and current status come from one query, valid
+    changes are applied with a single UPDATE ... WHERE id IN (...), and
+    notifications go out once per room after the commit. Events that can't
+    change are reported individually without failing the rest.
+    """
+    try:
+        target = EventStatus(status)
+    except ValueError:
+        return {"error": f"Invalid status: {status}"}, 400
+    
+    try:
+        event_ids = sorted({int(event_id) for event_id in event_ids or []})
+    except (TypeError, ValueError):
+        return {"error": "event_ids must be a list of integers"}, 400
+    if not event_ids:
+        return {"error": "event_ids is required"}, 400
+    max_ids = current_app.config.get('EVENT_BULK_MAX_IDS', 1000)
+    if len(event_ids) > max_ids:
+        return {"error": f"At most {max_ids} events can be updated at once"}, 400
+    
+    rows = db.session.query(
+        Event.id, Event.status, Event.organizer_id,
+        Event.venue_id, Event.start_time, Event.end_time, Event.recurrence_rule, Event.recurrence_end
+    ).filter(Event.id.in_(event_ids)).all()
+    found = {row.id: row for row in rows}
+    
+    errors, unchanged, valid = [], [], []
+    for event_id in event_ids:
+        row = found.get(event_id)
+        if row is None:
+            errors.append({'event_id': event_id, 'error': 'Event not found'})
+        elif row.organizer_id != user.id and user.role != 'admin':
+            errors.append({'event_id': event_id, 'error': 'Not authorized to update this event'})
+        elif row.status == target:
+            unchanged.append(event_id)
+        elif target not in STATUS_TRANSITIONS[row.status]:
+            errors.append({
+                'event_id': event_id,
+                'error': f"Cannot change status from {row.status.value} to {target.value}"
+            })
+        else:
+            valid.append(row)
+    
+    # Reactivated events must still fit their venue
+    if target != EventStatus.CANCELLED:
+        reactivated = [row for row in valid if row.status == EventStatus.CANCELLED and row.venue_id]
+        for venue_id in sorted({row.venue_id for row in reactivated}):
+            venue_service.lock_venue(venue_id)
+        for row in reactivated:
+            conflict = venue_service.find_venue_conflict(row)
+            if conflict is not None:
+                valid.remove(row)
+                errors.append({
+                    'event_id': row.id,
+                    'error': f"Venue {row.venue_id} is already booked for an overlapping event",
+                    'conflicting_event_id': conflict
+                })
+    
+    if not valid:
+        db.session.rollback()
+        return {'status': target.value, 'updated': [], 'unchanged': unchanged, 'errors': errors}
+    
+    ids = [row.id for row in valid]
+    now = datetime.utcnow()
+    sources = [source for source, targets in STATUS_TRANSITIONS.items() if target in targets]
+    try:
+        audience = notification_service.event_audience(ids, {row.id: row.organizer_id for row in valid})
+        event_cache.invalidate_on_commit(
+            [event_cache.ADMIN_TAG]
+            + [event_cache.event_tag(event_id) for event_id in ids]
+            + [event_cache.user_tag(user_id) for user_id in audience]
+        )
+        # Re-checking status and owner guards against concurrent changes
+        query = Event.query.filter(Event.id.in_(ids), Event.status.in_(sources))
+        if user.role != 'admin':
+            query = query.filter(Event.organizer_id == user.id)
+        updated = query.update(
+            {Event.status: target, Event.updated_at: now}, synchronize_session=False
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if venue_service.is_booking_conflict(e):
+            return {"error": "Venue is already booked for an overlapping event"}, 409
+        return {"error": f"Failed to update events: {str(e)}"}, 500
+    
+    if updated != len(ids):
+        skipped = {event_id for (event_id,) in db.session.query(Event.id).filter(
+            Event.id.in_(ids), Event.updated_at != now
+        )}
+        errors.extend({'event_id': event_id, 'error': 'Event changed concurrently'} for event_id in sorted(skipped))
+        valid = [row for row in valid if row.id not in skipped]
+    
+    changes = {}
+    for row in valid:
+        venue_service.record_slot(
+            row.id, row.venue_id, row.start_time, row.end_time,
+            active=target != EventStatus.CANCELLED and not row.recurrence_rule
+        )
+        changes[row.id] = {
+            'event_id': row.id,
+            'status': target.value,
+            'previous_status': row.status.value,
+            'updated_at': now.isoformat()
+        }
+    notification_service.notify_batch('event_status_changed', changes, audience)
+    
+    return {
+        'status': target.value,
+        'updated': [row.id for row in valid],
+        'unchanged': unchanged,
+        'errors': errors
+    }
+
 def upload_event_cover(event_id, file, user):
     """Upload a cover image for an event"""
     event = Event.query.get_or_404(event_id)
@@ -181,29 +482,23 @@ def upload_event_cover(event_id, file, user):
         return {"error": "File type not allowed"}, 400
     
     try:
-        # Generate a unique filename
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-        
-        # Create uploads directory if it doesn't exist
-        upload_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'event_covers')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Save the file
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
-        
-        # Update event with the new cover image path
-        # In a production app, you'd want to store this in cloud storage (S3, etc.)
-        # and store the URL in the database
-        event.cover_image = f"/uploads/event_covers/{unique_filename}"
+        # Stored by content hash, so re-uploading the same image is free and
+        # the URL can be cached indefinitely; thumbnails are made in the background
+        upload = upload_service.store_upload(file)
+        upload_service.schedule_variants(upload)
+        
+        event.cover_image = upload.url
+        event.updated_at = datetime.utcnow()
+        event_cache.invalidate_event(event)
         db.session.commit()
         
         return {
             "message": "Cover image uploaded successfully",
-            "image_url": event.cover_image
+            "image_url": event.cover_image,
+            "thumbnail_url": event.cover_thumbnail
         }
     except Exception as e:
+        db.session.rollback()
         return {"error": f"Failed to upload cover image: {str(e)}"}, 500
 
 def is_authorized_for_event(event, user):
@@ -214,13 +509,8 @@ def is_authorized_for_event(event, user):
     if event.organizer_id == user.id:
         return True
     
-    if user.role == 'staff' and any(staff.staff_id == user.id for staff in event.staff):
-        return True
-    
-    if user.role == 'vendor' and any(vendor.vendor_id == user.id for vendor in event.vendors):
-        return True
-    
-    if user.role == 'attendee' and any(guest.email == user.email for guest in event.guests):
+    role = participant_role_for(user)
+    if role and EventParticipant.has_access(event.id, user.id, role):
         return True
     
     return event.is_public
@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from flask import Response, current_app, stream_with_context
+from .. import db
+from ..models.event import Event, EventGuest
+from ..models.budget import Budget, BudgetItem, Expense
+
+# Streaming exports.
+#
+# Rows are read with Core selects on a server-side cursor (stream_results)
+# in partitions of EXPORT_BATCH_SIZE and written out as they arrive, so no
+# ORM objects are built and memory stays flat regardless of row count.
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+EVENT_COLUMNS = [
+    'id', 'title', 'description', 'start_time', 'end_time', 'timezone', 'location',
+    'virtual_meeting_url', 'max_attendees', 'is_public', 'event_type', 'status',
+    'cover_image', 'organizer_id', 'venue_id', 'created_at', 'updated_at'
+]
+
+GUEST_COLUMNS = [
+    'id', 'event_id', 'email', 'first_name', 'last_name', 'phone', 'rsvp_status',
+    'check_in_time', 'created_at', 'updated_at'
+]
+
+BUDGET_ITEM_COLUMNS = [
+    'id', 'budget_id', 'category', 'description', 'quantity', 'estimated_unit_cost',
+    'estimated_cost', 'actual_unit_cost', 'actual_cost', 'vendor_id', 'payment_status',
+    'due_date', 'notes', 'created_at', 'updated_at'
+]
+
+EXPENSE_COLUMNS = [
+    'id', 'budget_item_id', 'amount', 'date_incurred', 'receipt_url', 'description',
+    'created_by', 'created_at', 'updated_at'
+]
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _select(model, columns):
+    table = model.__table__
+    return db.select([table.c[name] for name in columns])
+
+def stream_rows(statement, columns, fmt):
+    """Yield an export body chunk by chunk from a server-side cursor"""
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    connection = db.session.connection().execution_options(stream_results=True)
+    result = connection.execute(statement)
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in result.partitions(batch_size):
+            for row in rows:
+                writer.writerow([_plain(value) for value in row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.getvalue():  # Header only, when there were no rows
+            yield buffer.getvalue()
+    else:
+        for rows in result.partitions(batch_size):
+            yield ''.join(
+                json.dumps(dict(zip(columns, (_plain(value) for value in row)))) + '\n'
+                for row in rows
+            )
+
+def export_response(statement, columns, fmt, filename):
+    """Wrap a select in a chunked streaming HTTP response"""
+    response = Response(
+        stream_with_context(stream_rows(statement, columns, fmt)),
+        mimetype=EXPORT_FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    return response
+
+def _can_export_event(event, user):
+    return user.role == 'admin' or event.organizer_id == user.id
+
+def export_events(user, fmt):
+    """Export every event the user organizes (admins get all events)"""
+    if user.role not in ['admin', 'organizer']:
+        return {"error": "Not authorized to export events"}, 403
+
+    events = Event.__table__
+    statement = _select(Event, EVENT_COLUMNS).order_by(events.c.id)
+    if user.role != 'admin':
+        statement = statement.where(events.c.organizer_id == user.id)
+    return export_response(statement, EVENT_COLUMNS, fmt, 'events')
+
+def export_event_guests(event_id, user, fmt):
+    """Export an event's guest list"""
+    event = Event.query.get_or_404(event_id)
+    if not _can_export_event(event, user):
+        return {"error": "Not authorized to export this event"}, 403
+
+    guests = EventGuest.__table__
+    statement = _select(EventGuest, GUEST_COLUMNS) \
+        .where(guests.c.event_id == event_id).order_by(guests.c.id)
+    return export_response(statement, GUEST_COLUMNS, fmt, f'event_{event_id}_guests')
+
+def export_budget_items(event_id, user, fmt):
+    """Export the line items of an event's budget"""
+    event = Event.query.get_or_404(event_id)
+    if not _can_export_event(event, user):
+        return {"error": "Not authorized to export this event"}, 403
+
+    items = BudgetItem.__table__
+    budgets = Budget.__table__
+    statement = _select(BudgetItem, BUDGET_ITEM_COLUMNS) \
+        .select_from(items.join(budgets, budgets.c.id == items.c.budget_id)) \
+        .where(budgets.c.event_id == event_id).order_by(items.c.id)
+    return export_response(statement, BUDGET_ITEM_COLUMNS, fmt, f'event_{event_id}_budget_items')
+
+def export_expenses(event_id, user, fmt):
+    """Export the expenses recorded against an event's budget items"""
+    event = Event.query.get_or_404(event_id)
+    if not _can_export_event(event, user):
+        return {"error": "Not authorized to export this event"}, 403
+
+    expenses = Expense.__table__
+    items = BudgetItem.__table__
+    budgets = Budget.__table__
+    statement = _select(Expense, EXPENSE_COLUMNS) \
+        .select_from(
+            expenses.join(items, items.c.id == expenses.c.budget_item_id)
+                    .join(budgets, budgets.c.id == items.c.budget_id)
+        ) \
+        .where(budgets.c.event_id == event_id).order_by(expenses.c.id)
+    return export_response(statement, EXPENSE_COLUMNS, fmt, f'event_{event_id}_expenses')
@@ -0,0 +1,89 @@
+import threading
+import time
+from flask import abort, current_app
+from .. import db
+from ..models.event import Event
+from ..models.guest_counter import EventGuestCounter, COUNTER_COLUMNS
+from . import reservation_service
+
+# RSVP and check-in totals per event.
+#
+# Reads come from event_guest_counters, which is kept current inside the
+# transactions that change guests (mapper listeners for ORM writes, explicit
+# deltas for the guest import and check-in flush), so they never touch
+# event_guests. The reconciliation job recomputes events batch by batch and
+# rewrites any whose counters have drifted, e.g. after manual SQL fixes; it
+# also backfills events created before the counters existed.
+
+def guest_counts(event_ids):
+    """{event_id: counts} for many events; events without guests get zeros"""
+    stored = EventGuestCounter.counts_for(event_ids)
+    return {
+        event_id: stored.get(event_id, dict.fromkeys(COUNTER_COLUMNS, 0))
+        for event_id in event_ids
+    }
+
+def get_guest_stats(event_id, user):
+    """Accepted/declined/pending/checked-in totals for an event"""
+    from .event_service import is_authorized_for_event
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if not is_authorized_for_event(event, user):
+        return {"error": "Not authorized to view this event"}, 403
+    return dict(guest_counts([event_id])[event_id], event_id=event_id)
+
+def reconcile_counters(batch_size=None):
+    """Recompute every event's counters, one batch per transaction
+
+    Seat ledgers are realigned with the repaired accepted counts in the
+    same transaction, and waitlisted guests get any seats that frees.
+    Returns the number of events whose counters were repaired.
+    """
+    batch_size = batch_size or current_app.config.get('GUEST_COUNTER_RECONCILE_BATCH_SIZE', 1000)
+    repaired = 0
+    last_id = 0
+    while True:
+        event_ids = [event_id for (event_id,) in db.session.query(Event.id).filter(
+            Event.id > last_id
+        ).order_by(Event.id).limit(batch_size)]
+        if not event_ids:
+            db.session.rollback()
+            break
+        try:
+            reservation_service.lock_ledgers(event_ids)
+            repaired += len(EventGuestCounter.reconcile(event_ids))
+            promoted = reservation_service.reconcile_reserved(event_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for event_id, guests in promoted.items():
+            reservation_service.notify_promoted(event_id, guests)
+        reservation_service.promote_deferred()
+        last_id = event_ids[-1]
+
+    if repaired:
+        current_app.logger.warning(f"Repaired guest counters of {repaired} events")
+    return repaired
+
+def start_counter_reconciler(app):
+    """Run reconcile_counters every GUEST_COUNTER_RECONCILE_INTERVAL seconds"""
+    interval = app.config.get('GUEST_COUNTER_RECONCILE_INTERVAL', 0)
+    if not interval:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    reconcile_counters()
+                except Exception as e:
+                    app.logger.error(f"Guest counter reconciliation failed: {e}")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='guest-counter-reconciler', daemon=True)
+    thread.start()
+    return thread
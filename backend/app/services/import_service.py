@@ -0,0 +1,522 @@
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from flask import current_app, abort
+from sqlalchemy import bindparam
+from .. import db
+from ..models.event import Event, EventType, EventStatus, EventGuest
+from ..models.budget import Budget, BudgetStatus
+from ..models.venue import Venue
+from ..models.participant import EventParticipant, ParticipantRole
+from ..models.guest_counter import apply_deltas, guest_delta, guest_state, merge_deltas
+from ..utils.db import conflict_insert, dialect_name
+from . import search_service, event_cache, reservation_service, venue_service
+
+class RowError(ValueError):
+    """A row that failed validation"""
+
+TRUE_VALUES = {'true', '1', 'yes', 'on'}
+
+def iter_records(stream, fmt):
+    """Yield parsed records from a CSV or NDJSON byte stream one at a time"""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        for record in csv.DictReader(text):
+            yield record
+    else:
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield RowError('Invalid JSON')
+                continue
+            yield record if isinstance(record, dict) else RowError('Expected a JSON object')
+
+def _optional(record, key):
+    value = record.get(key)
+    if isinstance(value, str):
+        value = value.strip()
+    return value if value not in (None, '') else None
+
+def _parse_datetime(value, field):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid {field}")
+
+def parse_event_record(record, organizer_id):
+    """Validate an import record and turn it into events table values"""
+    title = _optional(record, 'title')
+    if not title:
+        raise RowError("Title is required")
+    if len(title) > 200:
+        raise RowError("Title is too long")
+
+    if not _optional(record, 'start_time') or not _optional(record, 'end_time'):
+        raise RowError("Start and end times are required")
+    start_time = _parse_datetime(_optional(record, 'start_time'), 'start_time')
+    end_time = _parse_datetime(_optional(record, 'end_time'), 'end_time')
+    if end_time <= start_time:
+        raise RowError("End time must be after start time")
+
+    try:
+        event_type = EventType(_optional(record, 'event_type') or 'other')
+    except ValueError:
+        raise RowError("Invalid event_type")
+    try:
+        status = EventStatus(_optional(record, 'status') or 'draft')
+    except ValueError:
+        raise RowError("Invalid status")
+
+    max_attendees = _optional(record, 'max_attendees')
+    if max_attendees is not None:
+        try:
+            max_attendees = int(max_attendees)
+        except (TypeError, ValueError):
+            raise RowError("Invalid max_attendees")
+
+    is_public = _optional(record, 'is_public')
+    if isinstance(is_public, str):
+        is_public = is_public.lower() in TRUE_VALUES
+
+    venue_id = _optional(record, 'venue_id')
+    if venue_id is not None:
+        try:
+            venue_id = int(venue_id)
+        except (TypeError, ValueError):
+            raise RowError("Invalid venue_id")
+
+    return {
+        'title': title,
+        'description': _optional(record, 'description') or '',
+        'start_time': start_time,
+        'end_time': end_time,
+        'timezone': _optional(record, 'timezone') or 'UTC',
+        'location': _optional(record, 'location') or '',
+        'virtual_meeting_url': _optional(record, 'virtual_meeting_url'),
+        'max_attendees': max_attendees,
+        'is_public': True if is_public is None else bool(is_public),
+        'event_type': event_type,
+        'status': status,
+        'organizer_id': organizer_id,
+        'venue_id': venue_id
+    }
+
+def _insert_chunk(rows, user):
+    """Insert a chunk of events and their default budgets; returns the event ids"""
+    events = Event.__table__
+    dialect = dialect_name()
+    if dialect == 'postgresql':
+        # One multi-row INSERT ... RETURNING for the whole chunk
+        result = db.session.execute(events.insert().values(rows).returning(events.c.id))
+        event_ids = [row[0] for row in result]
+    elif dialect == 'sqlite':
+        # pysqlite only begins a transaction at the first write, so a bare
+        # SELECT would read MAX(id) unlocked. A no-op UPDATE takes SQLite's
+        # write lock first; no one else can insert until we commit, so every
+        # id above the maximum is ours
+        db.session.execute(events.update().where(db.false()).values(id=events.c.id))
+        previous_max = db.session.query(db.func.max(Event.id)).scalar() or 0
+        db.session.execute(events.insert(), rows)
+        event_ids = [
+            event_id for (event_id,) in db.session.query(Event.id).filter(Event.id > previous_max)
+            .order_by(Event.id)
+        ]
+    else:
+        event_ids = [
+            db.session.execute(events.insert().values(row)).inserted_primary_key[0] for row in rows
+        ]
+
+    db.session.execute(Budget.__table__.insert(), [
+        {
+            'event_id': event_id,
+            'total_budget': 0,
+            'status': BudgetStatus.DRAFT,
+            'created_by': user.id
+        }
+        for event_id in event_ids
+    ])
+    search_service.index_events(event_ids)
+    return event_ids
+
+def _venue_errors(rows, row_numbers):
+    """Lock the chunk's venues; {row number: error} for rows that can't be booked"""
+    by_number = dict(zip(row_numbers, rows))
+    venue_ids = {row['venue_id'] for row in rows if row['venue_id'] is not None}
+    if not venue_ids:
+        return {}
+    venues = Venue.__table__
+    known = set(db.session.execute(
+        db.select([venues.c.id]).where(venues.c.id.in_(list(venue_ids)))
+    ).scalars())
+    errors = {
+        row_number: "Unknown venue_id"
+        for row_number, row in by_number.items()
+        if row['venue_id'] is not None and row['venue_id'] not in known
+    }
+    conflicts = venue_service.find_batch_conflicts([
+        (row_number, row['venue_id'], row['start_time'], row['end_time'])
+        for row_number, row in by_number.items()
+        if row_number not in errors and row['status'] != EventStatus.CANCELLED
+    ])
+    for row_number, (event_id, earlier_row) in conflicts.items():
+        message = str(venue_service.VenueConflict(by_number[row_number]['venue_id']))
+        if event_id is not None:
+            errors[row_number] = f"{message} (event {event_id})"
+        else:
+            errors[row_number] = f"{message} (row {earlier_row})"
+    return errors
+
+def import_events(stream, fmt, user):
+    """Stream-import events from CSV or NDJSON.
+
+    Records are validated as they are read and inserted in chunks, each
+    chunk (events plus default budgets) in its own transaction, so a bad
+    chunk does not roll back earlier ones. Each chunk's venues are locked
+    and its rows checked for double-bookings (against the database and the
+    chunk's earlier rows) first; conflicting rows are reported and skipped.
+    """
+    if user.role not in ['admin', 'organizer']:
+        return {"error": "Not authorized to import events"}, 403
+    if fmt not in ('csv', 'ndjson'):
+        return {"error": "Format must be 'csv' or 'ndjson'"}, 400
+
+    chunk_size = current_app.config.get('EVENT_IMPORT_CHUNK_SIZE', 1000)
+    max_errors = current_app.config.get('EVENT_IMPORT_MAX_ERRORS', 1000)
+
+    imported = 0
+    failed = 0
+    errors = []
+    chunk = []
+    chunk_rows = []
+
+    def record_error(row_number, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({'row': row_number, 'error': message})
+
+    def flush():
+        nonlocal imported
+        if not chunk:
+            return
+        try:
+            rejected = _venue_errors(chunk, chunk_rows)
+            rows = [row for row, row_number in zip(chunk, chunk_rows) if row_number not in rejected]
+            event_ids = _insert_chunk(rows, user) if rows else []
+            event_cache.invalidate_on_commit([event_cache.ADMIN_TAG, event_cache.user_tag(user.id)])
+            db.session.commit()
+            imported += len(event_ids)
+            for row_number, message in sorted(rejected.items()):
+                record_error(row_number, message)
+            for event_id, row in zip(event_ids, rows):
+                if row['venue_id'] is not None:
+                    venue_service.record_slot(event_id, row['venue_id'], row['start_time'], row['end_time'],
+                                              active=row['status'] != EventStatus.CANCELLED)
+        except Exception as e:
+            db.session.rollback()
+            if venue_service.is_booking_conflict(e):
+                message = "Venue is already booked for an overlapping event"
+            else:
+                message = f"Failed to insert: {str(e)}"
+            for row_number in chunk_rows:
+                record_error(row_number, message)
+        chunk.clear()
+        chunk_rows.clear()
+
+    try:
+        for row_number, record in enumerate(iter_records(stream, fmt), start=1):
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                chunk.append(parse_event_record(record, user.id))
+                chunk_rows.append(row_number)
+            except RowError as e:
+                record_error(row_number, str(e))
+                continue
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        return {"error": f"Could not read import file: {str(e)}", "imported": imported}, 400
+
+    return {
+        "message": "Import finished",
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+RSVP_STATUSES = {'pending', 'accepted', 'declined'}
+GUEST_FIELDS = ('first_name', 'last_name', 'phone', 'rsvp_status')
+_GUEST_COPY_COLUMNS = (
+    'event_id', 'email', 'first_name', 'last_name', 'phone',
+    'rsvp_status', 'created_at', 'updated_at'
+)
+
+def parse_guest_record(record):
+    """Validate a guest import record; the email is normalized to lower case"""
+    email = (_optional(record, 'email') or '').lower()
+    if not email:
+        raise RowError("Email is required")
+    if len(email) > 120 or not EMAIL_PATTERN.match(email):
+        raise RowError("Invalid email")
+
+    values = {'email': email}
+    for field, max_length in (('first_name', 64), ('last_name', 64), ('phone', 20)):
+        value = _optional(record, field)
+        if value is not None and len(value) > max_length:
+            raise RowError(f"{field} is too long")
+        values[field] = value
+
+    rsvp_status = _optional(record, 'rsvp_status')
+    if rsvp_status is not None:
+        rsvp_status = rsvp_status.lower()
+        if rsvp_status not in RSVP_STATUSES:
+            raise RowError("Invalid rsvp_status")
+    values['rsvp_status'] = rsvp_status
+    return values
+
+def _existing_guests(event_id):
+    """{normalized email: (id, first_name, last_name, phone, rsvp_status)} for an event"""
+    guests = EventGuest.__table__
+    rows = db.session.execute(
+        db.select([guests.c.email, guests.c.id] + [guests.c[field] for field in GUEST_FIELDS])
+        .where(guests.c.event_id == event_id)
+    )
+    return {row[0].lower(): tuple(row[1:]) for row in rows}
+
+def _lock_guests():
+    """Keep other writers from adding guests until the import commits
+
+    Only SQLite needs this: its write lock (taken by a no-op UPDATE) makes
+    the existing-guest snapshot exact. Elsewhere concurrent additions are
+    left to the unique index and skipped by the upsert.
+    """
+    if dialect_name() == 'sqlite':
+        guests = EventGuest.__table__
+        db.session.execute(guests.update().where(db.false()).values(id=guests.c.id))
+
+def _insert_guests(rows):
+    """Insert new guests, skipping emails already on the list
+
+    COPY into a temporary table and one INSERT ... SELECT ... ON CONFLICT
+    DO NOTHING on PostgreSQL, an executemany upsert elsewhere. Returns the
+    RSVP statuses of the rows actually inserted.
+    """
+    if dialect_name() != 'postgresql':
+        insert = conflict_insert(EventGuest.__table__)
+        if insert is None:
+            db.session.execute(EventGuest.__table__.insert(), rows)
+        else:
+            db.session.execute(insert.on_conflict_do_nothing(), rows)
+        return [row['rsvp_status'] for row in rows]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            row[column].isoformat() if isinstance(row[column], datetime) else row[column]
+            for column in _GUEST_COPY_COLUMNS
+        ])
+    buffer.seek(0)
+    columns = ', '.join(_GUEST_COPY_COLUMNS)
+    # Unquoted empty fields are NULL in COPY's CSV format; these columns
+    # are NOT NULL, so their empty values must load as empty strings
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS event_guests_import ON COMMIT DROP AS "
+        f"SELECT {columns} FROM event_guests WITH NO DATA"
+    )
+    cursor.copy_expert(
+        f"COPY event_guests_import ({columns}) FROM STDIN "
+        "WITH (FORMAT csv, FORCE_NOT_NULL (email, first_name, last_name, rsvp_status))",
+        buffer
+    )
+    cursor.execute(
+        f"INSERT INTO event_guests ({columns}) SELECT {columns} FROM event_guests_import "
+        "ON CONFLICT DO NOTHING RETURNING rsvp_status"
+    )
+    statuses = [status for (status,) in cursor.fetchall()]
+    cursor.execute("TRUNCATE event_guests_import")
+    return statuses
+
+def _update_guests(rows):
+    guests = EventGuest.__table__
+    values = {field: db.func.coalesce(bindparam(f'new_{field}'), guests.c[field]) for field in GUEST_FIELDS}
+    values['updated_at'] = bindparam('now')
+    db.session.execute(
+        guests.update().where(guests.c.id == bindparam('guest_id')).values(values),
+        rows
+    )
+
+def _index_guests(event_id):
+    """Add participant index entries for the event's guests that have accounts
+
+    Core inserts bypass the EventGuest mapper listeners, so the entries are
+    created here in one INSERT ... SELECT. Returns the linked user ids.
+    """
+    guests = EventGuest.__table__
+    participants = EventParticipant.__table__
+    users = db.metadata.tables['users']
+    missing = db.select([guests.c.event_id, users.c.id, db.literal(ParticipantRole.GUEST), guests.c.id]) \
+        .select_from(guests.join(users, users.c.email == db.func.lower(guests.c.email))) \
+        .where(guests.c.event_id == event_id) \
+        .where(~db.exists().where(db.and_(
+            participants.c.role == ParticipantRole.GUEST,
+            participants.c.source_id == guests.c.id
+        )))
+    db.session.execute(participants.insert().from_select(
+        ['event_id', 'user_id', 'role', 'source_id'], missing
+    ))
+    return [user_id for (user_id,) in db.session.execute(
+        db.select([participants.c.user_id]).distinct()
+        .where(participants.c.event_id == event_id)
+        .where(participants.c.role == ParticipantRole.GUEST)
+    )]
+
+def import_guests(event_id, stream, fmt, user, update_existing=True):
+    """Stream-import an event's guest list from CSV or NDJSON.
+
+    Emails are normalized and deduplicated against the event's existing
+    guests (loaded once into a dict) and within the file. New guests are
+    written in chunks of GUEST_IMPORT_CHUNK_SIZE with executemany (COPY on
+    PostgreSQL) as upserts against the (event_id, lower(email)) unique
+    index, so guests added concurrently are skipped rather than duplicated;
+    existing guests are updated in batches when ``update_existing`` is set
+    and a field differs, and skipped otherwise.
+    The import is one transaction, and the event's guest counters are
+    adjusted in it by the net change of all rows.
+    """
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to import guests for this event"}, 403
+    if fmt not in ('csv', 'ndjson'):
+        return {"error": "Format must be 'csv' or 'ndjson'"}, 400
+
+    chunk_size = current_app.config.get('GUEST_IMPORT_CHUNK_SIZE', 5000)
+    max_errors = current_app.config.get('EVENT_IMPORT_MAX_ERRORS', 1000)
+    now = datetime.utcnow()
+
+    _lock_guests()
+    existing = _existing_guests(event_id)
+    seen = set()
+    inserts, updates = [], []
+    counter_deltas = {}
+    inserted = updated = skipped = failed = 0
+    errors = []
+
+    def record_error(row_number, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({'row': row_number, 'error': message})
+
+    def write_inserts():
+        nonlocal inserted, skipped
+        statuses = _insert_guests(inserts)
+        for status in statuses:
+            merge_deltas(counter_deltas, event_id, guest_delta(None, guest_state(status, None)))
+        inserted += len(statuses)
+        # Rows another writer added since the existing guests were read
+        skipped += len(inserts) - len(statuses)
+        inserts.clear()
+
+    try:
+        for row_number, record in enumerate(iter_records(stream, fmt), start=1):
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                values = parse_guest_record(record)
+            except RowError as e:
+                record_error(row_number, str(e))
+                continue
+
+            email = values['email']
+            if email in seen:
+                skipped += 1
+                continue
+            seen.add(email)
+
+            current = existing.get(email)
+            if current is None:
+                inserts.append({
+                    'event_id': event_id,
+                    'email': email,
+                    'first_name': values['first_name'] or '',
+                    'last_name': values['last_name'] or '',
+                    'phone': values['phone'],
+                    'rsvp_status': values['rsvp_status'] or 'pending',
+                    'created_at': now,
+                    'updated_at': now
+                })
+            elif update_existing and any(
+                values[field] is not None and values[field] != current[index + 1]
+                for index, field in enumerate(GUEST_FIELDS)
+            ):
+                row = {'guest_id': current[0], 'now': now}
+                if values['rsvp_status'] is not None:
+                    # Check-in state is unchanged, so it cancels out
+                    old_status = current[GUEST_FIELDS.index('rsvp_status') + 1]
+                    merge_deltas(counter_deltas, event_id, guest_delta(
+                        guest_state(old_status, None), guest_state(values['rsvp_status'], None)
+                    ))
+                row.update({f'new_{field}': values[field] for field in GUEST_FIELDS})
+                updates.append(row)
+            else:
+                skipped += 1
+
+            if len(inserts) >= chunk_size:
+                write_inserts()
+            if len(updates) >= chunk_size:
+                _update_guests(updates)
+                updated += len(updates)
+                updates.clear()
+
+        if inserts:
+            write_inserts()
+        if updates:
+            _update_guests(updates)
+            updated += len(updates)
+
+        # Organizers may overbook by import; the seat ledger (locked before
+        # the counters, as RSVPs do) just records the extra accepted guests
+        if event_id in counter_deltas:
+            reservation_service.adjust_reserved(event_id, counter_deltas[event_id]['accepted'])
+        if updated:
+            reservation_service.drop_stale_entries([event_id])
+        apply_deltas(db.session.connection(), counter_deltas)
+        linked_user_ids = _index_guests(event_id) if inserted else []
+        event_cache.invalidate_on_commit(
+            [event_cache.ADMIN_TAG, event_cache.event_tag(event_id), event_cache.user_tag(event.organizer_id)]
+            + [event_cache.user_tag(user_id) for user_id in linked_user_ids]
+        )
+        db.session.commit()
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        return {"error": f"Could not read import file: {str(e)}"}, 400
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to import guests: {str(e)}"}, 500
+
+    return {
+        "message": "Import finished",
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": skipped,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
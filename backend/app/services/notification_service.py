@@ -0,0 +1,57 @@
+from flask import current_app
+from .. import socketio
+from ..models.participant import EventParticipant
+
+# Real-time notifications over Socket.IO.
+#
+# Clients join ``user_<id>`` on connect and ``event_<id>`` on request (see
+# socket_service). Bulk operations group their changes per room so each
+# room gets one message however many rows changed.
+
+def user_room(user_id):
+    return f'user_{user_id}'
+
+def event_room(event_id):
+    return f'event_{event_id}'
+
+def _emit(name, payload, room):
+    try:
+        socketio.emit(name, payload, room=room)
+    except Exception as e:
+        # Notifications are best effort; the change is already committed
+        current_app.logger.warning(f"Failed to emit {name} to {room}: {e}")
+
+def notify_user(user_id, name, payload):
+    _emit(name, payload, user_room(user_id))
+
+def notify_event(event_id, name, payload):
+    _emit(name, payload, event_room(event_id))
+
+def event_audience(event_ids, organizer_ids=None):
+    """{user_id: set(event_ids)} for the organizers and participants of events
+
+    ``organizer_ids`` maps event id to organizer id when the caller already
+    has it; participants come from one query on the participant index.
+    """
+    audience = {}
+    for event_id, organizer_id in (organizer_ids or {}).items():
+        audience.setdefault(organizer_id, set()).add(event_id)
+    rows = EventParticipant.query.with_entities(
+        EventParticipant.user_id, EventParticipant.event_id
+    ).filter(EventParticipant.event_id.in_(list(event_ids))).distinct()
+    for user_id, event_id in rows:
+        audience.setdefault(user_id, set()).add(event_id)
+    return audience
+
+def notify_batch(name, changes, audience):
+    """Send one message per event room and one per user room.
+
+    ``changes`` maps event id to its payload; each user gets the payloads of
+    the events they are in as a single list.
+    """
+    for event_id, payload in changes.items():
+        notify_event(event_id, name, payload)
+    for user_id, event_ids in audience.items():
+        notify_user(user_id, f'{name}_batch', {
+            'items': [changes[event_id] for event_id in sorted(event_ids) if event_id in changes]
+        })
@@ -0,0 +1,347 @@
+from datetime import datetime
+from dateutil.rrule import rrulestr
+from flask import current_app
+from sqlalchemy import and_, or_, select
+from .. import db
+from ..models.event import Event, EventStatus, EventOccurrenceException
+from . import event_cache
+
+# Recurring events.
+#
+# A series is a single Event row with an RFC 5545 RRULE; its start/end_time
+# are the first occurrence. Occurrences are expanded from the rule at query
+# time and only exceptions (edited or cancelled occurrences) are stored.
+# ``Event.recurrence_end`` holds the end of the last occurrence (NULL for
+# unbounded rules) so date-window queries can prune series in SQL before
+# anything is expanded.
+
+ALLOWED_FREQUENCIES = {'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'}
+# Bounded rules with more occurrences than this are treated as unbounded
+MAX_SERIES_SCAN = 100000
+OVERRIDE_FIELDS = ('title', 'description', 'location')
+
+class InvalidRecurrence(ValueError):
+    """Raised for malformed or unsupported recurrence rules"""
+
+def _normalize(rule):
+    rule = (rule or '').strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[len('RRULE:'):]
+    return rule
+
+def parse_rule(rule, dtstart):
+    """Parse an RRULE (with or without the ``RRULE:`` prefix) anchored at ``dtstart``"""
+    rule = _normalize(rule)
+    parts = dict(
+        part.split('=', 1) for part in rule.upper().split(';') if '=' in part
+    )
+    if parts.get('FREQ') not in ALLOWED_FREQUENCIES:
+        raise InvalidRecurrence(
+            f"FREQ must be one of {', '.join(sorted(ALLOWED_FREQUENCIES))}"
+        )
+    if 'DTSTART' in rule.upper():
+        raise InvalidRecurrence("DTSTART is taken from the event's start_time")
+    try:
+        return rrulestr(rule, dtstart=dtstart)
+    except (ValueError, TypeError) as e:
+        raise InvalidRecurrence(f"Invalid recurrence rule: {e}")
+
+def series_end(rule, start_time, end_time):
+    """End of a series' last occurrence, or None if it is unbounded"""
+    normalized = _normalize(rule).upper()
+    if 'COUNT=' not in normalized and 'UNTIL=' not in normalized:
+        return None
+    last = None
+    for index, last in enumerate(parse_rule(rule, start_time)):
+        if index >= MAX_SERIES_SCAN:
+            return None
+    if last is None:
+        raise InvalidRecurrence("Recurrence rule produces no occurrences")
+    return last + (end_time - start_time)
+
+def apply_rule(event, rule):
+    """Set (or clear, for an empty rule) an event's recurrence"""
+    if not rule:
+        event.recurrence_rule = None
+        event.recurrence_end = None
+        return
+    event.recurrence_end = series_end(rule, event.start_time, event.end_time)
+    event.recurrence_rule = _normalize(rule)
+
+def is_occurrence(event, start):
+    """Whether the series' rule generates an occurrence starting at ``start``"""
+    rule = parse_rule(event.recurrence_rule, event.start_time)
+    return rule.after(start, inc=True) == start
+
+def prune_exceptions(event):
+    """Drop exceptions for occurrences a changed rule/start no longer generates"""
+    for exception in list(event.occurrence_exceptions):
+        if not event.recurrence_rule or not is_occurrence(event, exception.original_start):
+            db.session.delete(exception)
+
+def parse_bound(value):
+    """Parse a date-window bound (ISO date or datetime); None passes through"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidRecurrence(f"Invalid date: {value}")
+
+def window_filter(window_start=None, window_end=None):
+    """Filter for events with (at least one) occurrence inside the window.
+
+    One-off events must lie within the window as before; series only need
+    to have started before it ends and not to have finished before it starts.
+    """
+    one_off = [Event.recurrence_rule.is_(None)]
+    series = [Event.recurrence_rule.isnot(None)]
+    if window_start is not None:
+        one_off.append(Event.start_time >= window_start)
+        series.append(or_(Event.recurrence_end.is_(None), Event.recurrence_end >= window_start))
+    if window_end is not None:
+        one_off.append(Event.end_time <= window_end)
+        series.append(Event.start_time <= window_end)
+    return or_(and_(*one_off), and_(*series))
+
+def overlap_filter(events, window_start, window_end):
+    """Rows of ``events`` with an occurrence that may overlap ``[window_start, window_end)``"""
+    one_off = and_(
+        events.c.recurrence_rule.is_(None),
+        events.c.start_time < window_end,
+        events.c.end_time > window_start
+    )
+    series = and_(
+        events.c.recurrence_rule.isnot(None),
+        events.c.start_time < window_end,
+        or_(events.c.recurrence_end.is_(None), events.c.recurrence_end > window_start)
+    )
+    return or_(one_off, series)
+
+def occurrences_in_window(connection, rows, window_start, window_end, limit):
+    """(event row, start, end, recurrence_id) for each occurrence overlapping the window
+
+    ``rows`` need id, start_time, end_time and recurrence_rule; series are
+    expanded (at most ``limit`` occurrences each) honouring their exceptions.
+    """
+    series_ids = [row.id for row in rows if row.recurrence_rule and row.id is not None]
+    exceptions = {}
+    if series_ids:
+        table = EventOccurrenceException.__table__
+        for exception in connection.execute(select(table).where(table.c.event_id.in_(series_ids))):
+            exceptions.setdefault(exception.event_id, {})[exception.original_start] = exception
+
+    for row in rows:
+        if not row.recurrence_rule:
+            if row.start_time < window_end and row.end_time > window_start:
+                yield row, row.start_time, row.end_time, None
+            continue
+        try:
+            # Occurrences must overlap, not fit inside, the window
+            duration = row.end_time - row.start_time
+            occurrences = expand(
+                row, window_start - duration, window_end + duration,
+                exceptions.get(row.id, {}), limit=limit, base={'id': row.id}
+            )
+        except InvalidRecurrence:
+            continue
+        for occurrence in occurrences:
+            start = datetime.fromisoformat(occurrence['start_time'])
+            end = datetime.fromisoformat(occurrence['end_time'])
+            if start < window_end and end > window_start:
+                yield row, start, end, occurrence['recurrence_id']
+
+def load_exceptions(event_ids):
+    """Exceptions for many series in one query: {event_id: {original_start: exception}}"""
+    event_ids = list(event_ids)
+    if not event_ids:
+        return {}
+    exceptions = {}
+    rows = EventOccurrenceException.query.filter(
+        EventOccurrenceException.event_id.in_(event_ids)
+    )
+    for exception in rows:
+        exceptions.setdefault(exception.event_id, {})[exception.original_start] = exception
+    return exceptions
+
+def _occurrence(base, original_start, start, end, exception=None):
+    item = dict(base)
+    item.update({
+        'series_id': base['id'],
+        'recurrence_id': original_start.isoformat(),
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat(),
+        'is_exception': exception is not None,
+    })
+    if exception is not None:
+        for field in OVERRIDE_FIELDS:
+            value = getattr(exception, field)
+            if value is not None:
+                item[field] = value
+    return item
+
+def expand(event, window_start=None, window_end=None, exceptions=None, limit=None, base=None):
+    """Occurrences of a series inside the window, earliest first.
+
+    ``exceptions`` is this event's entry from ``load_exceptions`` and ``base``
+    its serialized form; both are looked up when omitted. At most ``limit``
+    (default RECURRENCE_MAX_OCCURRENCES) occurrences are returned.
+    """
+    if limit is None:
+        limit = current_app.config.get('RECURRENCE_MAX_OCCURRENCES', 100)
+    if exceptions is None:
+        exceptions = load_exceptions([event.id]).get(event.id, {})
+    if base is None:
+        base = event.to_dict()
+    duration = event.end_time - event.start_time
+
+    def in_window(start, end):
+        return (window_start is None or start >= window_start) and \
+               (window_end is None or end <= window_end)
+
+    occurrences = []
+    rule = parse_rule(event.recurrence_rule, event.start_time)
+    for start in rule.xafter(window_start or event.start_time, inc=True):
+        if window_end is not None and start + duration > window_end:
+            break
+        if len(occurrences) >= limit:
+            break
+        if start not in exceptions:
+            occurrences.append(_occurrence(base, start, start, start + duration))
+
+    # Edited occurrences may have moved into (or within) the window
+    for original_start, exception in exceptions.items():
+        if exception.is_cancelled:
+            continue
+        start = exception.start_time or original_start
+        end = exception.end_time or start + duration
+        if in_window(start, end):
+            occurrences.append(_occurrence(base, original_start, start, end, exception))
+
+    occurrences.sort(key=lambda item: item['start_time'])
+    return occurrences[:limit]
+
+def attach_occurrences(events, items, window_start, window_end):
+    """Add an ``occurrences`` list to the serialized series in a page of events"""
+    series = [event for event in events if event.recurrence_rule]
+    if not series:
+        return items
+    exceptions = load_exceptions(event.id for event in series)
+    by_id = {item['id']: item for item in items}
+    for event in series:
+        item = by_id[event.id]
+        item['occurrences'] = expand(
+            event, window_start, window_end,
+            exceptions=exceptions.get(event.id, {}), base=item
+        )
+    return items
+
+def get_occurrences(event_id, user, window_start=None, window_end=None):
+    """Expanded occurrences of a single event inside a date window"""
+    from .event_service import is_authorized_for_event
+    event = Event.query.get_or_404(event_id)
+    if not is_authorized_for_event(event, user):
+        return {"error": "Not authorized to view this event"}, 403
+    try:
+        window_start = parse_bound(window_start)
+        window_end = parse_bound(window_end)
+    except InvalidRecurrence as e:
+        return {"error": str(e)}, 400
+
+    if event.recurrence_rule:
+        return {'items': expand(event, window_start, window_end)}
+
+    # A one-off event is its own single occurrence
+    if (window_start is not None and event.start_time < window_start) or \
+            (window_end is not None and event.end_time > window_end):
+        return {'items': []}
+    return {'items': [_occurrence(event.to_dict(), event.start_time, event.start_time, event.end_time)]}
+
+def _exception_for(event, recurrence_id):
+    try:
+        original_start = datetime.fromisoformat(recurrence_id)
+    except ValueError:
+        raise InvalidRecurrence(f"Invalid recurrence id: {recurrence_id}")
+    if not event.recurrence_rule or not is_occurrence(event, original_start):
+        raise InvalidRecurrence(f"Event {event.id} has no occurrence at {recurrence_id}")
+    exception = EventOccurrenceException.query.filter_by(
+        event_id=event.id, original_start=original_start
+    ).first()
+    if exception is None:
+        exception = EventOccurrenceException(event_id=event.id, original_start=original_start)
+        db.session.add(exception)
+    return exception
+
+def _touch(event):
+    # Feeds and caches key off the series row
+    event.updated_at = datetime.utcnow()
+    event_cache.invalidate_event(event)
+
+def _check_venue(event):
+    from .venue_service import check_venue_available
+    if event.status != EventStatus.CANCELLED:
+        check_venue_available(event)
+
+def update_occurrence(event_id, recurrence_id, data, user):
+    """Edit or cancel a single occurrence of a series"""
+    from .venue_service import VenueConflict
+    event = Event.query.get_or_404(event_id)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to update this event"}, 403
+
+    try:
+        exception = _exception_for(event, recurrence_id)
+        for field in ('start_time', 'end_time'):
+            if field in data:
+                setattr(exception, field, parse_bound(data[field]))
+        for field in OVERRIDE_FIELDS:
+            if field in data:
+                setattr(exception, field, data[field])
+        if 'is_cancelled' in data:
+            exception.is_cancelled = bool(data['is_cancelled'])
+
+        start = exception.start_time or exception.original_start
+        end = exception.end_time or start + (event.end_time - event.start_time)
+        if end <= start:
+            raise InvalidRecurrence("end_time must be after start_time")
+        if not exception.is_cancelled:
+            _check_venue(event)
+
+        _touch(event)
+        db.session.commit()
+        return {"message": "Occurrence updated successfully", "exception": exception.to_dict()}
+    except InvalidRecurrence as e:
+        db.session.rollback()
+        return {"error": str(e)}, 400
+    except VenueConflict as e:
+        db.session.rollback()
+        return {"error": str(e), "conflicting_event_id": e.event_id}, 409
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to update occurrence: {str(e)}"}, 500
+
+def cancel_occurrence(event_id, recurrence_id, user):
+    return update_occurrence(event_id, recurrence_id, {'is_cancelled': True}, user)
+
+def restore_occurrence(event_id, recurrence_id, user):
+    """Drop an occurrence's exception so it follows the series again"""
+    event = Event.query.get_or_404(event_id)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to update this event"}, 403
+    try:
+        original_start = datetime.fromisoformat(recurrence_id)
+    except ValueError:
+        return {"error": f"Invalid recurrence id: {recurrence_id}"}, 400
+
+    from .venue_service import VenueConflict
+    EventOccurrenceException.query.filter_by(
+        event_id=event.id, original_start=original_start
+    ).delete()
+    try:
+        _check_venue(event)
+    except VenueConflict as e:
+        db.session.rollback()
+        return {"error": str(e), "conflicting_event_id": e.event_id}, 409
+    _touch(event)
+    db.session.commit()
+    return {"message": "Occurrence restored"}
@@ -0,0 +1,346 @@
+import heapq
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event as sa_event, inspect, select, and_
+from sqlalchemy.orm import Session
+from .. import db
+from ..models.task import Task, TaskStatus, TaskAssignment, TaskReminder
+from ..models.scheduler import SchedulerLease
+from ..utils.db import insert_ignore
+from .notification_service import notify_user
+
+# Task due-date reminders.
+#
+# One worker process holds the ``task_reminders`` lease (a row in
+# scheduler_leases, renewed every poll) and owns the schedule; the others
+# only keep trying to take the lease over, which they can once it expires.
+# The owner keeps a min-heap of (fire time, task, due date, lead) for the
+# open tasks due within the longest lead plus TASK_REMINDER_WINDOW_HOURS,
+# and sleeps until the earliest entry or the next poll. The window is
+# extended a slice at a time as the clock moves, so the table is never
+# scanned as a whole after the first load.
+#
+# Changes reach the heap two ways: commits in the owning process mark the
+# tasks they touched dirty and wake the scheduler, and every poll picks up
+# tasks whose updated_at moved (changes made by other processes). Changed
+# tasks are re-read and re-armed; heap entries for an older due date are
+# skipped when they surface rather than searched for and removed.
+#
+# Sent reminders are recorded in task_reminders, keyed on the due date they
+# were sent for, in the same commit that precedes the notification. A new
+# owner (after a restart or failover) rebuilds the heap from the tasks and
+# skips what was already recorded. Reminders whose time passed while nobody
+# owned the schedule collapse into the nearest one that still applies.
+
+REMINDER_LEASE = 'task_reminders'
+OPEN_STATUSES = (TaskStatus.TODO, TaskStatus.IN_PROGRESS, TaskStatus.BLOCKED)
+
+_DIRTY_KEY = 'task_reminders_dirty'
+
+def parse_leads(value):
+    """Reminder lead times in minutes, longest first, from '1440,60' or a list"""
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    return sorted({int(lead) for lead in value if int(lead) > 0}, reverse=True)
+
+def reminder_times(due_date, leads, now, sent=()):
+    """(fire_at, lead) of the reminders still to send for a due date
+
+    Of the reminders whose time has already come only the shortest lead is
+    kept: a task due in 30 minutes gets its one-hour reminder, not the
+    one-day reminder as well.
+    """
+    if due_date is None or due_date <= now:
+        return []
+    times, late = [], None
+    for lead in leads:
+        fire_at = due_date - timedelta(minutes=lead)
+        if fire_at > now:
+            times.append((fire_at, lead))
+        elif late is None or lead < late[1]:
+            late = (now, lead)
+    if late is not None:
+        times.append(late)
+    return [(fire_at, lead) for fire_at, lead in times if lead not in sent]
+
+class ReminderScheduler:
+    """In-memory timer heap of task reminders, owned by the lease holder"""
+
+    def __init__(self, app, holder=None, clock=datetime.utcnow):
+        self.app = app
+        self.holder = holder or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.clock = clock
+        self.leads = parse_leads(app.config.get('TASK_REMINDER_LEADS', '1440,60'))
+        self.window = timedelta(hours=app.config.get('TASK_REMINDER_WINDOW_HOURS', 6))
+        self.poll = app.config.get('TASK_REMINDER_POLL_INTERVAL', 30)
+        self.lease_seconds = app.config.get('TASK_REMINDER_LEASE_SECONDS', 90)
+        self.leader = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._dirty = set()
+        self._reset()
+
+    def _reset(self):
+        self._heap = []
+        self._due = {}
+        self.loaded_until = None
+        self.changed_since = None
+
+    @property
+    def horizon(self):
+        """How far past now due dates are held in the heap"""
+        return timedelta(minutes=self.leads[0] if self.leads else 0) + self.window
+
+    # Heap
+
+    def arm(self, task_id, due_date, now, sent=()):
+        """(Re)schedule a task's reminders, replacing those for an older due date"""
+        self._due.pop(task_id, None)
+        times = reminder_times(due_date, self.leads, now, sent)
+        if not times:
+            return
+        self._due[task_id] = due_date
+        for fire_at, lead in times:
+            heapq.heappush(self._heap, (fire_at, task_id, due_date, lead))
+
+    def disarm(self, task_id):
+        self._due.pop(task_id, None)
+
+    def _current(self, entry):
+        return self._due.get(entry[1]) == entry[2]
+
+    def next_fire(self):
+        """Earliest pending fire time, or None"""
+        while self._heap and not self._current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Entries (task_id, due_date, lead) due by ``now``, the shortest lead per task"""
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not self._current(entry):
+                continue
+            _, task_id, due_date, lead = entry
+            if task_id not in due or lead < due[task_id][2]:
+                due[task_id] = (task_id, due_date, lead)
+        # Tasks with nothing left to fire stop being tracked
+        pending = {entry[1] for entry in self._heap if self._current(entry)}
+        for task_id in due:
+            if task_id not in pending:
+                self._due.pop(task_id, None)
+        return list(due.values())
+
+    def mark_dirty(self, task_ids):
+        """Re-read these tasks on the next pass (called after commits)"""
+        with self._lock:
+            self._dirty.update(task_ids)
+        self._wake.set()
+
+    def _take_dirty(self):
+        with self._lock:
+            task_ids, self._dirty = self._dirty, set()
+        return task_ids
+
+    # Database
+
+    def _load(self, criteria, now):
+        tasks = Task.__table__
+        reminders = TaskReminder.__table__
+        rows = db.session.execute(
+            select(tasks.c.id, tasks.c.due_date, reminders.c.lead_minutes)
+            .select_from(tasks.outerjoin(reminders, and_(
+                reminders.c.task_id == tasks.c.id, reminders.c.due_date == tasks.c.due_date
+            )))
+            .where(tasks.c.status.in_(OPEN_STATUSES), *criteria)
+        )
+        found = {}
+        for task_id, due_date, lead in rows:
+            sent = found.setdefault(task_id, (due_date, set()))[1]
+            if lead is not None:
+                sent.add(lead)
+        for task_id, (due_date, sent) in found.items():
+            self.arm(task_id, due_date, now, sent)
+        return len(found)
+
+    def load_window(self, start, end, now):
+        """Arm the open tasks due in (start, end]"""
+        due_date = Task.__table__.c.due_date
+        count = self._load([due_date > start, due_date <= end], now)
+        self.loaded_until = end
+        return count
+
+    def refresh(self, task_ids, now):
+        """Re-read the given tasks and re-arm those due inside the loaded window"""
+        if not task_ids:
+            return 0
+        for task_id in task_ids:
+            self.disarm(task_id)
+        tasks = Task.__table__
+        return self._load([
+            tasks.c.id.in_(list(task_ids)), tasks.c.due_date > now, tasks.c.due_date <= self.loaded_until
+        ], now)
+
+    def changed_tasks(self, now):
+        """IDs of tasks updated since the last poll, by any process"""
+        tasks = Task.__table__
+        # Overlap by a poll interval for commits that landed out of order
+        since = self.changed_since - timedelta(seconds=self.poll)
+        self.changed_since = now
+        return {task_id for (task_id,) in db.session.execute(
+            select(tasks.c.id).where(tasks.c.updated_at >= since)
+        )}
+
+    def run_once(self):
+        """Renew the lease, bring the heap up to date and send what is due
+
+        Returns the reminders sent ({user_id: items}), or None when another
+        worker owns the schedule.
+        """
+        now = self.clock()
+        held = SchedulerLease.acquire(REMINDER_LEASE, self.holder, self.lease_seconds, now)
+        db.session.commit()
+        if not held:
+            if self.leader:
+                self.app.logger.info("Task reminder lease lost; another worker owns the schedule")
+            self.leader = False
+            self._reset()
+            return None
+
+        if not self.leader:
+            # New owner: rebuild from the tasks and the sent reminders
+            self.leader = True
+            self._reset()
+            self._take_dirty()
+            self.changed_since = now
+            self.load_window(now, now + self.horizon, now)
+        else:
+            self.refresh(self._take_dirty() | self.changed_tasks(now), now)
+            end = now + self.horizon
+            if end > self.loaded_until:
+                self.load_window(self.loaded_until, end, now)
+        entries = self.pop_due(now)
+        return deliver_reminders(entries, now) if entries else {}
+
+    def release(self):
+        if self.leader:
+            SchedulerLease.release(REMINDER_LEASE, self.holder)
+            db.session.commit()
+            self.leader = False
+            self._reset()
+
+    def run(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Task reminders failed: {e}")
+                finally:
+                    db.session.remove()
+            wait = self.poll
+            next_fire = self.next_fire() if self.leader else None
+            if next_fire is not None:
+                wait = min(wait, max((next_fire - self.clock()).total_seconds(), 0))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+def deliver_reminders(entries, now):
+    """Record and send reminders for (task_id, due_date, lead) entries
+
+    Tasks are re-read first: reminders for tasks that were finished,
+    deleted, rescheduled or left without open assignees since they were
+    armed are dropped. Each assignee gets one message for all of their
+    reminders. Returns {user_id: items} as sent.
+    """
+    tasks = Task.__table__
+    reminders = TaskReminder.__table__
+    task_ids = [entry[0] for entry in entries]
+    rows = {row.id: row for row in db.session.execute(
+        select(tasks.c.id, tasks.c.title, tasks.c.event_id, tasks.c.due_date, tasks.c.status)
+        .where(tasks.c.id.in_(task_ids))
+    )}
+    assignees = {}
+    for task_id, assignee_id in db.session.execute(
+        select(TaskAssignment.task_id, TaskAssignment.assignee_id)
+        .where(TaskAssignment.task_id.in_(task_ids), TaskAssignment.completed_at.is_(None))
+    ):
+        assignees.setdefault(task_id, set()).add(assignee_id)
+    sent = {(row.task_id, row.due_date, row.lead_minutes) for row in db.session.execute(
+        select(reminders.c.task_id, reminders.c.due_date, reminders.c.lead_minutes)
+        .where(reminders.c.task_id.in_(task_ids))
+    )}
+
+    markers, items = [], {}
+    for task_id, due_date, lead in entries:
+        row = rows.get(task_id)
+        if (row is None or row.due_date != due_date or due_date <= now
+                or row.status not in OPEN_STATUSES
+                or not assignees.get(task_id) or (task_id, due_date, lead) in sent):
+            continue
+        markers.append({'task_id': task_id, 'due_date': due_date, 'lead_minutes': lead, 'sent_at': now})
+        item = {
+            'task_id': task_id,
+            'title': row.title,
+            'event_id': row.event_id,
+            'due_date': due_date.isoformat(),
+            'minutes_left': int((due_date - now).total_seconds() // 60)
+        }
+        for user_id in assignees[task_id]:
+            items.setdefault(user_id, []).append(item)
+
+    if not markers:
+        return {}
+    db.session.execute(insert_ignore(TaskReminder.__table__, markers))
+    db.session.commit()
+    for user_id, user_items in items.items():
+        notify_user(user_id, 'task_reminders', {'items': user_items})
+    return items
+
+def reminders_changed_on_commit(task_ids):
+    """Have the scheduler re-read these tasks once the transaction commits"""
+    db.session.info.setdefault(_DIRTY_KEY, set()).update(task_ids)
+
+@sa_event.listens_for(Task, 'after_insert')
+@sa_event.listens_for(Task, 'after_delete')
+def _task_added_or_removed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_DIRTY_KEY, set()).add(target.id)
+
+@sa_event.listens_for(Task, 'after_update')
+def _task_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ('due_date', 'status')):
+        return
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_DIRTY_KEY, set()).add(target.id)
+
+@sa_event.listens_for(Session, 'after_commit')
+def _apply_dirty(session):
+    task_ids = session.info.pop(_DIRTY_KEY, None)
+    if task_ids and has_app_context():
+        scheduler = current_app.extensions.get('task_reminders')
+        if scheduler is not None:
+            scheduler.mark_dirty(task_ids)
+
+@sa_event.listens_for(Session, 'after_soft_rollback')
+def _discard_dirty(session, previous_transaction):
+    session.info.pop(_DIRTY_KEY, None)
+
+def start_reminder_scheduler(app):
+    """Start the daemon thread that competes for and runs the reminder schedule"""
+    if not app.config.get('TASK_REMINDER_POLL_INTERVAL', 30):
+        return None
+    scheduler = ReminderScheduler(app)
+    app.extensions['task_reminders'] = scheduler
+    thread = threading.Thread(target=scheduler.run, name='task-reminders', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,348 @@
+from flask import abort, current_app
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+from .. import db
+from ..models.event import Event, EventStatus, EventGuest
+from ..models.guest_counter import EventGuestCounter
+from ..models.participant import EventParticipant, ParticipantRole
+from ..models.reservation import EventCapacity, WaitlistEntry
+from ..utils.db import insert_ignore
+from . import event_cache, notification_service
+
+# Capacity-limited RSVPs.
+#
+# Accepting takes a seat with one conditional UPDATE on the event's
+# event_capacity row (``reserved = reserved + 1 WHERE reserved <
+# capacity``). The database applies concurrent UPDATEs of the row one after
+# the other and re-checks the condition for each, so an event can't be
+# oversold and nothing is read and written back in Python. Guests who find
+# the event full join its waitlist; seats freed by declines or a higher
+# max_attendees are handed to the waitlist in priority, then arrival,
+# order in the same transaction that frees them. If every waiting guest is
+# locked by another transaction at that point, the event is promoted again
+# after the commit, this time waiting for the locks. The ledger row is created
+# on the first RSVP from the accepted counter, and reconcile_reserved
+# realigns it with the guest list after writes that bypass this module
+# (guest imports, manual edits).
+
+RSVP_RESPONSES = ('accepted', 'declined')
+
+_DEFERRED_KEY = 'waitlist_promotions_deferred'
+
+def _accepted_count(event_id):
+    return EventGuestCounter.counts_for([event_id]).get(event_id, {}).get('accepted', 0)
+
+def ensure_capacity(event):
+    """Create the event's seat ledger if it has a limit; False if unlimited"""
+    if event.max_attendees is None:
+        return False
+    db.session.execute(insert_ignore(EventCapacity.__table__, {
+        'event_id': event.id,
+        'capacity': event.max_attendees,
+        'reserved': _accepted_count(event.id)
+    }))
+    return True
+
+def take_seat(event_id):
+    """Atomically reserve one seat; False when the event is full"""
+    table = EventCapacity.__table__
+    result = db.session.execute(
+        table.update()
+        .where(table.c.event_id == event_id, table.c.reserved < table.c.capacity)
+        .values(reserved=table.c.reserved + 1)
+    )
+    return result.rowcount == 1
+
+def release_seat(event_id):
+    table = EventCapacity.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.event_id == event_id, table.c.reserved > 0)
+        .values(reserved=table.c.reserved - 1)
+    )
+
+def _waitlist_order():
+    return WaitlistEntry.priority.desc(), WaitlistEntry.id
+
+def promote_waitlisted(event_id, wait=False):
+    """Give free seats to waiting guests, best first (no commit)
+
+    Entries and their guests are locked with SKIP LOCKED, so concurrent
+    promotions hand out different guests and a guest who is answering
+    right now is passed over rather than waited on. When seats are left
+    only because every waiting guest was skipped, the event is deferred to
+    ``promote_deferred``, which runs with ``wait`` set and blocks on the
+    locks instead; the caller holds the ledger row until it commits, so
+    waiting here could deadlock with the answering guest. Returns the
+    promoted guests.
+    """
+    promoted = []
+    while True:
+        table = EventCapacity.__table__
+        free = db.session.execute(
+            db.select([table.c.capacity - table.c.reserved]).where(table.c.event_id == event_id)
+        ).scalar() or 0
+        if free <= 0:
+            break
+        entries = WaitlistEntry.query.filter_by(event_id=event_id).options(
+            db.joinedload(WaitlistEntry.guest, innerjoin=True)
+        ).order_by(*_waitlist_order()).limit(free).with_for_update(skip_locked=not wait).all()
+        if not entries:
+            if not wait and WaitlistEntry.query.filter_by(event_id=event_id).first() is not None:
+                db.session.info.setdefault(_DEFERRED_KEY, set()).add(event_id)
+            break
+
+        for entry in entries:
+            if not take_seat(event_id):
+                return promoted
+            entry.guest.rsvp_status = 'accepted'
+            db.session.delete(entry)
+            promoted.append(entry.guest)
+        db.session.flush()
+    return promoted
+
+def promote_deferred():
+    """Retry the promotions deferred by the last commit and notify the guests
+
+    Each event is promoted in its own transaction. Returns the number of
+    promoted guests.
+    """
+    event_ids = db.session.info.pop(_DEFERRED_KEY, None) or ()
+    total = 0
+    for event_id in sorted(event_ids):
+        try:
+            promoted = promote_waitlisted(event_id, wait=True)
+            if promoted:
+                event_cache.invalidate_on_commit([event_cache.event_tag(event_id)])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception(f"Waitlist promotion for event {event_id} failed")
+            continue
+        notify_promoted(event_id, promoted)
+        total += len(promoted)
+    return total
+
+@sa_event.listens_for(Session, 'after_soft_rollback')
+def _discard_deferred(session, previous_transaction):
+    session.info.pop(_DEFERRED_KEY, None)
+
+def waitlist_position(entry):
+    """1-based place of an entry in its event's waitlist (one indexed count)"""
+    ahead = WaitlistEntry.query.filter(
+        WaitlistEntry.event_id == entry.event_id,
+        db.or_(
+            WaitlistEntry.priority > entry.priority,
+            db.and_(WaitlistEntry.priority == entry.priority, WaitlistEntry.id < entry.id)
+        )
+    ).count()
+    return ahead + 1
+
+def notify_promoted(event_id, guests):
+    """Tell promoted guests (after commit) that they have a seat"""
+    if not guests:
+        return
+    guest_ids = [guest.id for guest in guests]
+    notification_service.notify_event(event_id, 'waitlist_promoted', {
+        'event_id': event_id, 'guest_ids': guest_ids
+    })
+    users = EventParticipant.query.with_entities(
+        EventParticipant.user_id, EventParticipant.source_id
+    ).filter(
+        EventParticipant.role == ParticipantRole.GUEST,
+        EventParticipant.source_id.in_(guest_ids)
+    )
+    for user_id, guest_id in users:
+        notification_service.notify_user(user_id, 'rsvp_confirmed', {
+            'event_id': event_id, 'guest_id': guest_id
+        })
+
+def _guest_for(event, user, guest_id):
+    """The guest row the RSVP is for, creating the user's own if needed
+
+    Returns (guest, error response).
+    """
+    from .event_service import is_authorized_for_event
+    if guest_id is not None:
+        if event.organizer_id != user.id and user.role != 'admin':
+            return None, ({"error": "Not authorized to respond for other guests"}, 403)
+        query = EventGuest.query.filter_by(id=guest_id, event_id=event.id)
+        return query.with_for_update().first_or_404(), None
+
+    guest = EventGuest.query.filter(
+        EventGuest.event_id == event.id,
+        db.func.lower(EventGuest.email) == (user.email or '').lower()
+    ).with_for_update().first()
+    if guest is not None:
+        return guest, None
+    if not is_authorized_for_event(event, user):
+        return None, ({"error": "Not authorized to RSVP to this event"}, 403)
+    guest = EventGuest(
+        event_id=event.id,
+        email=user.email.lower(),
+        first_name=user.first_name or '',
+        last_name=user.last_name or '',
+        rsvp_status='pending'
+    )
+    db.session.add(guest)
+    db.session.flush()
+    return guest, None
+
+def respond(event_id, user, status, guest_id=None, priority=None):
+    """Accept or decline an invitation, joining the waitlist when full
+
+    Users respond for themselves (their guest row is found by email and
+    created for events they can see); organizers may pass ``guest_id`` and
+    a waitlist ``priority``.
+    """
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if status not in RSVP_RESPONSES:
+        return {"error": "Status must be 'accepted' or 'declined'"}, 400
+    if event.status != EventStatus.PUBLISHED:
+        return {"error": "Event is not open for RSVPs"}, 400
+
+    if guest_id is None:
+        # Only organizers can move guests up the waitlist
+        priority = None
+
+    try:
+        guest, error = _guest_for(event, user, guest_id)
+        if error:
+            db.session.rollback()
+            return error
+        entry = WaitlistEntry.query.filter_by(guest_id=guest.id).first()
+        previous = guest.rsvp_status
+        limited = ensure_capacity(event)
+        promoted = []
+
+        if status == 'accepted' and previous != 'accepted':
+            if not limited or take_seat(event.id):
+                guest.rsvp_status = 'accepted'
+                if entry is not None:
+                    db.session.delete(entry)
+                    entry = None
+            else:
+                guest.rsvp_status = 'waitlisted'
+                if entry is None:
+                    entry = WaitlistEntry(event_id=event.id, guest_id=guest.id, priority=priority or 0)
+                    db.session.add(entry)
+                elif priority is not None:
+                    entry.priority = priority
+        elif status == 'declined':
+            guest.rsvp_status = 'declined'
+            if entry is not None:
+                db.session.delete(entry)
+                entry = None
+            if previous == 'accepted' and limited:
+                release_seat(event.id)
+                db.session.flush()
+                promoted = promote_waitlisted(event.id)
+
+        db.session.flush()
+        result = {
+            'event_id': event.id,
+            'guest_id': guest.id,
+            'rsvp_status': guest.rsvp_status,
+            'waitlist_position': waitlist_position(entry) if entry is not None else None
+        }
+        event_cache.invalidate_on_commit([event_cache.event_tag(event.id), event_cache.user_tag(user.id)])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    notify_promoted(event.id, promoted)
+    promote_deferred()
+    return result
+
+def capacity_changed(event):
+    """Apply a new max_attendees to the ledger and fill any freed seats (no commit)
+
+    Returns the promoted guests.
+    """
+    table = EventCapacity.__table__
+    if event.max_attendees is None:
+        db.session.execute(table.delete().where(table.c.event_id == event.id))
+        # Unlimited: everyone waiting gets in
+        promoted = [entry.guest for entry in WaitlistEntry.query.filter_by(event_id=event.id)]
+        for guest in promoted:
+            guest.rsvp_status = 'accepted'
+        WaitlistEntry.query.filter_by(event_id=event.id).delete(synchronize_session=False)
+        return promoted
+
+    ensure_capacity(event)
+    db.session.execute(
+        table.update().where(table.c.event_id == event.id).values(capacity=event.max_attendees)
+    )
+    return promote_waitlisted(event.id)
+
+def lock_ledgers(event_ids):
+    """Lock seat ledgers before guest counters, the order RSVPs take them in"""
+    table = EventCapacity.__table__
+    db.session.execute(
+        db.select([table.c.event_id]).where(table.c.event_id.in_(list(event_ids))).with_for_update()
+    ).all()
+
+def adjust_reserved(event_id, accepted):
+    """Add guests accepted outside ``respond`` (e.g. imports) to the ledger"""
+    if not accepted:
+        return
+    table = EventCapacity.__table__
+    db.session.execute(
+        table.update().where(table.c.event_id == event_id).values(reserved=table.c.reserved + accepted)
+    )
+
+def drop_stale_entries(event_ids):
+    """Remove waitlist entries of guests whose RSVP was changed elsewhere"""
+    guests = EventGuest.__table__
+    table = WaitlistEntry.__table__
+    db.session.execute(table.delete().where(
+        table.c.event_id.in_(list(event_ids)),
+        table.c.guest_id.in_(
+            db.select([guests.c.id]).where(guests.c.event_id.in_(list(event_ids)))
+            .where(guests.c.rsvp_status != 'waitlisted')
+        )
+    ))
+
+def reconcile_reserved(event_ids):
+    """Realign ledgers with the accepted counters and fill freed seats (no commit)
+
+    Returns {event_id: promoted guests}.
+    """
+    event_ids = list(event_ids)
+    drop_stale_entries(event_ids)
+    table = EventCapacity.__table__
+    counters = EventGuestCounter.__table__
+    accepted = db.select([db.func.coalesce(db.func.sum(counters.c.accepted), 0)]) \
+        .where(counters.c.event_id == table.c.event_id).scalar_subquery()
+    db.session.execute(
+        table.update().where(table.c.event_id.in_(event_ids)).values(reserved=accepted)
+    )
+    waiting = db.session.query(table.c.event_id).filter(
+        table.c.event_id.in_(event_ids),
+        table.c.reserved < table.c.capacity,
+        db.exists().where(WaitlistEntry.event_id == table.c.event_id)
+    )
+    return {event_id: promote_waitlisted(event_id) for (event_id,) in waiting.all()}
+
+def get_waitlist(event_id, user):
+    """The event's waitlist in promotion order (organizers and admins)"""
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to view this waitlist"}, 403
+
+    ledger = db.session.get(EventCapacity, event_id)
+    entries = WaitlistEntry.query.filter_by(event_id=event_id).options(
+        db.joinedload(WaitlistEntry.guest)
+    ).order_by(*_waitlist_order()).all()
+    return {
+        'capacity': ledger.to_dict() if ledger else None,
+        'waitlist': [
+            dict(entry.to_dict(position), guest=entry.guest.to_dict())
+            for position, entry in enumerate(entries, start=1)
+        ]
+    }
@@ -0,0 +1,138 @@
+from sqlalchemy import bindparam, text
+from .. import db
+from ..models.event import SEARCH_FTS_TABLE, SEARCH_INDEX_DDL
+from ..utils.db import dialect_name
+
+# Dialect-specific full-text index for events.
+#
+# PostgreSQL keeps a weighted tsvector column on the events table behind a
+# GIN index; SQLite keeps an FTS5 shadow table keyed by event id. Both are
+# written from the event service on create/update/delete and queried through
+# search_subquery(), which yields (event_id, rank) rows with higher ranks
+# being better matches. Other backends fall back to ILIKE filtering.
+#
+# The column, table and index are declared with the events table in
+# models/event.py and created with it. Databases whose events table
+# predates them get them from `flask rebuild-search-index`, which also
+# backfills; request paths assume they exist and never run DDL.
+
+SQLITE_FTS_TABLE = SEARCH_FTS_TABLE
+
+_POSTGRES_UPDATE = text(
+    "UPDATE events SET search_vector = "
+    "setweight(to_tsvector('english', coalesce(:title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(:description, '')), 'B') "
+    "WHERE id = :id"
+)
+
+_POSTGRES_BACKFILL = text(
+    "UPDATE events SET search_vector = "
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+def is_supported():
+    """Whether the current database has a full-text backend"""
+    return dialect_name() in ('postgresql', 'sqlite')
+
+def create_search_index():
+    """Create the search column/table and index if they don't exist yet"""
+    for statement in SEARCH_INDEX_DDL.get(dialect_name(), []):
+        db.session.execute(text(statement))
+
+def index_event(event):
+    """Write an event's title and description into the search index.
+
+    The event must already have an id (i.e. the session has been flushed).
+    """
+    dialect = dialect_name()
+    if dialect not in ('postgresql', 'sqlite'):
+        return
+
+    params = {'id': event.id, 'title': event.title, 'description': event.description}
+    if dialect == 'postgresql':
+        db.session.execute(_POSTGRES_UPDATE, params)
+    else:
+        db.session.execute(text(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = :id"), params)
+        db.session.execute(
+            text(f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, title, description) "
+                 "VALUES (:id, :title, :description)"),
+            params
+        )
+
+def index_events(event_ids):
+    """Index many events with one set-based statement (used by bulk writes)"""
+    dialect = dialect_name()
+    if not event_ids or dialect not in ('postgresql', 'sqlite'):
+        return
+
+    ids = list(event_ids)
+    if dialect == 'postgresql':
+        db.session.execute(
+            text(_POSTGRES_BACKFILL.text + " WHERE id = ANY(:ids)"), {'ids': ids}
+        )
+    else:
+        statement = text(
+            f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, title, description) "
+            "SELECT id, coalesce(title, ''), coalesce(description, '') FROM events "
+            "WHERE id IN :ids"
+        ).bindparams(bindparam('ids', expanding=True))
+        db.session.execute(statement, {'ids': ids})
+
+def remove_event(event_id):
+    """Drop an event from the search index"""
+    remove_events([event_id])
+
+def remove_events(event_ids):
+    """Drop many events from the search index with one statement"""
+    # On PostgreSQL the vector lives on the row itself and goes with it
+    if not event_ids or dialect_name() != 'sqlite':
+        return
+    statement = text(
+        f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid IN :ids"
+    ).bindparams(bindparam('ids', expanding=True))
+    db.session.execute(statement, {'ids': list(event_ids)})
+
+def rebuild_search_index():
+    """Create the index if needed and re-index every event (CLI only: runs DDL)"""
+    dialect = dialect_name()
+    create_search_index()
+
+    if dialect == 'postgresql':
+        db.session.execute(_POSTGRES_BACKFILL)
+    elif dialect == 'sqlite':
+        db.session.execute(text(f"DELETE FROM {SQLITE_FTS_TABLE}"))
+        db.session.execute(text(
+            f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, title, description) "
+            "SELECT id, coalesce(title, ''), coalesce(description, '') FROM events"
+        ))
+    db.session.commit()
+
+def _fts5_query(term):
+    """Turn free text into an FTS5 query of quoted prefix terms"""
+    tokens = [t.replace('"', '""') for t in term.split()]
+    return ' '.join(f'"{t}"*' for t in tokens if t)
+
+def search_subquery(term):
+    """Get a subquery of (event_id, rank) rows matching a search term.
+
+    Returns None when the database has no full-text backend, in which case
+    callers should fall back to ILIKE filtering.
+    """
+    dialect = dialect_name()
+    if dialect == 'postgresql':
+        statement = text(
+            "SELECT id AS event_id, "
+            "ts_rank(search_vector, websearch_to_tsquery('english', :q)) AS rank "
+            "FROM events WHERE search_vector @@ websearch_to_tsquery('english', :q)"
+        ).bindparams(q=term)
+    elif dialect == 'sqlite':
+        # bm25() is lower-is-better, so negate it; titles weigh more than descriptions
+        statement = text(
+            f"SELECT rowid AS event_id, -bm25({SQLITE_FTS_TABLE}, 10.0, 1.0) AS rank "
+            f"FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :q"
+        ).bindparams(q=_fts5_query(term))
+    else:
+        return None
+
+    return statement.columns(event_id=db.Integer, rank=db.Float).subquery('event_search')
@@ -0,0 +1,241 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import abort, current_app
+from sqlalchemy import event as sa_event, select
+from .. import db
+from ..models.event import Event, EventStatus, EventStaff
+from ..models.user import User
+from ..utils.db import dialect_name
+from ..utils.interval_tree import IntervalTree, overlapping_pairs
+from . import event_cache, recurrence_service
+from .recurrence_service import InvalidRecurrence
+
+# Staff double-booking.
+#
+# A staff member's bookings are the occurrences of the non-cancelled events
+# they are assigned to (series are expanded inside the window, honouring
+# edited and cancelled occurrences). Reports sort each member's bookings
+# once and sweep them with a heap of active end times, so a member, an
+# event's crew or a whole date range is checked in O(n log n + conflicts).
+# New assignments are checked in a before_insert listener against an
+# IntervalTree of the member's other bookings; an overlap raises
+# StaffConflict unless the row has ``allow_conflicts`` set. The listener
+# first locks the member (their user row FOR UPDATE, or SQLite's write lock
+# through a no-op UPDATE), so two concurrent assignments of the same person
+# can't both pass the check.
+
+Slot = namedtuple('Slot', 'staff_id event_id title start end recurrence_id')
+
+class StaffConflict(Exception):
+    """Raised when a staff assignment overlaps the member's other bookings"""
+
+    def __init__(self, staff_id, conflicts):
+        self.staff_id = staff_id
+        self.conflicts = conflicts
+        super().__init__(f"Staff member {staff_id} is already booked at overlapping times")
+
+def _horizon():
+    days = current_app.config.get('STAFF_CONFLICT_HORIZON_DAYS', 180)
+    return datetime.utcnow() + timedelta(days=days)
+
+def _max_occurrences():
+    return current_app.config.get('STAFF_CONFLICT_MAX_OCCURRENCES', 1000)
+
+def load_slots(connection, window_start, window_end, staff_ids=None, event_ids=None):
+    """Bookings overlapping the window, grouped as {staff_id: [Slot]}
+
+    ``staff_ids`` limits the members; ``event_ids`` limits the members to
+    those assigned to these events (their other bookings are included).
+    """
+    staff, events = EventStaff.__table__, Event.__table__
+    query = select(
+        staff.c.staff_id, events.c.id, events.c.title, events.c.start_time, events.c.end_time,
+        events.c.recurrence_rule
+    ).select_from(staff.join(events, events.c.id == staff.c.event_id)).where(
+        events.c.status != EventStatus.CANCELLED,
+        recurrence_service.overlap_filter(events, window_start, window_end)
+    ).distinct()
+    if staff_ids is not None:
+        query = query.where(staff.c.staff_id.in_(list(staff_ids)))
+    if event_ids is not None:
+        query = query.where(staff.c.staff_id.in_(
+            select(staff.c.staff_id).where(staff.c.event_id.in_(list(event_ids)))
+        ))
+
+    rows = connection.execute(query).all()
+    slots = {}
+    occurrences = recurrence_service.occurrences_in_window(
+        connection, rows, window_start, window_end, _max_occurrences()
+    )
+    for row, start, end, recurrence_id in occurrences:
+        slots.setdefault(row.staff_id, []).append(
+            Slot(row.staff_id, row.id, row.title, start, end, recurrence_id)
+        )
+    return slots
+
+def _slot_dict(slot):
+    return {
+        'event_id': slot.event_id,
+        'title': slot.title,
+        'start_time': slot.start.isoformat(),
+        'end_time': slot.end.isoformat(),
+        'recurrence_id': slot.recurrence_id
+    }
+
+def _conflict(first, second):
+    return {
+        'staff_id': first.staff_id,
+        'first': _slot_dict(first),
+        'second': _slot_dict(second),
+        'overlap_start': max(first.start, second.start).isoformat(),
+        'overlap_end': min(first.end, second.end).isoformat()
+    }
+
+def find_conflicts(slots, event_ids=None):
+    """Sweep each member's bookings; ``event_ids`` keeps conflicts involving them"""
+    conflicts = []
+    for member_slots in slots.values():
+        for first, second in overlapping_pairs((slot.start, slot.end, slot) for slot in member_slots):
+            if first.event_id == second.event_id:
+                continue
+            if event_ids is not None and first.event_id not in event_ids and second.event_id not in event_ids:
+                continue
+            conflicts.append(_conflict(first, second))
+    conflicts.sort(key=lambda conflict: (conflict['overlap_start'], conflict['staff_id']))
+    return conflicts
+
+def assignment_conflicts(connection, staff_id, event_id):
+    """Conflicts a new assignment of ``staff_id`` to ``event_id`` would create"""
+    events = Event.__table__
+    event = connection.execute(
+        select(events.c.id, events.c.title, events.c.start_time, events.c.end_time,
+               events.c.recurrence_rule, events.c.recurrence_end, events.c.status)
+        .where(events.c.id == event_id)
+    ).first()
+    if event is None or event.status == EventStatus.CANCELLED:
+        return []
+
+    window_start = event.start_time
+    window_end = event.end_time
+    if event.recurrence_rule:
+        window_start = max(event.start_time, datetime.utcnow())
+        window_end = event.recurrence_end or _horizon()
+        if window_end <= window_start:
+            return []
+
+    tree = IntervalTree()
+    for slot in load_slots(connection, window_start, window_end, staff_ids=[staff_id]).get(staff_id, []):
+        if slot.event_id != event_id:
+            tree.add(slot.start, slot.end, slot)
+
+    conflicts = []
+    occurrences = recurrence_service.occurrences_in_window(
+        connection, [event], window_start, window_end, _max_occurrences()
+    )
+    for row, start, end, recurrence_id in occurrences:
+        new = Slot(staff_id, row.id, row.title, start, end, recurrence_id)
+        for existing in tree.overlapping(start, end):
+            conflicts.append(_conflict(new, existing))
+    return conflicts
+
+def lock_staff_member(connection, staff_id):
+    """Hold the member's user row until the transaction ends, serializing their assignments"""
+    users = User.__table__
+    if dialect_name(connection) == 'sqlite':
+        # SQLite has no row locks; any write takes the database write lock
+        connection.execute(users.update().where(db.false()).values(id=users.c.id))
+    else:
+        connection.execute(select(users.c.id).where(users.c.id == staff_id).with_for_update())
+
+@sa_event.listens_for(EventStaff, 'before_insert')
+def _check_new_assignment(mapper, connection, target):
+    if target.allow_conflicts:
+        return
+    lock_staff_member(connection, target.staff_id)
+    conflicts = assignment_conflicts(connection, target.staff_id, target.event_id)
+    if conflicts:
+        raise StaffConflict(target.staff_id, conflicts)
+
+def _window(start, end):
+    window_start = recurrence_service.parse_bound(start) or datetime.utcnow()
+    window_end = recurrence_service.parse_bound(end) or _horizon()
+    if window_end <= window_start:
+        raise InvalidRecurrence("end_date must be after start_date")
+    return window_start, window_end
+
+def _can_view_all(user):
+    return user.role in ('admin', 'organizer')
+
+def get_staff_conflicts(user, staff_id=None, start=None, end=None):
+    """Conflicts of one staff member, or of everyone, inside a date window
+
+    Without bounds the window runs from now to STAFF_CONFLICT_HORIZON_DAYS
+    ahead. Staff may only check themselves.
+    """
+    if staff_id is None and not _can_view_all(user):
+        return {"error": "Not authorized to view all staff conflicts"}, 403
+    if staff_id is not None and staff_id != user.id and not _can_view_all(user):
+        return {"error": "Not authorized to view this staff member's conflicts"}, 403
+    try:
+        window_start, window_end = _window(start, end)
+    except InvalidRecurrence as e:
+        return {"error": str(e)}, 400
+
+    slots = load_slots(db.session.connection(), window_start, window_end,
+                       staff_ids=None if staff_id is None else [staff_id])
+    return {
+        'start': window_start.isoformat(),
+        'end': window_end.isoformat(),
+        'conflicts': find_conflicts(slots)
+    }
+
+def get_event_staff_conflicts(event_id, user):
+    """Conflicts between an event's crew and their other bookings"""
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to view this event's staffing"}, 403
+
+    window_start, window_end = event.start_time, event.end_time
+    if event.recurrence_rule:
+        window_start = max(event.start_time, datetime.utcnow())
+        window_end = event.recurrence_end or _horizon()
+    if window_end <= window_start:
+        return {'event_id': event_id, 'conflicts': []}
+    slots = load_slots(db.session.connection(), window_start, window_end, event_ids=[event_id])
+    return {'event_id': event_id, 'conflicts': find_conflicts(slots, event_ids={event_id})}
+
+def assign_staff(event_id, data, user):
+    """Assign a staff member to an event, refusing double bookings
+
+    Overlaps are reported with 409 unless ``allow_conflicts`` is set.
+    """
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if event.organizer_id != user.id and user.role != 'admin':
+        return {"error": "Not authorized to staff this event"}, 403
+    if not data.get('staff_id') or not data.get('role'):
+        return {"error": "staff_id and role are required"}, 400
+    if db.session.get(User, data['staff_id']) is None:
+        return {"error": "Staff member not found"}, 404
+
+    assignment = EventStaff(
+        event_id=event_id,
+        staff_id=data['staff_id'],
+        role=data['role'],
+        responsibilities=data.get('responsibilities')
+    )
+    assignment.allow_conflicts = bool(data.get('allow_conflicts'))
+    try:
+        db.session.add(assignment)
+        event_cache.invalidate_on_commit([event_cache.event_tag(event_id), event_cache.user_tag(assignment.staff_id)])
+        db.session.commit()
+    except StaffConflict as e:
+        db.session.rollback()
+        return {"error": str(e), "conflicts": e.conflicts}, 409
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to assign staff: {str(e)}"}, 500
+    return {"message": "Staff assigned successfully", "staff": assignment.to_dict()}, 201
@@ -0,0 +1,361 @@
+from collections import deque
+from datetime import datetime, timedelta
+from flask import abort, current_app
+from sqlalchemy import event as sa_event, select, inspect
+from .. import db
+from ..models.event import Event
+from ..models.task import Task, TaskStatus, TaskDependency
+from . import event_cache
+
+# Task dependency graph and critical path.
+#
+# Edges live in task_dependencies and never cross events. Adding edges locks
+# the event row, reads the event's edges once and walks them in memory, so
+# an edge that would close a cycle is refused before it is written. The
+# critical path is a topological sort (Kahn) followed by a forward pass for
+# earliest start/finish and a backward pass for latest start/finish, both
+# O(V+E). Times are kept as minutes from "now", so a cached schedule stays
+# valid as the clock moves; it is cached per event and invalidated when
+# tasks are added, removed or re-planned (due date, status, estimate) or
+# when edges change.
+
+# Task columns the cached schedule depends on
+SCHEDULE_FIELDS = ('title', 'due_date', 'status', 'estimated_hours', 'event_id')
+
+DONE_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+
+class DependencyCycle(Exception):
+    """Raised when dependency edges would form a cycle"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Dependency would create a cycle: {' -> '.join(str(task_id) for task_id in cycle)}")
+
+def find_path(depends_on, start, target):
+    """Path of task ids from ``start`` to ``target`` following ``depends_on``, or None"""
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == target:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            return path[::-1]
+        for nxt in depends_on.get(node, ()):
+            if nxt not in parents:
+                parents[nxt] = node
+                queue.append(nxt)
+    return None
+
+def schedule(durations, edges):
+    """Earliest/latest start and finish for every task, in minutes from now
+
+    ``durations`` maps task ids to remaining minutes, ``edges`` holds
+    ``(task_id, depends_on_id)`` pairs. Returns ``(times, critical_path,
+    total)`` where ``times`` maps task ids to ``(es, ef, ls, lf)``. Raises
+    DependencyCycle if the edges are not a DAG.
+    """
+    successors = {task_id: [] for task_id in durations}
+    predecessors = {task_id: [] for task_id in durations}
+    indegree = dict.fromkeys(durations, 0)
+    for task_id, depends_on_id in edges:
+        if task_id in durations and depends_on_id in durations:
+            successors[depends_on_id].append(task_id)
+            predecessors[task_id].append(depends_on_id)
+            indegree[task_id] += 1
+
+    queue = deque(sorted(task_id for task_id, degree in indegree.items() if degree == 0))
+    order = []
+    while queue:
+        task_id = queue.popleft()
+        order.append(task_id)
+        for successor in successors[task_id]:
+            indegree[successor] -= 1
+            if indegree[successor] == 0:
+                queue.append(successor)
+    if len(order) < len(durations):
+        remaining = {task_id: predecessors[task_id] for task_id, degree in indegree.items() if degree}
+        start = min(remaining)
+        # Follow predecessors inside the leftover nodes until one repeats
+        seen = []
+        node = start
+        while node not in seen:
+            seen.append(node)
+            node = next(p for p in remaining[node] if p in remaining)
+        raise DependencyCycle(seen[seen.index(node):] + [node])
+
+    earliest = {}
+    for task_id in order:
+        start = max((earliest[p][1] for p in predecessors[task_id]), default=0)
+        earliest[task_id] = (start, start + durations[task_id])
+    total = max((finish for _, finish in earliest.values()), default=0)
+
+    latest = {}
+    for task_id in reversed(order):
+        finish = min((latest[s][0] for s in successors[task_id]), default=total)
+        latest[task_id] = (finish - durations[task_id], finish)
+
+    times = {task_id: earliest[task_id] + latest[task_id] for task_id in order}
+
+    # Walk back from the last task to finish through tasks without slack
+    path = []
+    def tight(task_id):
+        return latest[task_id][0] == earliest[task_id][0]
+
+    node = next((task_id for task_id in reversed(order) if earliest[task_id][1] == total and tight(task_id)), None)
+    while node is not None:
+        path.append(node)
+        node = min((p for p in predecessors[node] if earliest[p][1] == earliest[node][0] and tight(p)),
+                   default=None)
+    return times, path[::-1], total
+
+def _duration_minutes(row, default_hours):
+    if row.status in DONE_STATUSES:
+        return 0
+    hours = row.estimated_hours if row.estimated_hours is not None else default_hours
+    return max(0, round(hours * 60))
+
+def compute_schedule(event_id):
+    """The event's schedule in cacheable form (minutes from now)"""
+    tasks, edges_table = Task.__table__, TaskDependency.__table__
+    rows = db.session.execute(
+        select(tasks.c.id, tasks.c.title, tasks.c.status, tasks.c.due_date, tasks.c.estimated_hours)
+        .where(tasks.c.event_id == event_id)
+    ).all()
+    edges = db.session.execute(
+        select(edges_table.c.task_id, edges_table.c.depends_on_id).where(edges_table.c.event_id == event_id)
+    ).all()
+
+    default_hours = current_app.config.get('TASK_DEFAULT_DURATION_HOURS', 1)
+    durations = {row.id: _duration_minutes(row, default_hours) for row in rows}
+    times, path, total = schedule(durations, edges)
+
+    depends_on = {}
+    for task_id, depends_on_id in edges:
+        depends_on.setdefault(task_id, []).append(depends_on_id)
+    return {
+        'tasks': [{
+            'task_id': row.id,
+            'title': row.title,
+            'status': row.status.value if row.status else None,
+            'due_date': row.due_date.isoformat() if row.due_date else None,
+            'duration_minutes': durations[row.id],
+            'depends_on': sorted(depends_on.get(row.id, [])),
+            'times': list(times[row.id])
+        } for row in sorted(rows, key=lambda row: (times[row.id][0], row.id))],
+        'critical_path': path,
+        'total_minutes': total
+    }
+
+def _cached_schedule(event_id):
+    if not event_cache.is_enabled():
+        return compute_schedule(event_id)
+    cache = event_cache.get_event_cache()
+    key = f'task_schedule:{event_id}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    tags = [event_cache.tasks_tag(event_id)]
+    snapshot = cache.generations(tags)
+    result = compute_schedule(event_id)
+    cache.set(key, result, tags, snapshot=snapshot)
+    return result
+
+def _can_manage(event, user):
+    return user.role in ['admin', 'organizer'] or event.organizer_id == user.id
+
+def get_critical_path(event_id, user):
+    """Critical path, per-task slack and earliest completion for an event's tasks
+
+    Remaining work starts now; completed and cancelled tasks take no time
+    and open tasks take ``estimated_hours`` (TASK_DEFAULT_DURATION_HOURS when
+    unset).
+    """
+    event = db.session.get(Event, event_id)
+    if event is None:
+        abort(404)
+    if not _can_manage(event, user):
+        return {"error": "Not authorized to view this event's task plan"}, 403
+
+    try:
+        result = _cached_schedule(event_id)
+    except DependencyCycle as e:
+        # Only reachable if edges were written around add_dependencies
+        return {"error": str(e), "cycle": e.cycle}, 409
+
+    now = datetime.utcnow().replace(microsecond=0)
+    critical = set(result['critical_path'])
+
+    def at(minutes):
+        return (now + timedelta(minutes=minutes)).isoformat()
+
+    tasks = []
+    for task in result['tasks']:
+        es, ef, ls, lf = task['times']
+        due_date = datetime.fromisoformat(task['due_date']) if task['due_date'] else None
+        tasks.append({
+            'task_id': task['task_id'],
+            'title': task['title'],
+            'status': task['status'],
+            'due_date': task['due_date'],
+            'duration_hours': task['duration_minutes'] / 60,
+            'depends_on': task['depends_on'],
+            'earliest_start': at(es),
+            'earliest_finish': at(ef),
+            'latest_start': at(ls),
+            'latest_finish': at(lf),
+            'slack_hours': (ls - es) / 60,
+            'critical': task['task_id'] in critical,
+            'late': bool(task['duration_minutes'] and due_date and now + timedelta(minutes=ef) > due_date)
+        })
+    return {
+        'event_id': event_id,
+        'critical_path': result['critical_path'],
+        'duration_hours': result['total_minutes'] / 60,
+        'earliest_completion': at(result['total_minutes']),
+        'tasks': tasks
+    }
+
+def _task_for_edit(task_id, user):
+    task = db.session.get(Task, task_id)
+    if task is None:
+        abort(404)
+    if user.role not in ['admin', 'organizer'] and task.created_by != user.id:
+        return task, ({"error": "Not authorized to update this task"}, 403)
+    return task, None
+
+def _edges_of(event_id):
+    table = TaskDependency.__table__
+    depends_on = {}
+    for task_id, depends_on_id in db.session.execute(
+        select(table.c.task_id, table.c.depends_on_id).where(table.c.event_id == event_id)
+    ):
+        depends_on.setdefault(task_id, set()).add(depends_on_id)
+    return depends_on
+
+def get_dependencies(task_id, user):
+    """Tasks this task waits for and tasks waiting for it"""
+    task = db.session.get(Task, task_id)
+    if task is None:
+        abort(404)
+    if user.role not in ['admin', 'organizer'] and task.created_by != user.id and not any(
+        a.assignee_id == user.id for a in task.assignments
+    ):
+        return {"error": "Not authorized to view this task"}, 403
+    table = TaskDependency.__table__
+    depends_on = db.session.execute(select(table.c.depends_on_id).where(table.c.task_id == task_id)).scalars()
+    dependents = db.session.execute(select(table.c.task_id).where(table.c.depends_on_id == task_id)).scalars()
+    return {'task_id': task_id, 'depends_on': sorted(depends_on), 'dependents': sorted(dependents)}
+
+def add_dependencies(task_id, data, user):
+    """Make a task wait for other tasks of the same event
+
+    Edges that would close a cycle are refused with 409 and the cycle.
+    Existing edges are left as they are.
+    """
+    task, error = _task_for_edit(task_id, user)
+    if error:
+        return error
+    depends_on_ids = data.get('depends_on_ids')
+    if not isinstance(depends_on_ids, list) or not depends_on_ids or \
+            not all(isinstance(i, int) and not isinstance(i, bool) for i in depends_on_ids):
+        return {"error": "depends_on_ids must be a non-empty list of task IDs"}, 400
+    depends_on_ids = list(dict.fromkeys(depends_on_ids))
+    if task_id in depends_on_ids:
+        return {"error": "A task cannot depend on itself", "cycle": [task_id, task_id]}, 409
+
+    try:
+        # Serializes graph edits per event, so two requests cannot each add
+        # half of a cycle
+        db.session.execute(select(Event.id).where(Event.id == task.event_id).with_for_update())
+        found = dict(db.session.execute(
+            select(Task.id, Task.event_id).where(Task.id.in_(depends_on_ids))
+        ).all())
+        missing = [i for i in depends_on_ids if i not in found]
+        if missing:
+            db.session.rollback()
+            return {"error": "Tasks not found", "task_ids": missing}, 404
+        foreign = [i for i in depends_on_ids if found[i] != task.event_id]
+        if foreign:
+            db.session.rollback()
+            return {"error": "Dependencies must belong to the same event", "task_ids": foreign}, 400
+
+        graph = _edges_of(task.event_id)
+        existing = graph.get(task_id, set())
+        new_ids = [i for i in depends_on_ids if i not in existing]
+        for depends_on_id in new_ids:
+            # The edge closes a cycle if this task is already upstream of it
+            path = find_path(graph, depends_on_id, task_id)
+            if path is not None:
+                raise DependencyCycle([task_id] + path)
+            graph.setdefault(task_id, set()).add(depends_on_id)
+
+        if new_ids:
+            db.session.execute(TaskDependency.__table__.insert(), [
+                {'task_id': task_id, 'depends_on_id': i, 'event_id': task.event_id, 'created_at': datetime.utcnow()}
+                for i in new_ids
+            ])
+            event_cache.invalidate_on_commit([event_cache.tasks_tag(task.event_id)])
+        db.session.commit()
+    except DependencyCycle as e:
+        db.session.rollback()
+        return {"error": str(e), "cycle": e.cycle}, 409
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to add dependencies: {str(e)}"}, 500
+
+    return {
+        "message": "Dependencies added",
+        "task_id": task_id,
+        "added": new_ids,
+        "depends_on": sorted(graph.get(task_id, ()))
+    }, 201
+
+def remove_dependency(task_id, depends_on_id, user):
+    """Drop one dependency edge"""
+    task, error = _task_for_edit(task_id, user)
+    if error:
+        return error
+    table = TaskDependency.__table__
+    try:
+        removed = db.session.execute(table.delete().where(
+            table.c.task_id == task_id, table.c.depends_on_id == depends_on_id
+        )).rowcount
+        event_cache.invalidate_on_commit([event_cache.tasks_tag(task.event_id)])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to remove dependency: {str(e)}"}, 500
+    if not removed:
+        abort(404)
+    return {"message": "Dependency removed"}
+
+def _load_previous(target, value, oldvalue, initiator):
+    return value
+
+# Load the previous event on an expired instance, so after_update can
+# invalidate the schedule the task is leaving
+sa_event.listen(Task.event_id, 'set', _load_previous, active_history=True, retval=True)
+
+@sa_event.listens_for(Task, 'after_insert')
+@sa_event.listens_for(Task, 'after_delete')
+def _task_added_or_removed(mapper, connection, target):
+    event_cache.invalidate_on_commit([event_cache.tasks_tag(target.event_id)])
+
+@sa_event.listens_for(Task, 'after_update')
+def _task_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in SCHEDULE_FIELDS):
+        return
+    event_ids = {target.event_id}
+    moved_from = [event_id for event_id in state.attrs.event_id.history.deleted or () if event_id is not None]
+    if moved_from:
+        # Edges never cross events, so a moved task leaves its edges behind
+        edges = TaskDependency.__table__
+        connection.execute(edges.delete().where(db.or_(
+            edges.c.task_id == target.id, edges.c.depends_on_id == target.id
+        )))
+        event_ids.update(moved_from)
+    event_cache.invalidate_on_commit([event_cache.tasks_tag(event_id) for event_id in event_ids])
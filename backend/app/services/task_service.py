@@ -0,0 +1,275 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import bindparam, case, select
+from sqlalchemy.orm import selectinload
+from .. import db
+from ..models.task import Task, TaskStatus, TaskPriority, TaskAssignment
+from ..models.user import User
+from . import event_cache, reminder_service
+
+# Task serialization and bulk changes.
+#
+# A page of tasks is serialized with a fixed number of queries: the page
+# itself, one selectin query for all of its assignments, and one lookup of
+# the display names of every creator, assignee and assigner on the page.
+# The user rows are never loaded as entities.
+#
+# Bulk updates are validated as a whole (one query checks existence and
+# ownership) and applied with one UPDATE per chunk of tasks, using CASE on
+# the task id where tasks get different values. Either every update is
+# applied or none is.
+#
+# Assignments are changed by diffing the wanted assignees against the rows
+# already there: only removed assignees are deleted and only new ones are
+# inserted, one statement each, so untouched assignments keep their
+# assigned_at and completed_at.
+
+def _parse_status(value):
+    return TaskStatus(value)
+
+def _parse_priority(value):
+    return TaskPriority(value)
+
+def _parse_due_date(value):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return datetime.fromisoformat(value)
+
+# Fields a bulk update may change, with the parsers for their JSON values
+FIELD_PARSERS = {
+    'status': _parse_status,
+    'priority': _parse_priority,
+    'due_date': _parse_due_date,
+}
+
+BULK_CHUNK_SIZE = 500
+
+def task_query():
+    """Task query with the assignments eager loaded"""
+    return Task.query.options(selectinload(Task.assignments))
+
+def serialize_tasks(tasks):
+    """Serialize tasks with one batched user name lookup"""
+    user_ids = set()
+    for task in tasks:
+        user_ids.update(task.user_ids())
+    names = User.display_names(user_ids)
+    return [task.to_dict(names) for task in tasks]
+
+def serialize_task(task):
+    return serialize_tasks([task])[0]
+
+def _parse_update(update):
+    """(task_id, {field: value}) for one entry of a bulk update"""
+    if not isinstance(update, dict):
+        raise ValueError("Each update must be an object")
+    task_id = update.get('id')
+    if not isinstance(task_id, int) or isinstance(task_id, bool):
+        raise ValueError("id must be a task ID")
+    unknown = sorted(set(update) - set(FIELD_PARSERS) - {'id'})
+    if unknown:
+        raise ValueError(f"Cannot bulk update: {', '.join(unknown)}")
+    values = {}
+    for field, parse in FIELD_PARSERS.items():
+        if field in update:
+            try:
+                values[field] = parse(update[field])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {field}: {update[field]}")
+    if not values:
+        raise ValueError(f"Nothing to update (expected one of {', '.join(FIELD_PARSERS)})")
+    return task_id, values
+
+def _set_value(column, changes, field):
+    """SET value of ``column`` for the tasks in ``changes``: a constant, a CASE, or None"""
+    ids = [task_id for task_id, values in changes.items() if field in values]
+    if not ids:
+        return None
+    values = {changes[task_id][field] for task_id in ids}
+    if len(values) == 1 and len(ids) == len(changes):
+        return bindparam(f'bulk_{field}', values.pop(), type_=column.type)
+    # Named parameters: anonymous ones make compiling a large CASE slow
+    return case(
+        *[(bindparam(f'bulk_{field}_id_{i}', task_id),
+           bindparam(f'bulk_{field}_{i}', changes[task_id][field], type_=column.type))
+          for i, task_id in enumerate(ids)],
+        value=Task.__table__.c.id,
+        else_=column
+    )
+
+def update_statement(changes, updated_at):
+    """One UPDATE applying ``changes`` ({task_id: {field: value}}) to its tasks"""
+    tasks = Task.__table__
+    values = {tasks.c.updated_at: updated_at}
+    for field in FIELD_PARSERS:
+        value = _set_value(tasks.c[field], changes, field)
+        if value is not None:
+            values[tasks.c[field]] = value
+    return tasks.update().where(tasks.c.id.in_(list(changes))).values(values)
+
+def _check_editable(task_ids, user, errors):
+    """Rows (id, event_id, created_by) of ``task_ids``; problems go to ``errors``"""
+    tasks = Task.__table__
+    task_ids = list(task_ids)
+    rows = {row.id: row for row in db.session.execute(
+        select(tasks.c.id, tasks.c.event_id, tasks.c.created_by).where(tasks.c.id.in_(task_ids))
+    )} if task_ids else {}
+    can_manage_all = user.role in ['admin', 'organizer']
+    for task_id in task_ids:
+        row = rows.get(task_id)
+        if row is None:
+            errors.append({'task_id': task_id, 'error': 'Task not found'})
+        elif not can_manage_all and row.created_by != user.id:
+            errors.append({'task_id': task_id, 'error': 'Not authorized to update this task'})
+    return rows
+
+def bulk_update_tasks(updates, user):
+    """Apply partial updates (status, priority, due_date) to many tasks at once
+
+    Every entry is validated before anything is written; any invalid,
+    missing or unauthorized task fails the whole request with the list of
+    problems.
+    """
+    if not isinstance(updates, list) or not updates:
+        return {"error": "updates must be a non-empty list"}, 400
+    max_updates = current_app.config.get('TASK_BULK_MAX_UPDATES', 1000)
+    if len(updates) > max_updates:
+        return {"error": f"At most {max_updates} tasks can be updated at once"}, 400
+
+    errors, changes = [], {}
+    for index, update in enumerate(updates):
+        try:
+            task_id, values = _parse_update(update)
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        if task_id in changes:
+            errors.append({'index': index, 'task_id': task_id, 'error': 'Task appears more than once'})
+            continue
+        changes[task_id] = values
+
+    rows = _check_editable(changes, user, errors)
+    if errors:
+        return {"error": "No tasks were updated", "errors": errors}, 400
+
+    tasks = Task.__table__
+    now = datetime.utcnow()
+    task_ids = sorted(changes)
+    updated = 0
+    try:
+        for start in range(0, len(task_ids), BULK_CHUNK_SIZE):
+            chunk = task_ids[start:start + BULK_CHUNK_SIZE]
+            statement = update_statement({task_id: changes[task_id] for task_id in chunk}, now)
+            updated += db.session.execute(statement).rowcount
+        if updated != len(task_ids):
+            # A task was deleted between the check and the update
+            db.session.rollback()
+            return {"error": "Tasks changed concurrently; no tasks were updated"}, 409
+        event_cache.invalidate_on_commit({event_cache.tasks_tag(row.event_id) for row in rows.values()})
+        reminder_service.reminders_changed_on_commit(task_ids)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to update tasks: {str(e)}"}, 500
+
+    return {'updated': updated, 'task_ids': task_ids, 'updated_at': now.isoformat()}
+
+def parse_assignee_ids(value):
+    """Validate a list of assignee IDs; returns (ids, error response or None)"""
+    if not isinstance(value, list) or not all(
+        isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in value
+    ):
+        return None, ({"error": "assignee_ids must be a list of user IDs"}, 400)
+    ids = list(dict.fromkeys(value))
+    found = {user_id for (user_id,) in db.session.execute(
+        select(User.id).where(User.id.in_(ids))
+    )} if ids else set()
+    missing = [user_id for user_id in ids if user_id not in found]
+    if missing:
+        return None, ({"error": "Users not found", "user_ids": missing}, 400)
+    return ids, None
+
+def assignment_diff(current, assignee_ids, replace=True):
+    """(added, removed) assignee IDs taking ``current`` to ``assignee_ids``"""
+    removed = sorted(set(current) - set(assignee_ids)) if replace else []
+    added = [assignee_id for assignee_id in dict.fromkeys(assignee_ids) if assignee_id not in current]
+    return added, removed
+
+def sync_assignments(wanted, assigned_by, replace=True):
+    """Bring assignments in line with ``wanted`` ({task_id: assignee ids}) without a commit
+
+    With ``replace`` assignees missing from ``wanted`` are removed; otherwise
+    they are kept and only new ones are added. Returns {task_id: {'added':
+    [...], 'removed': [...]}} for the tasks that changed.
+    """
+    assignments = TaskAssignment.__table__
+    existing = {}
+    if wanted:
+        # Concurrent edits of the same task's assignees queue behind this
+        tasks = Task.__table__
+        db.session.execute(select(tasks.c.id).where(tasks.c.id.in_(list(wanted))).with_for_update())
+        for row in db.session.execute(
+            select(assignments.c.id, assignments.c.task_id, assignments.c.assignee_id)
+            .where(assignments.c.task_id.in_(list(wanted)))
+        ):
+            existing.setdefault(row.task_id, {}).setdefault(row.assignee_id, []).append(row.id)
+
+    now = datetime.utcnow()
+    delete_ids, inserts, changes = [], [], {}
+    for task_id, assignee_ids in wanted.items():
+        current = existing.get(task_id, {})
+        added, removed = assignment_diff(current, assignee_ids, replace)
+        for assignee_id in removed:
+            delete_ids.extend(current[assignee_id])
+        inserts.extend(
+            {'task_id': task_id, 'assignee_id': assignee_id, 'assigned_by': assigned_by, 'assigned_at': now}
+            for assignee_id in added
+        )
+        if added or removed:
+            changes[task_id] = {'added': added, 'removed': removed}
+
+    if delete_ids:
+        db.session.execute(assignments.delete().where(assignments.c.id.in_(delete_ids)))
+    if inserts:
+        db.session.execute(assignments.insert(), inserts)
+    return changes
+
+def bulk_assign(data, user):
+    """Assign users to many tasks at once
+
+    Adds the assignees to every task (existing assignments are left alone),
+    or with ``replace`` makes them the tasks' only assignees.
+    """
+    task_ids = data.get('task_ids')
+    if not isinstance(task_ids, list) or not task_ids or not all(
+        isinstance(task_id, int) and not isinstance(task_id, bool) for task_id in task_ids
+    ):
+        return {"error": "task_ids must be a non-empty list of task IDs"}, 400
+    task_ids = list(dict.fromkeys(task_ids))
+    max_updates = current_app.config.get('TASK_BULK_MAX_UPDATES', 1000)
+    if len(task_ids) > max_updates:
+        return {"error": f"At most {max_updates} tasks can be updated at once"}, 400
+    assignee_ids, error = parse_assignee_ids(data.get('assignee_ids'))
+    if error:
+        return error
+
+    errors = []
+    _check_editable(task_ids, user, errors)
+    if errors:
+        return {"error": "No tasks were updated", "errors": errors}, 400
+
+    replace = bool(data.get('replace'))
+    try:
+        changes = sync_assignments({task_id: assignee_ids for task_id in task_ids}, user.id, replace=replace)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"error": f"Failed to assign tasks: {str(e)}"}, 500
+
+    return {
+        'added': sum(len(change['added']) for change in changes.values()),
+        'removed': sum(len(change['removed']) for change in changes.values()),
+        'changed': {str(task_id): change for task_id, change in sorted(changes.items())}
+    }
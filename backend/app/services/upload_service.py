@@ -0,0 +1,159 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: without Pillow only originals are served
+    Image = None
+
+# Content-addressed upload store.
+#
+# Uploads are streamed to a temporary file in fixed-size chunks while being
+# hashed, then moved to objects/<aa>/<bb>/<sha256>.<ext>. Identical content
+# maps to the same path, so duplicates are only written once. Image variants
+# (<sha256>_<width>.jpg) are generated in a process pool after the request
+# has returned; until a variant exists the original is served instead.
+
+CHUNK_SIZE = 64 * 1024
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+URL_PREFIX = '/api/uploads/'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class StoredUpload:
+    def __init__(self, digest, extension, path, created):
+        self.digest = digest
+        self.extension = extension
+        self.path = path
+        self.created = created
+
+    @property
+    def name(self):
+        return f'{self.digest}.{self.extension}'
+
+    @property
+    def url(self):
+        return URL_PREFIX + self.name
+
+def _store_root():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'objects')
+
+def object_dir(digest):
+    return os.path.join(_store_root(), digest[:2], digest[2:4])
+
+def object_path(digest, extension):
+    return os.path.join(object_dir(digest), f'{digest}.{extension}')
+
+def variant_path(digest, width):
+    return os.path.join(object_dir(digest), f'{digest}_{width}.jpg')
+
+def _extension(filename):
+    filename = secure_filename(filename or '')
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else 'bin'
+
+def store_upload(file):
+    """Stream an uploaded file into the store, hashing it on the way"""
+    extension = _extension(file.filename)
+    tmp_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+
+        hexdigest = digest.hexdigest()
+        path = object_path(hexdigest, extension)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+            return StoredUpload(hexdigest, extension, path, created=False)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return StoredUpload(hexdigest, extension, path, created=True)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def generate_variants(source, digest, out_dir, widths):
+    """Write resized JPEG variants of an image (runs in a worker process)"""
+    written = []
+    with Image.open(source) as image:
+        image = image.convert('RGB')
+        for width in widths:
+            target = os.path.join(out_dir, f'{digest}_{width}.jpg')
+            if os.path.exists(target):
+                continue
+            variant = image.copy()
+            variant.thumbnail((width, width * 4))
+            tmp_target = target + '.tmp'
+            variant.save(tmp_target, 'JPEG', quality=82, optimize=True, progressive=True)
+            os.replace(tmp_target, target)
+            written.append(width)
+    return written
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=current_app.config.get('THUMBNAIL_WORKERS', 2)
+            )
+        return _executor
+
+def schedule_variants(upload):
+    """Queue thumbnail generation for an image upload without waiting for it"""
+    if Image is None or upload.extension not in IMAGE_EXTENSIONS:
+        return None
+    widths = current_app.config.get('THUMBNAIL_WIDTHS', (160, 480, 1024))
+    if all(os.path.exists(variant_path(upload.digest, w)) for w in widths):
+        return None
+    future = _get_executor().submit(
+        generate_variants, upload.path, upload.digest, object_dir(upload.digest), tuple(widths)
+    )
+    logger = current_app.logger
+    future.add_done_callback(
+        lambda f: f.exception() and logger.error(f"Thumbnail generation failed: {f.exception()}")
+    )
+    return future
+
+def default_width():
+    """Configured variant width for list views, or None if no widths are generated"""
+    widths = current_app.config.get('THUMBNAIL_WIDTHS', (160, 480, 1024))
+    if not widths:
+        return None
+    target = current_app.config.get('THUMBNAIL_DEFAULT_WIDTH', 480)
+    return max((w for w in widths if w <= target), default=min(widths))
+
+def resolve(name, width=None):
+    """Map a stored name (and optional variant width) to (path, is_variant).
+
+    Returns (None, False) for unknown names or widths that aren't configured.
+    """
+    digest, _, extension = name.partition('.')
+    if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest) \
+            or extension != secure_filename(extension):
+        return None, False
+
+    if width is not None:
+        if width not in current_app.config.get('THUMBNAIL_WIDTHS', (160, 480, 1024)):
+            return None, False
+        path = variant_path(digest, width)
+        if os.path.exists(path):
+            return path, True
+
+    path = object_path(digest, extension)
+    return (path, False) if os.path.exists(path) else (None, False)
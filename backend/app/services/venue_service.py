@@ -0,0 +1,287 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from .. import db
+from ..models.event import Event, EventStatus
+from ..models.venue import Venue
+from ..utils.db import dialect_name
+from ..utils.interval_tree import IntervalTree
+from . import recurrence_service
+
+# Venue booking conflicts.
+#
+# A booking locks its venue row (FOR UPDATE on PostgreSQL, a no-op UPDATE
+# elsewhere, which also takes SQLite's write lock) and is checked against
+# the events table inside the same transaction. Recurring series are
+# expanded up to VENUE_CONFLICT_HORIZON_DAYS ahead, honouring edited and
+# cancelled occurrences, and every occurrence of the booking is checked
+# against an IntervalTree of the venue's other occurrences in that range.
+#
+# On PostgreSQL an exclusion constraint over tsrange(start_time, end_time)
+# backs this up for one-off events (it only sees a series' first
+# occurrence). A per-venue IntervalTree of one-off bookings kept in process
+# memory (refreshed every VENUE_INDEX_TTL seconds) pre-filters availability
+# searches elsewhere; it can miss other workers' recent bookings, so its
+# answers are confirmed in the database.
+
+EXCLUSION_CONSTRAINT = 'events_venue_no_overlap'
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    f"ALTER TABLE events ADD CONSTRAINT {EXCLUSION_CONSTRAINT} EXCLUDE USING gist "
+    "(venue_id WITH =, tsrange(start_time, end_time) WITH &&) "
+    "WHERE (venue_id IS NOT NULL AND status <> 'CANCELLED')",
+]
+
+_POSTGRES_OVERLAP = (
+    "tsrange(events.start_time, events.end_time) && tsrange(:start, :end)"
+)
+
+class VenueConflict(Exception):
+    """Raised when a booking overlaps an existing event at the same venue"""
+
+    def __init__(self, venue_id, event_id=None):
+        self.venue_id = venue_id
+        self.event_id = event_id
+        super().__init__(f"Venue {venue_id} is already booked for an overlapping event")
+
+def _use_postgres():
+    return dialect_name() == 'postgresql'
+
+def install_booking_constraint():
+    """Add the PostgreSQL exclusion constraint (fails if overlaps already exist)"""
+    if not _use_postgres():
+        return False
+    for statement in _POSTGRES_DDL:
+        db.session.execute(text(statement))
+    db.session.commit()
+    return True
+
+def is_booking_conflict(error):
+    """Whether an IntegrityError came from the exclusion constraint"""
+    return isinstance(error, IntegrityError) and EXCLUSION_CONSTRAINT in str(error.orig)
+
+class VenueBookingIndex:
+    """Per-venue interval trees of active (non-cancelled) one-off bookings"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._trees = {}
+        self._loaded_at = {}
+        self._lock = threading.RLock()
+
+    def _tree(self, venue_id):
+        with self._lock:
+            loaded_at = self._loaded_at.get(venue_id)
+            if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+                return self._trees[venue_id]
+
+            tree = IntervalTree()
+            # Series are left to the database check in find_available_venues
+            rows = db.session.query(Event.id, Event.start_time, Event.end_time).filter(
+                Event.venue_id == venue_id,
+                Event.status != EventStatus.CANCELLED,
+                Event.recurrence_rule.is_(None)
+            )
+            for event_id, start_time, end_time in rows:
+                tree.add(start_time, end_time, event_id)
+            self._trees[venue_id] = tree
+            self._loaded_at[venue_id] = time.monotonic()
+            return tree
+
+    def find_conflict(self, venue_id, start_time, end_time, exclude_event_id=None):
+        with self._lock:
+            return self._tree(venue_id).first_overlap(start_time, end_time, exclude=exclude_event_id)
+
+    def is_free(self, venue_id, start_time, end_time):
+        return self.find_conflict(venue_id, start_time, end_time) is None
+
+    def sync_event(self, event_id, venue_id, start_time, end_time, active=True):
+        """Move an event to its current venue/time slot in the index"""
+        with self._lock:
+            for other_venue, tree in self._trees.items():
+                if other_venue != venue_id and event_id in tree:
+                    tree.remove(event_id)
+            if venue_id is None or venue_id not in self._trees:
+                return
+            if active:
+                self._trees[venue_id].add(start_time, end_time, event_id)
+            else:
+                self._trees[venue_id].remove(event_id)
+
+    def remove_event(self, event_id):
+        with self._lock:
+            for tree in self._trees.values():
+                tree.remove(event_id)
+
+def get_booking_index():
+    """Get the app's in-memory venue booking index"""
+    index = current_app.extensions.get('venue_booking_index')
+    if index is None:
+        index = VenueBookingIndex(ttl=current_app.config.get('VENUE_INDEX_TTL', 300))
+        current_app.extensions['venue_booking_index'] = index
+    return index
+
+def _horizon():
+    return timedelta(days=current_app.config.get('VENUE_CONFLICT_HORIZON_DAYS', 365))
+
+def _max_occurrences():
+    return current_app.config.get('VENUE_CONFLICT_MAX_OCCURRENCES', 1000)
+
+def lock_venue(venue_id):
+    """Hold the venue's row until the transaction ends, serializing its bookings"""
+    if venue_id is None:
+        return
+    venues = Venue.__table__
+    if _use_postgres():
+        db.session.execute(select(venues.c.id).where(venues.c.id == venue_id).with_for_update())
+    else:
+        db.session.execute(venues.update().where(venues.c.id == venue_id).values(id=venues.c.id))
+
+def booking_window(event):
+    """Range in which an event's occurrences are checked, or None if none are left"""
+    if not event.recurrence_rule:
+        return event.start_time, event.end_time
+    window_start = max(event.start_time, datetime.utcnow())
+    window_end = window_start + _horizon()
+    if event.recurrence_end is not None:
+        window_end = min(window_end, event.recurrence_end)
+    if window_end <= window_start:
+        return None
+    return window_start, window_end
+
+def _bookings(venue_ids, window_start, window_end, exclude_event_id=None):
+    """{venue_id: IntervalTree} of the active occurrences at the venues inside the window"""
+    events = Event.__table__
+    query = select(
+        events.c.id, events.c.venue_id, events.c.start_time, events.c.end_time, events.c.recurrence_rule
+    ).where(
+        events.c.venue_id.in_(list(venue_ids)),
+        events.c.status != EventStatus.CANCELLED,
+        recurrence_service.overlap_filter(events, window_start, window_end)
+    )
+    if exclude_event_id is not None:
+        query = query.where(events.c.id != exclude_event_id)
+    connection = db.session.connection()
+    rows = connection.execute(query).all()
+    trees = {}
+    occurrences = recurrence_service.occurrences_in_window(
+        connection, rows, window_start, window_end, _max_occurrences()
+    )
+    for row, start, end, _ in occurrences:
+        trees.setdefault(row.venue_id, IntervalTree()).add(start, end, (row.id, start))
+    return trees
+
+def find_venue_conflict(event):
+    """Get the id of an active event overlapping any occurrence of ``event`` at its venue, or None
+
+    ``event`` is an Event or a row with its id, venue_id, start_time,
+    end_time, recurrence_rule and recurrence_end.
+    """
+    if event.venue_id is None:
+        return None
+    window = booking_window(event)
+    if window is None:
+        return None
+    slots = [(start, end) for _, start, end, _ in recurrence_service.occurrences_in_window(
+        db.session.connection(), [event], *window, _max_occurrences()
+    )]
+    if not slots:
+        return None
+    tree = _bookings(
+        [event.venue_id], min(start for start, _ in slots), max(end for _, end in slots),
+        exclude_event_id=event.id
+    ).get(event.venue_id)
+    if tree is None:
+        return None
+    for start, end in slots:
+        key = tree.first_overlap(start, end)
+        if key is not None:
+            return key[0]
+    return None
+
+def check_venue_available(event):
+    """Lock the event's venue and raise VenueConflict if any occurrence is already booked"""
+    if event.venue_id is None:
+        return
+    lock_venue(event.venue_id)
+    # Pending exceptions of the event itself must be visible to the check
+    db.session.flush()
+    conflict = find_venue_conflict(event)
+    if conflict is not None:
+        raise VenueConflict(event.venue_id, conflict)
+
+def find_batch_conflicts(slots):
+    """Lock the venues of a batch of new one-off bookings and check each one
+
+    ``slots`` are (key, venue_id, start_time, end_time) tuples, checked in
+    order against the venues' bookings and the batch's earlier slots.
+    Returns {key: (conflicting event id, None) or (None, earlier slot's key)}
+    for the slots that can't be booked.
+    """
+    slots = [slot for slot in slots if slot[1] is not None]
+    if not slots:
+        return {}
+    venue_ids = sorted({venue_id for _, venue_id, _, _ in slots})
+    # In id order, so concurrent batches can't deadlock on each other's venues
+    for venue_id in venue_ids:
+        lock_venue(venue_id)
+    trees = _bookings(venue_ids, min(slot[2] for slot in slots), max(slot[3] for slot in slots))
+    conflicts = {}
+    for key, venue_id, start_time, end_time in slots:
+        tree = trees.setdefault(venue_id, IntervalTree())
+        other = tree.first_overlap(start_time, end_time)
+        if other is not None:
+            conflicts[key] = other
+            continue
+        tree.add(start_time, end_time, (None, key))
+    return {
+        key: (None, other[1]) if other[0] is None else (other[0], None)
+        for key, other in conflicts.items()
+    }
+
+def record_booking(event):
+    """Reflect a committed event write in the in-memory index"""
+    record_slot(event.id, event.venue_id, event.start_time, event.end_time,
+                active=event.status != EventStatus.CANCELLED and not event.recurrence_rule)
+
+def record_slot(event_id, venue_id, start_time, end_time, active=True):
+    """``record_booking`` for callers holding column values rather than an Event"""
+    if _use_postgres():
+        return
+    get_booking_index().sync_event(event_id, venue_id, start_time, end_time, active=active)
+
+def forget_booking(event_id):
+    if not _use_postgres():
+        get_booking_index().remove_event(event_id)
+
+def find_available_venues(start_time, end_time, min_capacity=None):
+    """Active venues with no overlapping booking and enough capacity"""
+    query = Venue.query.filter(Venue.is_active == True)
+    if min_capacity:
+        query = query.filter(Venue.capacity >= min_capacity)
+
+    if _use_postgres():
+        booked = db.session.query(Event.id).filter(
+            Event.venue_id == Venue.id,
+            Event.status != EventStatus.CANCELLED,
+            Event.recurrence_rule.is_(None),
+            text(_POSTGRES_OVERLAP).bindparams(start=start_time, end=end_time)
+        )
+        candidates = query.filter(~booked.exists()).order_by(Venue.capacity, Venue.id).all()
+    else:
+        index = get_booking_index()
+        candidates = [
+            venue for venue in query.order_by(Venue.capacity, Venue.id)
+            if index.is_free(venue.id, start_time, end_time)
+        ]
+    if not candidates:
+        return []
+    bookings = _bookings([venue.id for venue in candidates], start_time, end_time)
+    return [
+        venue for venue in candidates
+        if venue.id not in bookings or bookings[venue.id].first_overlap(start_time, end_time) is None
+    ]
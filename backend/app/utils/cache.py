@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for the shared backend
+    redis = None
+
+class LRUCache:
+    """In-process cache with LRU eviction and a per-entry TTL.
+
+    Tag counters are kept in their own LRU of ``max_counters``. A missing
+    counter reads as a floor that is raised past every evicted value, so an
+    evicted tag never goes back to a generation a stale entry remembers;
+    entries of other untracked tags just miss once.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=60, max_counters=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_counters = max_counters or max_entries * 4
+        self._data = OrderedDict()
+        self._counters = OrderedDict()
+        self._counter_floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_counters(self, names):
+        with self._lock:
+            values = []
+            for name in names:
+                value = self._counters.get(name)
+                if value is None:
+                    values.append(self._counter_floor)
+                else:
+                    self._counters.move_to_end(name)
+                    values.append(value)
+            return values
+
+    def incr_counters(self, names):
+        with self._lock:
+            for name in names:
+                self._counters[name] = self._counters.get(name, self._counter_floor) + 1
+                self._counters.move_to_end(name)
+            while len(self._counters) > self.max_counters:
+                _, value = self._counters.popitem(last=False)
+                self._counter_floor = max(self._counter_floor, value + 1)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+            self._counter_floor = 0
+
+    def __len__(self):
+        return len(self._data)
+
+class RedisCache:
+    """Shared cache backed by Redis, for deployments with several workers"""
+
+    def __init__(self, url, prefix='cache:', default_ttl=60, client=None):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required for the shared cache backend")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        # Eviction is left to Redis (maxmemory-policy allkeys-lru)
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl or self.default_ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def get_counters(self, names):
+        if not names:
+            return []
+        values = self.client.mget([self.prefix + 'gen:' + name for name in names])
+        return [int(v) if v is not None else 0 for v in values]
+
+    def incr_counters(self, names):
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            pipe.incr(self.prefix + 'gen:' + name)
+        pipe.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(self.prefix + '*'))
+
+class TaggedCache:
+    """Cache whose entries are invalidated through tags.
+
+    Every tag has a generation counter in the backend. Entries remember the
+    generations of their tags when stored, and bumping a tag's counter makes
+    every entry carrying it stale without having to find those entries.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        if entry is not None:
+            tags = entry['tags']
+            if self.backend.get_counters(list(tags)) == list(tags.values()):
+                self._count(True)
+                return entry['value']
+            self.backend.delete(key)
+        self._count(False)
+        return None
+
+    def generations(self, tags):
+        """Snapshot tag generations, to be taken before computing a value"""
+        tags = list(dict.fromkeys(tags))
+        return dict(zip(tags, self.backend.get_counters(tags)))
+
+    def set(self, key, value, tags, ttl=None, snapshot=None):
+        """Store a value under ``tags``.
+
+        Generations in ``snapshot`` win over the current ones, so a write that
+        raced with the computation of ``value`` still invalidates it.
+        """
+        generations = self.generations(tags)
+        generations.update(snapshot or {})
+        self.backend.set(key, {'value': value, 'tags': generations}, ttl)
+
+    def invalidate(self, tags):
+        tags = list(dict.fromkeys(tags))
+        if tags:
+            self.backend.incr_counters(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self.backend)
+        }
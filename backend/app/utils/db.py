@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from .. import db
+
+# Database dialect checks shared by the services and models. Callers branch
+# on dialect_name() for statements only some backends support (ON CONFLICT,
+# FOR UPDATE, full-text search) instead of each reading the engine.
+
+def dialect_name(connection=None):
+    """Name of the database dialect in use, e.g. 'postgresql' or 'sqlite'"""
+    return (connection if connection is not None else db.engine).dialect.name
+
+_CONFLICT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def conflict_insert(table, connection=None):
+    """INSERT into ``table`` that takes an ON CONFLICT clause, or None if unsupported"""
+    insert = _CONFLICT_INSERTS.get(dialect_name(connection))
+    return insert(table) if insert is not None else None
+
+def insert_ignore(table, values):
+    """INSERT of ``values`` that skips rows conflicting with a unique key
+
+    Falls back to a plain INSERT where ON CONFLICT isn't supported.
+    """
+    insert = conflict_insert(table)
+    if insert is None:
+        return table.insert().values(values)
+    return insert.values(values).on_conflict_do_nothing()
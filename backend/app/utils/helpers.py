@@ -1,6 +1,3 @@
-import os
-from werkzeug.utils import secure_filename
-from flask import current_app
 from functools import wraps
 from flask_jwt_extended import get_jwt_identity
 from ..models import User
@@ -12,26 +9,20 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def save_uploaded_file(file, folder):
-    """Save an uploaded file to the specified folder"""
+    """Save an uploaded file to the content-addressed store and return its URL
+
+    ``folder`` is kept for compatibility; stored files are keyed by hash.
+    """
     if not file:
         return None
     
     if not allowed_file(file.filename):
         return None
     
-    # Create secure filename
-    filename = secure_filename(file.filename)
-    
-    # Create directory if it doesn't exist
-    upload_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Save file
-    filepath = os.path.join(upload_folder, filename)
-    file.save(filepath)
-    
-    # Return relative path
-    return os.path.join('uploads', folder, filename)
+    from ..services.upload_service import store_upload, schedule_variants
+    upload = store_upload(file)
+    schedule_variants(upload)
+    return upload.url
 
 def admin_required(f):
     """Decorator to require admin role"""
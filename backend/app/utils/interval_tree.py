@@ -0,0 +1,163 @@
+import heapq
+import random
+
+class _Node:
+    __slots__ = ('start', 'end', 'key', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, start, end, key):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.max_end = self.end
+        if self.left is not None and self.left.max_end > self.max_end:
+            self.max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > self.max_end:
+            self.max_end = self.right.max_end
+
+def _order(node):
+    return (node.start, node.end, node.key)
+
+def _rotate_right(node):
+    left = node.left
+    node.left = left.right
+    node.update()
+    left.right = node
+    left.update()
+    return left
+
+def _rotate_left(node):
+    right = node.right
+    node.right = right.left
+    node.update()
+    right.left = node
+    right.update()
+    return right
+
+def _insert(node, new):
+    if node is None:
+        return new
+    if _order(new) < _order(node):
+        node.left = _insert(node.left, new)
+        if node.left.priority > node.priority:
+            node = _rotate_right(node)
+    else:
+        node.right = _insert(node.right, new)
+        if node.right.priority > node.priority:
+            node = _rotate_left(node)
+    node.update()
+    return node
+
+def _remove(node, order):
+    if node is None:
+        return None
+    current = _order(node)
+    if order < current:
+        node.left = _remove(node.left, order)
+    elif order > current:
+        node.right = _remove(node.right, order)
+    else:
+        if node.left is None:
+            return node.right
+        if node.right is None:
+            return node.left
+        if node.left.priority > node.right.priority:
+            node = _rotate_right(node)
+            node.right = _remove(node.right, order)
+        else:
+            node = _rotate_left(node)
+            node.left = _remove(node.left, order)
+    node.update()
+    return node
+
+class IntervalTree:
+    """Half-open intervals ``[start, end)`` in a treap augmented with max end.
+
+    Insert, remove and "does anything overlap" run in expected O(log n);
+    listing overlaps costs O(log n + k) for k results. Every interval carries
+    a hashable key (e.g. an event id) so it can be removed again.
+    """
+
+    def __init__(self):
+        self._root = None
+        self._intervals = {}
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def __contains__(self, key):
+        return key in self._intervals
+
+    def add(self, start, end, key):
+        if key in self._intervals:
+            self.remove(key)
+        self._intervals[key] = (start, end)
+        self._root = _insert(self._root, _Node(start, end, key))
+
+    def remove(self, key):
+        interval = self._intervals.pop(key, None)
+        if interval is not None:
+            self._root = _remove(self._root, (interval[0], interval[1], key))
+
+    def overlapping(self, start, end, exclude=None):
+        """Keys of every interval overlapping ``[start, end)``"""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            if node.start < end:
+                if node.end > start and node.key != exclude:
+                    found.append(node.key)
+                stack.append(node.right)
+        return found
+
+    def first_overlap(self, start, end, exclude=None):
+        """Key of some interval overlapping ``[start, end)``, or None"""
+        if exclude is not None:
+            found = self.overlapping(start, end, exclude=exclude)
+            return found[0] if found else None
+
+        # If the left subtree reaches past ``start`` but holds no overlap,
+        # its latest interval starts at or after ``end`` and so does every
+        # interval to the right; one root-to-leaf walk is enough
+        node = self._root
+        while node is not None:
+            if node.start < end and node.end > start:
+                return node.key
+            if node.left is not None and node.left.max_end > start:
+                node = node.left
+            else:
+                node = node.right
+        return None
+
+    def items(self):
+        """All ``(key, start, end)`` entries"""
+        return [(key, start, end) for key, (start, end) in self._intervals.items()]
+
+def overlapping_pairs(intervals):
+    """Every pair of overlapping half-open intervals, by a sweep line.
+
+    ``intervals`` are ``(start, end, key)`` tuples. Yields ``(key_a, key_b)``
+    with ``a`` starting no later than ``b``. Sorting plus a min-heap of the
+    active intervals' ends makes this O(n log n + k) for k pairs. Empty
+    intervals overlap nothing.
+    """
+    active = []
+    ordered = sorted(
+        (interval for interval in intervals if interval[0] < interval[1]),
+        key=lambda interval: (interval[0], interval[1])
+    )
+    for sequence, (start, end, key) in enumerate(ordered):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, _, other in active:
+            yield other, key
+        heapq.heappush(active, (end, sequence, key))
@@ -0,0 +1,112 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'$d': value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if '$dt' in value:
+            return datetime.fromisoformat(value['$dt'])
+        if '$d' in value:
+            return date.fromisoformat(value['$d'])
+    return value
+
+def encode_cursor(values, direction='next'):
+    """Encode the sort key of a row into an opaque cursor string"""
+    payload = {'v': [_encode_value(v) for v in values], 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor string into (values, direction)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_decode_value(v) for v in payload['v']]
+        direction = payload.get('d', 'next')
+    except Exception:
+        raise InvalidCursor('Invalid pagination cursor')
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor('Invalid pagination cursor')
+    return values, direction
+
+def _seek_condition(order_by, values):
+    """Build a row-value comparison "(a, b, ...) past (x, y, ...)".
+
+    Each entry of ``order_by`` is a ``(column, descending)`` tuple. The
+    condition is expanded into OR-ed prefixes so mixed sort directions work
+    on every backend.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(order_by):
+        equal_prefix = [order_by[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+def keyset_paginate(query, order_by, cursor=None, per_page=20, include_total=False):
+    """Paginate a query by seeking past the sort key of the last row seen.
+
+    ``order_by`` is a list of ``(column, descending)`` tuples and must end in a
+    unique column (usually the primary key) so the ordering is total. Unlike
+    ``query.paginate()`` this never issues an OFFSET, and only runs a
+    ``COUNT(*)`` when ``include_total`` is set.
+    """
+    direction = 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(order_by):
+            raise InvalidCursor('Invalid pagination cursor')
+    else:
+        values = None
+
+    total = query.order_by(None).count() if include_total else None
+
+    # Walking backwards means seeking in the inverted order and flipping the
+    # page back round afterwards
+    backwards = direction == 'prev'
+    effective = [(col, desc != backwards) for col, desc in order_by]
+
+    # Any ordering already on the query is replaced by the seek order
+    page_query = query.order_by(None)
+    if values is not None:
+        page_query = page_query.filter(_seek_condition(effective, values))
+    page_query = page_query.order_by(
+        *[col.desc() if desc else col.asc() for col, desc in effective]
+    )
+
+    rows = page_query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    if backwards:
+        items.reverse()
+
+    def key_of(item):
+        return [getattr(item, col.key) for col, _ in order_by]
+
+    if backwards:
+        has_next = values is not None
+        has_prev = has_more
+    else:
+        has_next = has_more
+        has_prev = values is not None
+
+    result = {
+        'items': items,
+        'per_page': per_page,
+        'next_cursor': encode_cursor(key_of(items[-1]), 'next') if items and has_next else None,
+        'prev_cursor': encode_cursor(key_of(items[0]), 'prev') if items and has_prev else None
+    }
+    if include_total:
+        result['total'] = total
+    return result
@@ -24,6 +24,35 @@ class Config:
     MAIL_USERNAME = os.environ.get('SENDGRID_USERNAME')
     MAIL_PASSWORD = os.environ.get('SENDGRID_API_KEY')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT', 30))
+    
+    # Background loops (archiver, guest counter reconciler, email workers,
+    # reminder scheduler). Off by default so web workers and CLI commands
+    # don't each start a copy; run them in one process with
+    # `flask run-workers`, or set this to start them with the app
+    BACKGROUND_WORKERS = os.environ.get('BACKGROUND_WORKERS', 'false').lower() in ['true', 'on', '1']
+    
+    # Outgoing email queue: sending threads per process (0 = only via
+    # `flask deliver-email`), messages per SMTP connection, messages per
+    # second per process (0 = unlimited), attempts before giving up, base
+    # retry delay in seconds (doubled per attempt), idle poll interval, and
+    # seconds a worker may hold a batch before others can reclaim it
+    EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', 2))
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 100))
+    EMAIL_RATE_LIMIT = float(os.environ.get('EMAIL_RATE_LIMIT', 10))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_DELAY = int(os.environ.get('EMAIL_RETRY_DELAY', 60))
+    EMAIL_POLL_INTERVAL = float(os.environ.get('EMAIL_POLL_INTERVAL', 2))
+    EMAIL_LEASE_SECONDS = int(os.environ.get('EMAIL_LEASE_SECONDS', 300))
+    
+    # Task due-date reminders: minutes before the due date to remind
+    # assignees (comma separated), hours of due dates held in memory beyond
+    # the longest lead, seconds between lease renewals and change polls
+    # (0 = no scheduler), and seconds before another worker may take over
+    TASK_REMINDER_LEADS = os.environ.get('TASK_REMINDER_LEADS', '1440,60')
+    TASK_REMINDER_WINDOW_HOURS = float(os.environ.get('TASK_REMINDER_WINDOW_HOURS', 6))
+    TASK_REMINDER_POLL_INTERVAL = float(os.environ.get('TASK_REMINDER_POLL_INTERVAL', 30))
+    TASK_REMINDER_LEASE_SECONDS = int(os.environ.get('TASK_REMINDER_LEASE_SECONDS', 90))
     
     # Google Calendar API
     GOOGLE_CALENDAR_CLIENT_ID = os.environ.get('GOOGLE_CALENDAR_CLIENT_ID')
@@ -33,6 +62,83 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
+    
+    # Event list response cache ('memory' or 'redis')
+    EVENT_CACHE_ENABLED = os.environ.get('EVENT_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    EVENT_CACHE_BACKEND = os.environ.get('EVENT_CACHE_BACKEND', 'memory')
+    EVENT_CACHE_URL = os.environ.get('EVENT_CACHE_URL')
+    EVENT_CACHE_MAX_ENTRIES = int(os.environ.get('EVENT_CACHE_MAX_ENTRIES', 1024))
+    EVENT_CACHE_TTL = int(os.environ.get('EVENT_CACHE_TTL', 60))  # seconds
+    
+    # Bulk import. Import bodies are streamed, so they have their own size
+    # limit rather than MAX_CONTENT_LENGTH (a 200k guest CSV is ~20MB)
+    IMPORT_MAX_CONTENT_LENGTH = int(os.environ.get('IMPORT_MAX_CONTENT_LENGTH', 512 * 1024 * 1024))
+    EVENT_IMPORT_CHUNK_SIZE = int(os.environ.get('EVENT_IMPORT_CHUNK_SIZE', 1000))
+    EVENT_IMPORT_MAX_ERRORS = int(os.environ.get('EVENT_IMPORT_MAX_ERRORS', 1000))
+    GUEST_IMPORT_CHUNK_SIZE = int(os.environ.get('GUEST_IMPORT_CHUNK_SIZE', 5000))
+    
+    # Seconds before the in-memory venue booking index reloads a venue
+    # (only used when the database has no exclusion constraint support)
+    VENUE_INDEX_TTL = int(os.environ.get('VENUE_INDEX_TTL', 300))
+    
+    # Venue double-booking checks of recurring series: how far ahead
+    # occurrences are checked, and the most expanded per series
+    VENUE_CONFLICT_HORIZON_DAYS = int(os.environ.get('VENUE_CONFLICT_HORIZON_DAYS', 365))
+    VENUE_CONFLICT_MAX_OCCURRENCES = int(os.environ.get('VENUE_CONFLICT_MAX_OCCURRENCES', 1000))
+    
+    # Seconds calendar clients may reuse a feed before revalidating
+    CALENDAR_FEED_MAX_AGE = int(os.environ.get('CALENDAR_FEED_MAX_AGE', 300))
+    
+    # Streaming exports: rows fetched from the server-side cursor per batch
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    
+    # Image thumbnails: widths generated for uploaded images, the width
+    # event lists link to (the largest generated width not above it) and
+    # the number of worker processes generating them
+    THUMBNAIL_WIDTHS = tuple(
+        int(w) for w in os.environ.get('THUMBNAIL_WIDTHS', '160,480,1024').split(',')
+    )
+    THUMBNAIL_DEFAULT_WIDTH = int(os.environ.get('THUMBNAIL_DEFAULT_WIDTH', 480))
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+    
+    # Most occurrences of a recurring series expanded per event per request
+    RECURRENCE_MAX_OCCURRENCES = int(os.environ.get('RECURRENCE_MAX_OCCURRENCES', 100))
+    
+    # Check-in write-behind buffer: scans waiting before an early flush,
+    # seconds between flushes, and seconds before an event roster reloads
+    CHECKIN_FLUSH_SIZE = int(os.environ.get('CHECKIN_FLUSH_SIZE', 200))
+    CHECKIN_FLUSH_INTERVAL = float(os.environ.get('CHECKIN_FLUSH_INTERVAL', 1.0))
+    CHECKIN_ROSTER_TTL = int(os.environ.get('CHECKIN_ROSTER_TTL', 300))
+    
+    # Rows per event holding its guest counters (raise for very hot events so
+    # concurrent RSVPs spread their increments), events recomputed per
+    # reconciliation transaction, and seconds between background
+    # reconciliations (0 = only via `flask reconcile-guest-counters`)
+    GUEST_COUNTER_SHARDS = int(os.environ.get('GUEST_COUNTER_SHARDS', 1))
+    GUEST_COUNTER_RECONCILE_BATCH_SIZE = int(os.environ.get('GUEST_COUNTER_RECONCILE_BATCH_SIZE', 1000))
+    GUEST_COUNTER_RECONCILE_INTERVAL = int(os.environ.get('GUEST_COUNTER_RECONCILE_INTERVAL', 0))
+    
+    # Staff double-booking checks: how far ahead open-ended checks and
+    # recurring assignments look, and the most occurrences expanded per series
+    STAFF_CONFLICT_HORIZON_DAYS = int(os.environ.get('STAFF_CONFLICT_HORIZON_DAYS', 180))
+    STAFF_CONFLICT_MAX_OCCURRENCES = int(os.environ.get('STAFF_CONFLICT_MAX_OCCURRENCES', 1000))
+    
+    # Most tasks a single bulk update may change
+    TASK_BULK_MAX_UPDATES = int(os.environ.get('TASK_BULK_MAX_UPDATES', 1000))
+    
+    # Critical path: hours of work assumed for open tasks without an estimate
+    TASK_DEFAULT_DURATION_HOURS = float(os.environ.get('TASK_DEFAULT_DURATION_HOURS', 1))
+    
+    # Most events a single bulk status change may touch
+    EVENT_BULK_MAX_IDS = int(os.environ.get('EVENT_BULK_MAX_IDS', 1000))
+    
+    # Archival of finished events: age (days after they end) at which
+    # completed/cancelled events move to the archive tables, events moved per
+    # transaction, and seconds between background runs (0 = only via the
+    # `flask archive-events` command)
+    EVENT_ARCHIVE_AFTER_DAYS = int(os.environ.get('EVENT_ARCHIVE_AFTER_DAYS', 365))
+    EVENT_ARCHIVE_BATCH_SIZE = int(os.environ.get('EVENT_ARCHIVE_BATCH_SIZE', 500))
+    EVENT_ARCHIVE_INTERVAL = int(os.environ.get('EVENT_ARCHIVE_INTERVAL', 0))
 
 class DevelopmentConfig(Config):
     DEBUG = True
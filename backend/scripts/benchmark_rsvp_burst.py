@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Burst benchmark for capacity-limited RSVPs.
+
+Creates a published event with a seat limit and one attendee account per
+guest, then has every guest accept at the same moment from a thread pool.
+Reports throughput and latency, checks that the event was not oversold and
+that everyone else is on the waitlist, and then declines some accepted
+guests to check that the waitlist is promoted in order.
+
+Point DATABASE_URL at a scratch PostgreSQL database to measure real
+contention (SQLite serializes all writers). The script leaves its event and
+users behind.
+
+Usage:
+    python scripts/benchmark_rsvp_burst.py --guests 1000 --capacity 200 --workers 32
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import db
+from app.models.user import User, UserRole
+from app.models.event import Event, EventStatus, EventGuest
+from app.models.reservation import EventCapacity, WaitlistEntry
+from app.services.reservation_service import respond
+
+def seed(app, guests, capacity):
+    """Create the event and attendee accounts; returns (event_id, user_ids)"""
+    run = uuid.uuid4().hex[:8]
+    with app.app_context():
+        organizer = User(email=f'organizer-{run}@bench.example.com', first_name='Bench',
+                         last_name='Organizer', password_hash='x', role=UserRole.ORGANIZER)
+        db.session.add(organizer)
+        db.session.flush()
+        start = datetime.utcnow() + timedelta(days=30)
+        event = Event(title=f'RSVP burst {run}', start_time=start, end_time=start + timedelta(hours=3),
+                      organizer_id=organizer.id, max_attendees=capacity, status=EventStatus.PUBLISHED)
+        users = [
+            User(email=f'guest-{run}-{i}@bench.example.com', first_name='Guest', last_name=str(i),
+                 password_hash='x', role=UserRole.ATTENDEE)
+            for i in range(guests)
+        ]
+        db.session.add(event)
+        db.session.add_all(users)
+        db.session.commit()
+        return event.id, [user.id for user in users]
+
+def burst(app, event_id, user_ids, workers, status='accepted'):
+    """Send one RSVP per user at once; returns (results, latencies, errors, seconds)"""
+    latencies, errors = [], []
+
+    def rsvp(user_id):
+        with app.app_context():
+            try:
+                user = db.session.get(User, user_id)
+                started = time.perf_counter()
+                result = respond(event_id, user, status)
+                latencies.append(time.perf_counter() - started)
+                return result
+            except Exception as e:
+                errors.append(repr(e))
+                return None
+            finally:
+                db.session.remove()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(rsvp, user_ids))
+    return results, latencies, errors, time.perf_counter() - started
+
+def report(title, results, latencies, errors, seconds):
+    latencies = sorted(latencies)
+    print(f"\n{title}")
+    print(f"  requests: {len(results)}  errors: {len(errors)}  time: {seconds:.2f}s  "
+          f"throughput: {len(results) / seconds:.0f}/s")
+    if latencies:
+        print(f"  latency ms: median {statistics.median(latencies) * 1000:.1f}  "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}  "
+              f"max {latencies[-1] * 1000:.1f}")
+    for error in errors[:5]:
+        print(f"  error: {error}")
+
+def verify(app, event_id, capacity, guests):
+    """Check the ledger, the guest list and the waitlist agree; returns accepted count"""
+    with app.app_context():
+        statuses = dict(db.session.query(EventGuest.rsvp_status, db.func.count()).filter(
+            EventGuest.event_id == event_id
+        ).group_by(EventGuest.rsvp_status).all())
+        ledger = db.session.get(EventCapacity, event_id)
+        waiting = WaitlistEntry.query.filter_by(event_id=event_id).count()
+        accepted = statuses.get('accepted', 0)
+        print(f"  guests by status: {statuses}  ledger reserved: {ledger.reserved}/{ledger.capacity}  "
+              f"waitlist: {waiting}")
+        assert accepted <= capacity, "event was oversold"
+        assert ledger.reserved == accepted, "ledger disagrees with the guest list"
+        assert waiting == statuses.get('waitlisted', 0), "waitlist disagrees with the guest list"
+        assert sum(statuses.values()) == guests, "some RSVPs were lost"
+        return accepted
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guests', type=int, default=1000)
+    parser.add_argument('--capacity', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--declines', type=int, default=50)
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    app.config['SQLALCHEMY_ECHO'] = False
+    with app.app_context():
+        db.create_all()
+
+    event_id, user_ids = seed(app, args.guests, args.capacity)
+    report('Accept burst', *burst(app, event_id, user_ids, args.workers))
+    accepted = verify(app, event_id, args.capacity, args.guests)
+    assert accepted == min(args.capacity, args.guests), "free seats were left unfilled"
+
+    with app.app_context():
+        first_waiting = [guest_id for (guest_id,) in db.session.query(WaitlistEntry.guest_id).filter_by(
+            event_id=event_id
+        ).order_by(WaitlistEntry.priority.desc(), WaitlistEntry.id).limit(args.declines)]
+        accepted_users = db.session.query(User.id).join(
+            EventGuest, db.func.lower(EventGuest.email) == User.email
+        ).filter(EventGuest.event_id == event_id, EventGuest.rsvp_status == 'accepted') \
+         .limit(args.declines).all()
+    report('Decline burst (promotes the waitlist)',
+           *burst(app, event_id, [user_id for (user_id,) in accepted_users], args.workers, 'declined'))
+    verify(app, event_id, args.capacity, args.guests)
+
+    with app.app_context():
+        promoted = EventGuest.query.filter(EventGuest.id.in_(first_waiting)).all()
+        assert all(guest.rsvp_status == 'accepted' for guest in promoted), \
+            "waitlist was not promoted in order"
+    print("\nNo overselling; waitlist promoted in order.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Re-planning benchmark: one PUT per task versus one bulk PATCH.
+
+Seeds an event with tasks that each have a few assignees, then re-plans
+every task (new status, priority and due date) twice: once through
+PUT /tasks/<id> per task and once through a single PATCH /tasks/bulk.
+Reports end-to-end time and SQL statement counts for both and checks that
+the bulk request left the tasks in the requested state.
+
+Point DATABASE_URL at a scratch database. The script leaves its event,
+tasks and users behind.
+
+Usage:
+    python scripts/benchmark_task_bulk.py --tasks 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import url_for
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models.task import Task, TaskStatus, TaskPriority
+from scripts.benchmark_task_queries import seed, count_queries
+
+def plan(task_ids, day):
+    """A re-plan moving every task to a new status, priority and due date"""
+    statuses = [TaskStatus.IN_PROGRESS, TaskStatus.BLOCKED, TaskStatus.TODO]
+    priorities = [TaskPriority.HIGH, TaskPriority.LOW]
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=day)
+    return [{
+        'id': task_id,
+        'status': statuses[i % len(statuses)].value,
+        'priority': priorities[i % len(priorities)].value,
+        'due_date': (start + timedelta(hours=i)).isoformat()
+    } for i, task_id in enumerate(task_ids)]
+
+def timed(app, requests):
+    """Run ``requests`` (callables returning responses); returns (seconds, statements, statuses)"""
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as statements:
+        started = time.perf_counter()
+        statuses = [request().status_code for request in requests]
+        elapsed = time.perf_counter() - started
+    return elapsed, len(statements), statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--assignees', type=int, default=3)
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    app.config['SQLALCHEMY_ECHO'] = False
+    with app.app_context():
+        db.create_all()
+
+    organizer_id, event_id, task_ids = seed(app, args.tasks, args.assignees)
+    with app.app_context():
+        headers = {'Authorization': f'Bearer {create_access_token(identity=organizer_id)}'}
+    with app.test_request_context():
+        bulk_url = url_for('api.tasks_task_bulk_update')
+        task_urls = {task_id: url_for('api.tasks_task_resource', task_id=task_id) for task_id in task_ids}
+    client = app.test_client()
+
+    assignees = {}
+    with app.app_context():
+        for task in Task.query.filter(Task.id.in_(task_ids)):
+            assignees[task.id] = [a.assignee_id for a in task.assignments]
+
+    one_by_one = plan(task_ids, 10)
+    for update in one_by_one:
+        update['assignee_ids'] = assignees[update['id']]
+    put_seconds, put_statements, put_statuses = timed(app, [
+        (lambda update=update: client.put(task_urls[update['id']], json=update, headers=headers))
+        for update in one_by_one
+    ])
+    assert set(put_statuses) == {200}, f"PUT returned {sorted(set(put_statuses))}"
+
+    bulk = plan(task_ids, 20)
+    bulk_seconds, bulk_statements, bulk_statuses = timed(app, [
+        lambda: client.patch(bulk_url, json={'updates': bulk}, headers=headers)
+    ])
+    assert bulk_statuses == [200], f"bulk PATCH returned {bulk_statuses}"
+
+    with app.app_context():
+        rows = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids))}
+        for update in bulk:
+            task = rows[update['id']]
+            assert task.status.value == update['status'] and task.priority.value == update['priority']
+            assert task.due_date.isoformat() == update['due_date']
+
+    print(f"{'re-plan of ' + str(len(task_ids)) + ' tasks':<28}{'ms':>10}{'statements':>12}")
+    print(f"{'PUT per task':<28}{put_seconds * 1000:>10.1f}{put_statements:>12}")
+    print(f"{'PATCH /tasks/bulk':<28}{bulk_seconds * 1000:>10.1f}{bulk_statements:>12}")
+    print(f"\nBulk update is {put_seconds / bulk_seconds:.0f}x faster.")
+
+if __name__ == "__main__":
+    main()
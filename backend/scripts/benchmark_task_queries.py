@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Query-count benchmark for the task list and detail endpoints.
+
+Seeds an event with tasks that each have several assignees (every task
+names different users), then requests the task list at several page sizes
+and a few task details, counting the SQL statements each request runs.
+The counts must not grow with the page size or the number of assignees;
+the script fails if they do.
+
+Point DATABASE_URL at a scratch database. The script leaves its event,
+tasks and users behind.
+
+Usage:
+    python scripts/benchmark_task_queries.py --tasks 200 --assignees 3
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import url_for
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event as sa_event
+
+from app import db
+from app.models.user import User, UserRole
+from app.models.event import Event
+from app.models.task import Task, TaskAssignment
+
+def seed(app, tasks, assignees):
+    """Create the organizer, event, tasks and assignees; returns (organizer_id, event_id, task_ids)"""
+    run = uuid.uuid4().hex[:8]
+    with app.app_context():
+        organizer = User(email=f'organizer-{run}@bench.example.com', first_name='Bench',
+                         last_name='Organizer', password_hash='x', role=UserRole.ORGANIZER)
+        db.session.add(organizer)
+        db.session.flush()
+        start = datetime.utcnow() + timedelta(days=30)
+        event = Event(title=f'Task queries {run}', start_time=start, end_time=start + timedelta(hours=3),
+                      organizer_id=organizer.id)
+        staff = [
+            User(email=f'staff-{run}-{i}@bench.example.com', first_name='Staff', last_name=str(i),
+                 password_hash='x', role=UserRole.STAFF)
+            for i in range(tasks * assignees)
+        ]
+        db.session.add(event)
+        db.session.add_all(staff)
+        db.session.flush()
+
+        rows = [
+            Task(title=f'Task {i}', event_id=event.id, created_by=staff[i * assignees].id,
+                 due_date=start - timedelta(hours=i))
+            for i in range(tasks)
+        ]
+        db.session.add_all(rows)
+        db.session.flush()
+        db.session.add_all(
+            TaskAssignment(task_id=task.id, assignee_id=staff[i * assignees + j].id,
+                           assigned_by=staff[(i * assignees + j + 1) % len(staff)].id)
+            for i, task in enumerate(rows) for j in range(assignees)
+        )
+        db.session.commit()
+        return organizer.id, event.id, [task.id for task in rows]
+
+@contextmanager
+def count_queries(engine):
+    """Count the statements run on ``engine`` inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        sa_event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def measure(app, client, headers, endpoint, **values):
+    """Request an endpoint; returns (status, query count, items, milliseconds)"""
+    with app.test_request_context():
+        url = url_for(endpoint, **values)
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as statements:
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        elapsed = (time.perf_counter() - started) * 1000
+    body = response.get_json()
+    items = len(body['items']) if isinstance(body, dict) and 'items' in body else 1
+    return response.status_code, len(statements), items, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--assignees', type=int, default=3)
+    parser.add_argument('--page-sizes', default='1,5,20,50,100')
+    args = parser.parse_args()
+
+    from app import create_app
+    app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    app.config['SQLALCHEMY_ECHO'] = False
+    with app.app_context():
+        db.create_all()
+
+    organizer_id, event_id, task_ids = seed(app, args.tasks, args.assignees)
+    with app.app_context():
+        headers = {'Authorization': f'Bearer {create_access_token(identity=organizer_id)}'}
+    client = app.test_client()
+
+    counts = {}
+    print(f"{'request':<32}{'status':>8}{'items':>8}{'queries':>9}{'ms':>9}")
+    for per_page in (int(size) for size in args.page_sizes.split(',')):
+        for mode, extra in (('page', {}), ('cursor', {'cursor': ''})):
+            status, queries, items, elapsed = measure(
+                app, client, headers, 'api.tasks_task_list', event_id=event_id, per_page=per_page, **extra
+            )
+            counts.setdefault(mode, set()).add(queries)
+            print(f"{f'list {mode} per_page={per_page}':<32}{status:>8}{items:>8}{queries:>9}{elapsed:>9.1f}")
+            assert status == 200, f"task list returned {status}"
+
+    for task_id in task_ids[:3]:
+        status, queries, items, elapsed = measure(app, client, headers, 'api.tasks_task_resource', task_id=task_id)
+        counts.setdefault('detail', set()).add(queries)
+        print(f"{f'detail {task_id}':<32}{status:>8}{items:>8}{queries:>9}{elapsed:>9.1f}")
+        assert status == 200, f"task detail returned {status}"
+
+    for mode, seen in counts.items():
+        assert len(seen) == 1, f"{mode} query count varies with the page: {sorted(seen)}"
+    print(f"\nQuery counts are constant: {', '.join(f'{mode} {seen.pop()}' for mode, seen in counts.items())}")
+
+if __name__ == "__main__":
+    main()
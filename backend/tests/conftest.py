@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.models.event import Event, EventStatus
+from app.models.user import User, UserRole
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh in-memory SQLite database with organizer 1 and published event 1"""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SECRET_KEY='test',
+        UPLOAD_FOLDER=str(tmp_path),
+        THUMBNAIL_WIDTHS=(160, 480)
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [{
+            'id': 1, 'email': 'organizer@example.com', 'password_hash': 'x',
+            'first_name': 'Olive', 'last_name': 'Organizer', 'role': UserRole.ORGANIZER
+        }])
+        db.session.execute(Event.__table__.insert(), [{
+            'id': 1, 'title': 'Launch', 'organizer_id': 1, 'status': EventStatus.PUBLISHED,
+            'start_time': datetime(2030, 5, 1, 18), 'end_time': datetime(2030, 5, 1, 21)
+        }])
+        db.session.commit()
+        yield app
+        db.session.remove()
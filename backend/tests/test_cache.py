@@ -0,0 +1,57 @@
+import time
+from unittest.mock import patch
+
+from app.utils.cache import LRUCache, TaggedCache
+
+def test_lru_eviction_and_ttl():
+    """Test that the least recently used entry is evicted and TTLs expire."""
+    cache = LRUCache(max_entries=2, default_ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+    now = time.monotonic()
+    with patch('app.utils.cache.time.monotonic', return_value=now + 61):
+        assert cache.get('a') is None
+
+def test_tag_invalidation_and_stats():
+    """Test that bumping a tag invalidates only the entries carrying it."""
+    cache = TaggedCache(LRUCache())
+    cache.set('list:1', {'items': [1]}, ['scope:user:1', 'event:10'])
+    cache.set('list:2', {'items': [2]}, ['scope:user:2', 'event:20'])
+
+    assert cache.get('list:1') == {'items': [1]}
+    cache.invalidate(['event:10'])
+    assert cache.get('list:1') is None
+    assert cache.get('list:2') == {'items': [2]}
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+
+def test_snapshot_covers_racing_writes():
+    """Test that a write during computation invalidates the stored value."""
+    cache = TaggedCache(LRUCache())
+    snapshot = cache.generations(['scope:admin'])
+    cache.invalidate(['scope:admin'])  # Write lands while the page is computed
+    cache.set('list:admin', {'items': []}, ['scope:admin'], snapshot=snapshot)
+    assert cache.get('list:admin') is None
+
+def test_evicted_counters_do_not_revive_stale_entries():
+    """Test that tag counters are bounded and dropping one never validates old entries."""
+    backend = LRUCache(max_entries=10, max_counters=2)
+    cache = TaggedCache(backend)
+    cache.set('event:1', 'before', ['event:1'])
+    stale = backend.get('event:1')
+    cache.invalidate(['event:1'])
+    cache.invalidate(['event:2', 'event:3'])  # Evicts the counter of event:1
+
+    assert len(backend._counters) == 2
+    backend.set('event:1', stale)
+    assert cache.get('event:1') is None
+    cache.set('event:1', 'after', ['event:1'])
+    assert cache.get('event:1') == 'after'
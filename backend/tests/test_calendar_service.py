@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from app import db
+from app.models.event import Event
+from app.services.calendar_service import feed_validator
+
+def test_feed_validator_changes_with_membership(app):
+    """Test that swapping one feed event for an older one changes the ETag."""
+    db.session.add_all([
+        Event(id=event_id, title=f'Event {event_id}', organizer_id=1,
+              start_time=datetime(2030, 6, event_id, 18), end_time=datetime(2030, 6, event_id, 21),
+              updated_at=datetime(2020, 1, 1))
+        for event_id in (2, 3)
+    ])
+    db.session.get(Event, 1).updated_at = datetime(2024, 1, 1)
+    db.session.commit()
+
+    etag, last_modified = feed_validator(Event.query.filter(Event.id.in_([1, 2])))
+    swapped, swapped_modified = feed_validator(Event.query.filter(Event.id.in_([1, 3])))
+    assert last_modified == swapped_modified == datetime(2024, 1, 1)
+    assert etag != swapped
+    assert feed_validator(Event.query.filter(Event.id.in_([2, 1])))[0] == etag
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models.email import EmailCampaign, OutboxMessage
+from app.models.event import Event, EventGuest, EventStatus
+from app.models.guest_counter import EventGuestCounter
+from app.models.reservation import EventCapacity, WaitlistEntry
+from app.models.task import Task, TaskDependency, TaskPriority, TaskReminder, TaskStatus
+
+@pytest.fixture
+def events(app):
+    """A second event, and two tasks for each event."""
+    db.session.execute(Event.__table__.insert(), [{
+        'id': 2, 'title': 'Afterparty', 'organizer_id': 1, 'status': EventStatus.PUBLISHED,
+        'start_time': datetime(2030, 5, 1, 21), 'end_time': datetime(2030, 5, 1, 23)
+    }])
+    db.session.execute(Task.__table__.insert(), [{
+        'id': task_id, 'title': f'Task {task_id}', 'event_id': event_id, 'created_by': 1,
+        'status': TaskStatus.TODO, 'priority': TaskPriority.MEDIUM
+    } for task_id, event_id in ((1, 1), (2, 1), (3, 2), (4, 2))])
+    db.session.commit()
+
+def populate(event_id):
+    """Give an event rows in every table that cascades from it."""
+    db.session.add(EventGuest(event_id=event_id, email=f'guest{event_id}@example.com',
+                              first_name='Guest', last_name='Test', rsvp_status='accepted'))
+    waiting = EventGuest(event_id=event_id, email=f'waiting{event_id}@example.com',
+                         first_name='Guest', last_name='Test', rsvp_status='waitlisted')
+    db.session.add(waiting)
+    db.session.add(EventCapacity(event_id=event_id, capacity=1, reserved=1))
+    db.session.flush()
+    db.session.add(WaitlistEntry(event_id=event_id, guest_id=waiting.id))
+    campaign = EmailCampaign(event_id=event_id, subject='Hi', body='Come')
+    db.session.add(campaign)
+    db.session.flush()
+    db.session.add(OutboxMessage(campaign_id=campaign.id, guest_id=waiting.id, to_email=waiting.email))
+    first, second = (task.id for task in Task.query.filter_by(event_id=event_id).order_by(Task.id))
+    db.session.add(TaskDependency(task_id=second, depends_on_id=first, event_id=event_id))
+    db.session.add(TaskReminder(task_id=first, due_date=datetime(2030, 5, 1), lead_minutes=60))
+
+def remaining(model):
+    return sorted({row.event_id for row in model.query})
+
+def test_event_delete_follows_declared_cascades(events):
+    """Test that deleting an event removes its dependent rows, grandchildren included."""
+    for event_id in (1, 2):
+        populate(event_id)
+    db.session.commit()
+
+    db.session.delete(db.session.get(Event, 1))
+    db.session.commit()
+
+    assert remaining(EventGuestCounter) == [2]
+    assert remaining(EventCapacity) == remaining(WaitlistEntry) == [2]
+    assert remaining(EmailCampaign) == [2]
+    assert [campaign_id for (campaign_id,) in db.session.query(OutboxMessage.campaign_id)] == \
+        [campaign.id for campaign in EmailCampaign.query]
+    assert remaining(Task) == remaining(TaskDependency) == [2]
+    assert [reminder.task_id for reminder in TaskReminder.query] == [3]
+
+def test_task_delete_removes_its_edges_and_reminders(events):
+    """Test that a deleted task takes its reminders and the edges on either side with it."""
+    populate(2)
+    db.session.commit()
+
+    db.session.delete(db.session.get(Task, 3))
+    db.session.commit()
+
+    assert TaskDependency.query.count() == TaskReminder.query.count() == 0
+    assert [task.id for task in Task.query.order_by(Task.id)] == [1, 2, 4]
@@ -0,0 +1,77 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app import db
+from app.models.event import EventGuest
+from app.services.checkin_service import (
+    CheckInRegistry, EventRoster, ticket_code, parse_ticket, _load_roster,
+    CHECKED_IN, DUPLICATE, INVALID
+)
+
+def make_registry(guests, written, flush_size=100):
+    def load_roster(event_id):
+        if event_id != 1:
+            return None
+        return EventRoster(1, organizer_id=10, staff_ids=[11], guests=dict(guests))
+    return CheckInRegistry(load_roster, written.extend, flush_size=flush_size)
+
+def test_ticket_codes_are_signed(app):
+    """Test that ticket codes round-trip and tampered codes are rejected."""
+    code = ticket_code(SimpleNamespace(event_id=1, id=42))
+    assert parse_ticket(code) == (1, 42)
+    assert parse_ticket(code[:-2] + 'xx') is None
+    assert parse_ticket('garbage') is None
+
+def test_duplicate_scans_are_caught_in_memory():
+    """Test that repeat scans are duplicates and writes wait for a flush."""
+    earlier = datetime(2024, 5, 1, 9, 0)
+    written = []
+    registry = make_registry({1: None, 2: None, 3: earlier}, written)
+
+    assert registry.check_in(1, 1)[0] == CHECKED_IN
+    assert registry.check_in(1, 1)[0] == DUPLICATE
+    assert registry.check_in(1, 3) == (DUPLICATE, earlier)
+    assert registry.check_in(1, 99)[0] == INVALID
+    assert registry.check_in(2, 1)[0] == INVALID
+    assert written == []
+
+    assert registry.flush() == 1
+    assert [row['guest_id'] for row in written] == [1]
+    assert registry.pending_count() == 0
+
+def test_reload_keeps_unflushed_check_ins():
+    """Test that reloading a roster doesn't forget buffered scans."""
+    written = []
+    registry = make_registry({1: None}, written)
+    registry.check_in(1, 1)
+    registry.roster(1, max_age=0)
+    assert registry.check_in(1, 1)[0] == DUPLICATE
+
+def test_failed_flush_is_retried():
+    """Test that a failed write puts the batch back in the buffer."""
+    def fail(rows):
+        raise RuntimeError('database down')
+    registry = make_registry({1: None, 2: None}, [])
+    registry.write_batch = fail
+    registry.check_in(1, 1)
+    registry.check_in(1, 2)
+    with pytest.raises(RuntimeError):
+        registry.flush()
+    assert registry.pending_count() == 2
+
+def test_only_accepted_guests_can_check_in(app):
+    """Test that tickets of declined or waitlisted guests are rejected."""
+    guests = {}
+    for status in ('accepted', 'declined', 'waitlisted'):
+        guest = EventGuest(event_id=1, email=f'{status}@example.com', first_name='Guest',
+                           last_name='Test', rsvp_status=status)
+        db.session.add(guest)
+        guests[status] = guest
+    db.session.commit()
+
+    registry = CheckInRegistry(lambda event_id: _load_roster(db.session.connection(), event_id), [].extend)
+    assert registry.check_in(1, guests['accepted'].id)[0] == CHECKED_IN
+    assert registry.check_in(1, guests['declined'].id)[0] == INVALID
+    assert registry.check_in(1, guests['waitlisted'].id)[0] == INVALID
@@ -0,0 +1,157 @@
+import socket
+import socketserver
+import string
+import threading
+from datetime import datetime
+from email import message_from_bytes
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.email_service import (
+    render_for_event, personalize, build_messages, retry_delay, RateLimiter, SmtpTransport
+)
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to stand in for a mail server"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 stand-in ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().rstrip('\r\n')
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if address in self.server.rejected:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in iter(self.rfile.readline, b''):
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                self.server.messages.append((recipients, message_from_bytes(b''.join(lines))))
+                self.reply('250 Queued')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Not implemented')
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SmtpHandler)
+    server.daemon_threads = True
+    server.messages = []
+    server.rejected = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _event(**values):
+    defaults = dict(title='Launch', start_time=datetime(2024, 3, 1, 9), timezone='UTC',
+                    location='Hall A', virtual_meeting_url=None, description='')
+    defaults.update(values)
+    return SimpleNamespace(**defaults)
+
+def _guest(email, first_name='Ada', last_name='Lovelace', row_id=1):
+    return {'id': row_id, 'campaign_id': 1, 'to_email': email,
+            'first_name': first_name, 'last_name': last_name, 'attempts': 1}
+
+def test_render_once_then_personalize():
+    """Test that event details are rendered up front and guest fields per message."""
+    subject, body = render_for_event(
+        _event(title='Tickets $5 off'), 'Invite: $event_title', 'Hi $first_name, costs $$10. $message',
+        message='Bring $$ cash'
+    )
+    assert subject == 'Invite: Tickets $$5 off'
+    assert '$first_name' in body
+    text = personalize(string.Template(body), _guest('ada@example.com'))
+    assert text == 'Hi Ada, costs $10. Bring $$ cash'
+    assert personalize(string.Template(subject), _guest('ada@example.com')) == 'Invite: Tickets $5 off'
+
+def test_batch_delivered_over_one_connection(smtp_server):
+    """Test that a batch reaches the stand-in server and a rejected recipient fails permanently."""
+    smtp_server.rejected.add('gone@example.com')
+    subject, body = render_for_event(_event(), 'Invite: $event_title', 'Hi $first_name $last_name')
+    rows = [_guest('ada@example.com', row_id=1), _guest('gone@example.com', 'Gone', row_id=2),
+            _guest('alan@example.com', 'Alan', 'Turing', row_id=3)]
+    built, failed = build_messages(rows, {1: (string.Template(subject), string.Template(body))},
+                                   'events@example.com')
+    assert failed == []
+    messages = [message for _, message in built]
+    transport = SmtpTransport('127.0.0.1', smtp_server.server_address[1], timeout=5)
+
+    throttled = []
+    results = transport.send_batch(messages, throttle=lambda: throttled.append(1))
+
+    assert results[0] is None and results[2] is None
+    assert results[1][0] is True
+    assert len(throttled) == 3
+    received = {recipients[0]: message for recipients, message in smtp_server.messages}
+    assert set(received) == {'ada@example.com', 'alan@example.com'}
+    assert received['alan@example.com']['Subject'] == 'Invite: Launch'
+    assert received['alan@example.com'].get_payload().strip() == 'Hi Alan Turing'
+
+def test_unreachable_server_is_a_temporary_failure():
+    """Test that connection errors mark the whole batch for retry."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    transport = SmtpTransport('127.0.0.1', port, timeout=2)
+    built, _ = build_messages(
+        [_guest('ada@example.com')], {1: (string.Template('s'), string.Template('b'))}, 'events@example.com'
+    )
+    results = transport.send_batch([message for _, message in built])
+    assert len(results) == 1 and results[0][0] is False
+
+def test_unbuildable_row_fails_alone():
+    """Test that a header injection in one guest fails that row without aborting the batch."""
+    templates = {1: (string.Template('Hi $first_name'), string.Template('b'))}
+    rows = [_guest('ada@example.com', row_id=1), _guest('bob@example.com', 'Bob\r\nBcc: x@example.com', row_id=2),
+            _guest('eve@example.com\nBcc: x@example.com', row_id=3)]
+    built, failed = build_messages(rows, templates, 'events@example.com')
+    assert [row['id'] for row, _ in built] == [1]
+    assert [row['id'] for row, _ in failed] == [2, 3]
+    assert all(error.startswith('Invalid message') for _, error in failed)
+
+def test_rate_limiter_spaces_out_sends():
+    """Test that the token bucket allows a burst and then waits 1/rate per message."""
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(rate=2, burst=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        limiter.acquire()
+    assert slept == [pytest.approx(0.5), pytest.approx(0.5)]
+
+def test_retry_delay_backs_off_exponentially():
+    """Test that retry delays double per attempt within the jitter range."""
+    assert 30 <= retry_delay(1, 60) <= 60
+    assert 120 <= retry_delay(3, 60) <= 240
+    assert retry_delay(40, 60) <= 86400
@@ -0,0 +1,160 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import event as sa_event
+
+from app import db
+from app.models.budget import Budget, BudgetItem, ExpenseCategory
+from app.models.event import Event, EventGuest, EventStaff, EventStatus, EventVendor
+from app.models.task import Task, TaskAssignment
+from app.models.user import User, UserRole
+from app.models.venue import Venue
+from app.services import event_service, notification_service, search_service
+
+def search(term):
+    matches = search_service.search_subquery(term)
+    return [event_id for (event_id,) in db.session.query(matches.c.event_id).order_by(matches.c.event_id)]
+
+def test_create_event_indexes_on_a_fresh_database(app):
+    """Test that events can be created and found without running the index command first."""
+    organizer = db.session.get(User, 1)
+    body, status = event_service.create_event({
+        'title': 'Harbour lantern festival',
+        'start_time': '2030-06-01T18:00:00',
+        'end_time': '2030-06-01T23:00:00'
+    }, organizer)
+    assert status == 201
+    event_id = body['event']['id']
+    assert search('lantern') == [event_id]
+
+    body = event_service.update_event(event_id, {'title': 'Harbour kite festival'}, organizer)
+    assert body['event']['title'] == 'Harbour kite festival'
+    assert search('lantern') == []
+    assert search('kite') == [event_id]
+
+def test_participant_counts_are_batched(app):
+    """Test that a page of events is serialized with per-event participant counts."""
+    db.session.add_all([
+        User(id=2, email='crew@example.com', password_hash='x', first_name='Cy',
+             last_name='Crew', role=UserRole.STAFF),
+        Event(id=2, title='Quiet', organizer_id=1,
+              start_time=datetime(2030, 6, 1, 18), end_time=datetime(2030, 6, 1, 21)),
+        EventStaff(event_id=1, staff_id=2, role='Door', allow_conflicts=True),
+        EventVendor(event_id=1, vendor_id=2, service_type='Catering'),
+        EventVendor(event_id=1, vendor_id=1, service_type='Sound'),
+    ] + [
+        EventGuest(event_id=1, email=f'guest{i}@example.com', first_name='G', last_name='Uest')
+        for i in range(3)
+    ])
+    db.session.commit()
+
+    assert Event.participant_counts([1, 2, 3]) == {
+        1: {'guest_count': 3, 'vendor_count': 2, 'staff_count': 1},
+        2: {'guest_count': 0, 'vendor_count': 0, 'staff_count': 0},
+    }
+    assert Event.participant_counts([]) == {}
+
+    items = event_service.serialize_events(Event.query.order_by(Event.id).all())
+    assert [(item['id'], item['guest_count'], item['vendor_count'], item['staff_count'])
+            for item in items] == [(1, 3, 2, 1), (2, 0, 0, 0)]
+    assert db.session.get(Event, 1).to_dict()['guest_count'] == 3
+
+def count_queries(call):
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = call()
+    finally:
+        sa_event.remove(db.engine, 'before_cursor_execute', record)
+    return result, len(statements)
+
+def add_task(title, assignee_id=None):
+    task = Task(event_id=1, title=title, created_by=1)
+    db.session.add(task)
+    db.session.flush()
+    if assignee_id is not None:
+        db.session.add(TaskAssignment(task_id=task.id, assignee_id=assignee_id, assigned_by=1))
+    return task
+
+def test_dashboard_in_a_fixed_number_of_queries(app):
+    """Test the dashboard's sections, its per-role filtering and its query count."""
+    db.session.add_all([
+        User(id=2, email='crew@example.com', password_hash='x', first_name='Cy',
+             last_name='Crew', role=UserRole.STAFF),
+        Venue(id=1, name='Hall', address_line1='1 Main St', city='Town', country='NZ'),
+        Budget(event_id=1, total_budget=500, created_by=1),
+        EventStaff(event_id=1, staff_id=2, role='Door'),
+        EventGuest(event_id=1, email='guest@example.com', first_name='G', last_name='Uest',
+                   rsvp_status='accepted'),
+    ])
+    db.session.get(Event, 1).venue_id = 1
+    add_task('Book the band')
+    add_task('Open the doors', assignee_id=2)
+    db.session.commit()
+    db.session.expunge_all()
+
+    organizer = SimpleNamespace(id=1, role='organizer')
+    body, queries = count_queries(lambda: event_service.get_event_dashboard(1, organizer))
+    assert body['event']['title'] == 'Launch'
+    assert body['venue']['name'] == 'Hall'
+    assert body['budget']['total_budget'] == 500
+    assert [task['title'] for task in body['tasks']] == ['Book the band', 'Open the doors']
+    assert [member['staff_id'] for member in body['staff']] == [2]
+    assert body['guest_stats']['accepted'] == 1
+
+    staff = SimpleNamespace(id=2, role='staff')
+    body = event_service.get_event_dashboard(1, staff)
+    assert body['budget'] is None
+    assert [task['title'] for task in body['tasks']] == ['Open the doors']
+
+    for i in range(5):
+        add_task(f'Task {i}', assignee_id=2)
+    db.session.add(BudgetItem(budget_id=1, category=ExpenseCategory.CATERING, description='Food',
+                              estimated_unit_cost=10, estimated_cost=10))
+    db.session.commit()
+    db.session.expunge_all()
+    assert count_queries(lambda: event_service.get_event_dashboard(1, organizer))[1] == queries
+
+def test_bulk_update_status_applies_legal_transitions_only(app, monkeypatch):
+    """Test that bulk status changes report illegal, foreign and missing events per id."""
+    db.session.add_all([
+        Event(id=event_id, title=f'Event {event_id}', organizer_id=organizer_id, status=status,
+              start_time=datetime(2030, 6, event_id, 18), end_time=datetime(2030, 6, event_id, 21))
+        for event_id, organizer_id, status in [
+            (2, 1, EventStatus.DRAFT), (3, 1, EventStatus.COMPLETED), (4, 2, EventStatus.DRAFT)
+        ]
+    ])
+    db.session.commit()
+    emitted = []
+    monkeypatch.setattr(notification_service, '_emit',
+                        lambda name, payload, room: emitted.append((name, room)))
+    organizer = SimpleNamespace(id=1, role='organizer')
+
+    body = event_service.bulk_update_status([4, 3, 2, 1, 99, '2'], 'cancelled', organizer)
+    assert body['updated'] == [1, 2]
+    assert body['unchanged'] == []
+    assert body['errors'] == [
+        {'event_id': 3, 'error': 'Cannot change status from completed to cancelled'},
+        {'event_id': 4, 'error': 'Not authorized to update this event'},
+        {'event_id': 99, 'error': 'Event not found'},
+    ]
+    statuses = dict(db.session.query(Event.id, Event.status))
+    assert statuses == {1: EventStatus.CANCELLED, 2: EventStatus.CANCELLED,
+                        3: EventStatus.COMPLETED, 4: EventStatus.DRAFT}
+    assert sorted(emitted) == [('event_status_changed', 'event_1'), ('event_status_changed', 'event_2'),
+                               ('event_status_changed_batch', 'user_1')]
+
+    # Cancelled events can only go back to draft
+    body = event_service.bulk_update_status([1], 'published', organizer)
+    assert body['updated'] == []
+    assert body['errors'] == [{'event_id': 1, 'error': 'Cannot change status from cancelled to published'}]
+    body = event_service.bulk_update_status([1, 4], 'draft', SimpleNamespace(id=2, role='admin'))
+    assert (body['updated'], body['unchanged']) == ([1], [4])
+
+    assert event_service.bulk_update_status([1], 'postponed', organizer)[1] == 400
+    assert event_service.bulk_update_status([], 'draft', organizer)[1] == 400
+    assert event_service.bulk_update_status(['one'], 'draft', organizer)[1] == 400
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from types import SimpleNamespace
+
+from app import db
+from app.models.event import EventGuest
+from app.services import export_service
+
+ORGANIZER = SimpleNamespace(id=1, role='organizer')
+
+def body(response):
+    return ''.join(chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in response.response)
+
+def add_guests(count):
+    db.session.add_all([
+        EventGuest(event_id=1, email=f'guest{i}@example.com', first_name='Guest', last_name=str(i))
+        for i in range(count)
+    ])
+    db.session.commit()
+
+def test_stream_rows_yields_one_chunk_per_batch(app):
+    """Test that rows are written out in EXPORT_BATCH_SIZE partitions."""
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    add_guests(5)
+    statement = export_service._select(EventGuest, ['id', 'email']).order_by(EventGuest.id)
+
+    chunks = list(export_service.stream_rows(statement, ['id', 'email'], 'ndjson'))
+    assert [chunk.count('\n') for chunk in chunks] == [2, 2, 1]
+    assert json.loads(chunks[0].splitlines()[0]) == {'id': 1, 'email': 'guest0@example.com'}
+
+    chunks = list(export_service.stream_rows(statement, ['id', 'email'], 'csv'))
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0] == ['id', 'email']
+    assert rows[1:] == [[str(i + 1), f'guest{i}@example.com'] for i in range(5)]
+
+def test_empty_csv_export_has_a_header(app):
+    """Test that a CSV export without rows still carries its header line."""
+    statement = export_service._select(EventGuest, ['id', 'email'])
+    assert list(export_service.stream_rows(statement, ['id', 'email'], 'csv')) == ['id,email\r\n']
+
+def test_export_event_guests(app):
+    """Test the guest list export's values, headers and permissions."""
+    add_guests(2)
+    with app.test_request_context():
+        response = export_service.export_event_guests(1, ORGANIZER, 'ndjson')
+        assert response.mimetype == 'application/x-ndjson'
+        assert response.headers['Content-Disposition'] == 'attachment; filename=event_1_guests.ndjson'
+        rows = [json.loads(line) for line in body(response).splitlines()]
+    assert [row['email'] for row in rows] == ['guest0@example.com', 'guest1@example.com']
+    assert set(rows[0]) == set(export_service.GUEST_COLUMNS)
+    assert rows[0]['rsvp_status'] == 'pending'
+
+    assert export_service.export_event_guests(1, SimpleNamespace(id=2, role='organizer'), 'csv')[1] == 403
+
+def test_export_events_scope(app):
+    """Test that organizers export their own events and other roles are refused."""
+    with app.test_request_context():
+        rows = list(csv.DictReader(io.StringIO(body(export_service.export_events(ORGANIZER, 'csv')))))
+        assert [(row['id'], row['title'], row['status']) for row in rows] == [('1', 'Launch', 'published')]
+        other = export_service.export_events(SimpleNamespace(id=2, role='organizer'), 'csv')
+        assert body(other).splitlines() == [','.join(export_service.EVENT_COLUMNS)]
+    assert export_service.export_events(SimpleNamespace(id=3, role='attendee'), 'csv')[1] == 403
@@ -0,0 +1,32 @@
+from app.models.guest_counter import guest_delta, guest_state, merge_deltas
+
+def test_guest_delta_insert_and_delete():
+    """Test that adding and removing a guest move the totals in opposite directions."""
+    added = guest_delta(None, guest_state('accepted', None))
+    assert added == {'accepted': 1, 'declined': 0, 'pending': 0, 'waitlisted': 0, 'checked_in': 0, 'total': 1}
+    removed = guest_delta(guest_state('accepted', None), None)
+    assert all(removed[column] == -value for column, value in added.items())
+
+def test_guest_delta_status_change_and_check_in():
+    """Test that an RSVP change moves one count and a check-in adds to checked_in only."""
+    assert guest_delta(guest_state('pending', None), guest_state('declined', None)) == {
+        'accepted': 0, 'declined': 1, 'pending': -1, 'waitlisted': 0, 'checked_in': 0, 'total': 0
+    }
+    assert guest_delta(guest_state('accepted', None), guest_state('accepted', 'now')) == {
+        'accepted': 0, 'declined': 0, 'pending': 0, 'waitlisted': 0, 'checked_in': 1, 'total': 0
+    }
+
+def test_guest_state_defaults_to_pending_and_unknown_statuses_count_in_total():
+    """Test that a missing RSVP counts as pending and other statuses only in total."""
+    assert guest_state(None, None) == ('pending', False)
+    assert guest_delta(None, guest_state('maybe', None))['total'] == 1
+    assert guest_delta(None, guest_state('maybe', None))['pending'] == 0
+
+def test_merge_deltas_accumulates_per_event():
+    """Test that deltas for the same event are summed."""
+    deltas = {}
+    merge_deltas(deltas, 1, guest_delta(None, guest_state('accepted', None)))
+    merge_deltas(deltas, 1, guest_delta(None, guest_state('declined', None)))
+    merge_deltas(deltas, 2, guest_delta(guest_state('pending', None), None))
+    assert deltas[1]['total'] == 2 and deltas[1]['accepted'] == 1 and deltas[1]['declined'] == 1
+    assert deltas[2]['total'] == -1 and deltas[2]['pending'] == -1
@@ -0,0 +1,158 @@
+import io
+import json
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.event import Event, EventGuest, EventType, EventStatus
+from app.models.guest_counter import EventGuestCounter
+from app.models.venue import Venue
+from app.services.import_service import (
+    iter_records, parse_event_record, parse_guest_record, import_events, import_guests,
+    _insert_guests, RowError
+)
+
+def test_iter_records_ndjson_reports_bad_lines():
+    """Test that NDJSON parsing yields records and flags bad lines in place."""
+    body = b'{"title": "A"}\n\nnot json\n[1, 2]\n{"title": "B"}\n'
+    records = list(iter_records(io.BytesIO(body), 'ndjson'))
+    assert records[0] == {"title": "A"}
+    assert isinstance(records[1], RowError)
+    assert isinstance(records[2], RowError)
+    assert records[3] == {"title": "B"}
+
+def test_iter_records_csv():
+    """Test that CSV rows are read as dictionaries."""
+    body = b'title,start_time,end_time\nLaunch,2024-03-01T09:00:00,2024-03-01T17:00:00\n'
+    records = list(iter_records(io.BytesIO(body), 'csv'))
+    assert records == [{
+        'title': 'Launch',
+        'start_time': '2024-03-01T09:00:00',
+        'end_time': '2024-03-01T17:00:00'
+    }]
+
+def test_parse_event_record_defaults_and_coercion():
+    """Test that CSV strings are coerced and defaults applied."""
+    values = parse_event_record({
+        'title': ' Launch ',
+        'start_time': '2024-03-01T09:00:00',
+        'end_time': '2024-03-01T17:00:00',
+        'max_attendees': '250',
+        'is_public': 'false',
+        'event_type': 'conference'
+    }, organizer_id=7)
+    assert values['title'] == 'Launch'
+    assert values['start_time'] == datetime(2024, 3, 1, 9)
+    assert values['max_attendees'] == 250
+    assert values['is_public'] is False
+    assert values['event_type'] == EventType.CONFERENCE
+    assert values['status'] == EventStatus.DRAFT
+    assert values['organizer_id'] == 7
+
+@pytest.mark.parametrize('record, message', [
+    ({'start_time': '2024-03-01T09:00:00', 'end_time': '2024-03-01T10:00:00'}, 'Title is required'),
+    ({'title': 'X', 'start_time': '2024-03-01T09:00:00'}, 'Start and end times are required'),
+    ({'title': 'X', 'start_time': 'soon', 'end_time': '2024-03-01T10:00:00'}, 'Invalid start_time'),
+    ({'title': 'X', 'start_time': '2024-03-01T11:00:00', 'end_time': '2024-03-01T10:00:00'},
+     'End time must be after start time'),
+    ({'title': 'X', 'start_time': '2024-03-01T10:00:00', 'end_time': '2024-03-01T10:00:00'},
+     'End time must be after start time'),
+    ({'title': 'X', 'start_time': '2024-03-01T09:00:00', 'end_time': '2024-03-01T10:00:00',
+      'event_type': 'rave'}, 'Invalid event_type'),
+])
+def test_parse_event_record_errors(record, message):
+    """Test per-row validation messages."""
+    with pytest.raises(RowError, match=message):
+        parse_event_record(record, organizer_id=1)
+
+def test_import_events_rejects_venue_conflicts_per_row(app):
+    """Test that double-booked rows are reported one by one and the rest imported."""
+    db.session.add(Venue(id=1, name='Hall', address_line1='1 Main St', city='Town', country='NZ'))
+    db.session.get(Event, 1).venue_id = 1
+    db.session.commit()
+
+    def row(title, start_hour, end_hour, venue_id=1, **values):
+        return dict(title=title, venue_id=venue_id, start_time=f'2030-05-01T{start_hour:02}:00:00',
+                    end_time=f'2030-05-01T{end_hour:02}:00:00', **values)
+
+    body = '\n'.join(json.dumps(record) for record in [
+        row('Clashes with the launch', 20, 22),
+        row('Morning', 9, 12),
+        row('Clashes with the morning', 11, 13),
+        row('Nowhere', 9, 12, venue_id=99),
+        row('Called off', 9, 12, status='cancelled'),
+        row('Afternoon', 12, 18),
+    ]).encode()
+    result = import_events(io.BytesIO(body), 'ndjson', SimpleNamespace(id=1, role='organizer'))
+
+    assert result['imported'] == 3
+    assert [(error['row'], error['error']) for error in result['errors']] == [
+        (1, 'Venue 1 is already booked for an overlapping event (event 1)'),
+        (3, 'Venue 1 is already booked for an overlapping event (row 2)'),
+        (4, 'Unknown venue_id'),
+    ]
+    titles = [title for (title,) in db.session.query(Event.title).order_by(Event.id)]
+    assert titles == ['Launch', 'Morning', 'Called off', 'Afternoon']
+
+def test_parse_guest_record_normalizes_email():
+    """Test that guest emails are trimmed and lower-cased and blanks become None."""
+    values = parse_guest_record({'email': ' Ada@Example.COM ', 'first_name': 'Ada', 'phone': ''})
+    assert values == {
+        'email': 'ada@example.com',
+        'first_name': 'Ada',
+        'last_name': None,
+        'phone': None,
+        'rsvp_status': None
+    }
+
+@pytest.mark.parametrize('record, message', [
+    ({'first_name': 'Ada'}, 'Email is required'),
+    ({'email': 'not-an-email'}, 'Invalid email'),
+    ({'email': 'a@b.io', 'rsvp_status': 'maybe'}, 'Invalid rsvp_status'),
+])
+def test_parse_guest_record_errors(record, message):
+    """Test per-row guest validation messages."""
+    with pytest.raises(RowError, match=message):
+        parse_guest_record(record)
+
+def test_import_guests_upserts_by_lowercased_email(app):
+    """Test that guests are matched by email in any case, in the file and on the list."""
+    db.session.execute(EventGuest.__table__.insert(), [{
+        'event_id': 1, 'email': 'Ada@Example.com', 'first_name': 'Ada', 'last_name': 'L',
+        'rsvp_status': 'pending'
+    }])
+    db.session.commit()
+
+    body = (b'email,first_name,last_name,rsvp_status\n'
+            b'ADA@example.com,Ada,Lovelace,accepted\n'
+            b'grace@example.com,Grace,Hopper,accepted\n'
+            b'Grace@Example.com,Grace,H,\n'
+            b'alan@example.com,Alan,Turing,\n')
+    result = import_guests(1, io.BytesIO(body), 'csv', SimpleNamespace(id=1, role='organizer'))
+    assert (result['inserted'], result['updated'], result['skipped']) == (2, 1, 1)
+
+    guests = {guest.email.lower(): guest for guest in EventGuest.query}
+    assert set(guests) == {'ada@example.com', 'grace@example.com', 'alan@example.com'}
+    assert (guests['ada@example.com'].last_name, guests['ada@example.com'].rsvp_status) == ('Lovelace', 'accepted')
+    assert EventGuestCounter.counts_for([1])[1]['accepted'] == 2
+
+def test_guest_emails_are_unique_per_event(app):
+    """Test that the unique index refuses a case variant and the upsert skips it."""
+    db.session.add(EventGuest(event_id=1, email='ada@example.com', first_name='Ada', last_name='L'))
+    db.session.commit()
+
+    db.session.add(EventGuest(event_id=1, email='ADA@example.com', first_name='Ada', last_name='L'))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+    now = datetime.utcnow()
+    _insert_guests([
+        {'event_id': 1, 'email': email, 'first_name': 'Ada', 'last_name': 'L', 'phone': None,
+         'rsvp_status': 'pending', 'created_at': now, 'updated_at': now}
+        for email in ('ada@example.com', 'grace@example.com')
+    ])
+    assert sorted(guest.email for guest in EventGuest.query) == ['ada@example.com', 'grace@example.com']
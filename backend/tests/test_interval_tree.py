@@ -0,0 +1,72 @@
+import random
+
+from app.utils.interval_tree import IntervalTree, overlapping_pairs
+
+def brute_force(intervals, start, end, exclude=None):
+    return sorted(
+        key for key, (s, e) in intervals.items()
+        if s < end and e > start and key != exclude
+    )
+
+def test_half_open_overlaps():
+    """Test that touching intervals do not count as overlapping."""
+    tree = IntervalTree()
+    tree.add(10, 20, 'a')
+    tree.add(20, 30, 'b')
+    assert tree.overlapping(20, 25) == ['b']
+    assert tree.first_overlap(0, 10) is None
+    assert tree.first_overlap(15, 16) == 'a'
+    assert tree.first_overlap(15, 16, exclude='a') is None
+
+def test_matches_brute_force_with_removals():
+    """Test queries against a brute-force scan while adding and removing."""
+    rng = random.Random(42)
+    tree = IntervalTree()
+    intervals = {}
+    for key in range(500):
+        start = rng.randint(0, 10000)
+        end = start + rng.randint(1, 200)
+        tree.add(start, end, key)
+        intervals[key] = (start, end)
+
+    for key in rng.sample(sorted(intervals), 200):
+        tree.remove(key)
+        del intervals[key]
+    assert len(tree) == len(intervals)
+
+    for _ in range(300):
+        start = rng.randint(0, 10000)
+        end = start + rng.randint(1, 300)
+        expected = brute_force(intervals, start, end)
+        assert sorted(tree.overlapping(start, end)) == expected
+        first = tree.first_overlap(start, end)
+        assert (first is None) == (not expected)
+        if first is not None:
+            assert first in expected
+
+def test_re_adding_a_key_moves_it():
+    """Test that adding an existing key replaces its interval."""
+    tree = IntervalTree()
+    tree.add(0, 10, 1)
+    tree.add(50, 60, 1)
+    assert tree.first_overlap(0, 10) is None
+    assert tree.first_overlap(55, 56) == 1
+
+def test_overlapping_pairs_matches_brute_force():
+    """Test that the sweep line finds exactly the overlapping pairs."""
+    rng = random.Random(7)
+    intervals = []
+    for key in range(300):
+        start = rng.randint(0, 5000)
+        intervals.append((start, start + rng.randint(0, 100), key))
+    expected = {
+        frozenset((a[2], b[2])) for i, a in enumerate(intervals) for b in intervals[i + 1:]
+        if a[0] < b[1] and b[0] < a[1] and a[0] < a[1] and b[0] < b[1]
+    }
+    found = [frozenset(pair) for pair in overlapping_pairs(intervals)]
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+def test_overlapping_pairs_touching_intervals():
+    """Test that back-to-back intervals are not reported."""
+    assert list(overlapping_pairs([(0, 10, 'a'), (10, 20, 'b'), (5, 15, 'c')])) == [('a', 'c'), ('c', 'b')]
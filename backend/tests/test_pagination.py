@@ -0,0 +1,69 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, Column, Integer, DateTime
+from sqlalchemy.orm import declarative_base, Session
+
+from app.utils.pagination import keyset_paginate, encode_cursor, decode_cursor, InvalidCursor
+
+Base = declarative_base()
+
+class Row(Base):
+    __tablename__ = 'rows'
+    id = Column(Integer, primary_key=True)
+    start_time = Column(DateTime, nullable=False)
+
+ORDER = [(Row.start_time, True), (Row.id, True)]
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    base = datetime(2024, 1, 1)
+    # Pairs of rows share a start time so the id tie-breaker is exercised
+    for i in range(1, 26):
+        session.add(Row(id=i, start_time=base + timedelta(days=i // 2)))
+    session.commit()
+    yield session
+    session.close()
+
+def expected_order(session):
+    return [r.id for r in session.query(Row).order_by(Row.start_time.desc(), Row.id.desc())]
+
+def test_cursor_round_trip():
+    """Test that cursors preserve datetimes and direction."""
+    when = datetime(2024, 5, 1, 12, 30)
+    values, direction = decode_cursor(encode_cursor([when, 7], 'prev'))
+    assert values == [when, 7]
+    assert direction == 'prev'
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor('not-a-cursor')
+
+def test_walk_forward_and_back(session):
+    """Test that following next/prev cursors visits every row exactly once."""
+    query = session.query(Row)
+    seen = []
+    pages = []
+    cursor = ''
+    while cursor is not None:
+        page = keyset_paginate(query, ORDER, cursor=cursor, per_page=7)
+        pages.append([r.id for r in page['items']])
+        seen.extend(pages[-1])
+        cursor = page['next_cursor']
+        last = page
+
+    assert seen == expected_order(session)
+    assert 'total' not in last
+
+    # Walk back from the last page
+    back = keyset_paginate(query, ORDER, cursor=last['prev_cursor'], per_page=7)
+    assert [r.id for r in back['items']] == pages[-2]
+    assert back['next_cursor'] is not None
+
+def test_first_page_has_no_prev_and_total_is_optional(session):
+    """Test the first page and the optional total count."""
+    page = keyset_paginate(session.query(Row), ORDER, per_page=10, include_total=True)
+    assert page['prev_cursor'] is None
+    assert page['total'] == 25
+    assert len(page['items']) == 10
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models.event import Event, EventGuest, EventStaff, EventVendor
+from app.models.participant import EventParticipant, ParticipantRole
+from app.models.user import User, UserRole
+
+@pytest.fixture
+def users(app):
+    """Staff member 2, vendor 3, attendee 4 and a second event 2"""
+    db.session.add_all([
+        User(id=2, email='staff@example.com', password_hash='x', first_name='Sam',
+             last_name='Staff', role=UserRole.STAFF),
+        User(id=3, email='vendor@example.com', password_hash='x', first_name='Vera',
+             last_name='Vendor', role=UserRole.VENDOR),
+        Event(id=2, title='Afterparty', organizer_id=1,
+              start_time=datetime(2030, 6, 1, 18), end_time=datetime(2030, 6, 1, 21)),
+    ])
+    # Mixed case, as rows written before the model lowercased emails may be
+    db.session.execute(User.__table__.insert(), [{
+        'id': 4, 'email': 'Guest@Example.com', 'password_hash': 'x',
+        'first_name': 'Gil', 'last_name': 'Guest', 'role': UserRole.ATTENDEE
+    }])
+    db.session.commit()
+    return app
+
+def entries(role=None):
+    query = EventParticipant.query
+    if role is not None:
+        query = query.filter_by(role=role)
+    return sorted((entry.user_id, entry.event_id, entry.role) for entry in query)
+
+def test_staff_and_vendor_rows_are_indexed(users):
+    """Test that staff and vendor inserts, moves and deletes follow into the index."""
+    staff = EventStaff(event_id=1, staff_id=2, role='Door')
+    vendor = EventVendor(event_id=1, vendor_id=3, service_type='Catering')
+    db.session.add_all([staff, vendor])
+    db.session.commit()
+    assert entries() == [(2, 1, ParticipantRole.STAFF), (3, 1, ParticipantRole.VENDOR)]
+    assert EventParticipant.has_access(1, 2, ParticipantRole.STAFF)
+
+    staff.event_id = 2
+    vendor.service_type = 'Drinks'
+    db.session.commit()
+    assert entries() == [(2, 2, ParticipantRole.STAFF), (3, 1, ParticipantRole.VENDOR)]
+    assert not EventParticipant.has_access(1, 2, ParticipantRole.STAFF)
+
+    db.session.delete(staff)
+    db.session.delete(vendor)
+    db.session.commit()
+    assert entries() == []
+
+def test_guest_rows_are_linked_by_email_in_any_case(users):
+    """Test that guests are matched to users case-insensitively and follow edits."""
+    guest = EventGuest(event_id=1, email='GUEST@example.COM', first_name='Gil', last_name='Guest')
+    db.session.add(guest)
+    db.session.commit()
+    assert entries() == [(4, 1, ParticipantRole.GUEST)]
+
+    guest.email = 'someone-else@example.com'
+    db.session.commit()
+    assert entries() == []
+
+    guest.email = 'guest@example.com'
+    db.session.commit()
+    db.session.delete(guest)
+    db.session.commit()
+    assert entries() == []
+
+def test_guest_registering_later_is_linked(users):
+    """Test that invitations sent before a user registered are picked up."""
+    db.session.add_all([
+        EventGuest(event_id=1, email='New@Example.com', first_name='Nia', last_name='New'),
+        EventGuest(event_id=2, email='new@example.com', first_name='Nia', last_name='New'),
+    ])
+    db.session.commit()
+    assert entries() == []
+
+    db.session.add(User(id=5, email='NEW@example.com', password_hash='x', first_name='Nia',
+                        last_name='New', role=UserRole.ATTENDEE))
+    db.session.commit()
+    assert entries() == [(5, 1, ParticipantRole.GUEST), (5, 2, ParticipantRole.GUEST)]
+
+def test_email_change_moves_guest_entries(users):
+    """Test that a user's changed email drops the old invitations and links the new."""
+    db.session.add_all([
+        EventGuest(event_id=1, email='guest@example.com', first_name='Gil', last_name='Guest'),
+        EventGuest(event_id=2, email='gil@example.com', first_name='Gil', last_name='Guest'),
+    ])
+    db.session.commit()
+    assert entries() == [(4, 1, ParticipantRole.GUEST)]
+
+    db.session.get(User, 4).email = 'Gil@example.com'
+    db.session.commit()
+    assert entries() == [(4, 2, ParticipantRole.GUEST)]
+
+def test_rebuild_matches_the_listeners(users):
+    """Test that a full rebuild produces the same entries as the listeners."""
+    db.session.add_all([
+        EventStaff(event_id=1, staff_id=2, role='Door'),
+        EventVendor(event_id=2, vendor_id=3, service_type='Catering'),
+        EventGuest(event_id=1, email='GUEST@example.com', first_name='Gil', last_name='Guest'),
+        EventGuest(event_id=1, email='nobody@example.com', first_name='No', last_name='Body'),
+    ])
+    db.session.commit()
+    expected = entries()
+    assert len(expected) == 3
+
+    EventParticipant.rebuild()
+    assert entries() == expected
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.recurrence_service import (
+    InvalidRecurrence, parse_rule, series_end, expand
+)
+
+def make_series(rule, start=datetime(2024, 1, 2, 18, 0), hours=2):
+    return SimpleNamespace(
+        id=7, recurrence_rule=rule, start_time=start, end_time=start + timedelta(hours=hours)
+    )
+
+def test_parse_rule_rejects_unsupported_rules():
+    """Test that sub-daily frequencies and embedded DTSTARTs are refused."""
+    start = datetime(2024, 1, 1)
+    assert parse_rule('RRULE:FREQ=WEEKLY;COUNT=3', start).count() == 3
+    with pytest.raises(InvalidRecurrence):
+        parse_rule('FREQ=MINUTELY', start)
+    with pytest.raises(InvalidRecurrence):
+        parse_rule('DTSTART:20240101T000000\nRRULE:FREQ=DAILY', start)
+
+def test_series_end():
+    """Test that bounded series end with their last occurrence and others are open."""
+    start = datetime(2024, 1, 2, 18, 0)
+    end = start + timedelta(hours=2)
+    assert series_end('FREQ=WEEKLY;COUNT=4', start, end) == datetime(2024, 1, 23, 20, 0)
+    assert series_end('FREQ=MONTHLY', start, end) is None
+
+def test_expand_applies_exceptions_within_window():
+    """Test that cancelled occurrences are skipped and edited ones overridden."""
+    series = make_series('FREQ=WEEKLY')
+    base = {'id': 7, 'title': 'Meetup', 'location': 'Hall'}
+    cancelled = SimpleNamespace(is_cancelled=True, start_time=None, end_time=None,
+                                title=None, description=None, location=None)
+    moved = SimpleNamespace(is_cancelled=False, start_time=datetime(2024, 1, 17, 19, 0),
+                            end_time=None, title=None, description=None, location='Annex')
+    exceptions = {datetime(2024, 1, 9, 18, 0): cancelled, datetime(2024, 1, 16, 18, 0): moved}
+
+    occurrences = expand(series, datetime(2024, 1, 1), datetime(2024, 1, 31),
+                         exceptions=exceptions, limit=50, base=base)
+
+    assert [o['start_time'] for o in occurrences] == [
+        '2024-01-02T18:00:00', '2024-01-17T19:00:00', '2024-01-23T18:00:00', '2024-01-30T18:00:00'
+    ]
+    assert occurrences[1]['location'] == 'Annex'
+    assert occurrences[1]['recurrence_id'] == '2024-01-16T18:00:00'
+    assert occurrences[1]['end_time'] == '2024-01-17T21:00:00'
+    assert all(o['series_id'] == 7 for o in occurrences)
+
+def test_expand_respects_limit_for_open_windows():
+    """Test that an unbounded series without a window end is capped."""
+    occurrences = expand(make_series('FREQ=DAILY'), datetime(2024, 3, 1), None,
+                         exceptions={}, limit=5, base={'id': 7})
+    assert len(occurrences) == 5
+    assert occurrences[0]['start_time'] == '2024-03-01T18:00:00'
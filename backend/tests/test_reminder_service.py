@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.services.reminder_service import ReminderScheduler, parse_leads, reminder_times
+
+NOW = datetime(2030, 1, 1, 12, 0)
+
+def make_scheduler():
+    app = SimpleNamespace(config={'TASK_REMINDER_LEADS': '60, 1440'})
+    return ReminderScheduler(app, holder='test', clock=lambda: NOW)
+
+def test_reminder_times_collapse_late_leads():
+    """Test that only the shortest lead whose time has passed is kept, minus sent ones."""
+    leads = parse_leads('60,1440,0')
+    assert leads == [1440, 60]
+
+    due = NOW + timedelta(hours=30)
+    assert reminder_times(due, leads, NOW) == [
+        (due - timedelta(days=1), 1440), (due - timedelta(hours=1), 60)
+    ]
+    # Due in 30 minutes: both leads are late, only the one-hour reminder goes out
+    due = NOW + timedelta(minutes=30)
+    assert reminder_times(due, leads, NOW) == [(NOW, 60)]
+    assert reminder_times(due, leads, NOW, sent={60}) == []
+    assert reminder_times(NOW - timedelta(minutes=1), leads, NOW) == []
+    assert reminder_times(None, leads, NOW) == []
+
+def test_heap_skips_reminders_for_old_due_dates():
+    """Test that re-arming a task invalidates its earlier heap entries."""
+    scheduler = make_scheduler()
+    scheduler.arm(1, NOW + timedelta(hours=2), NOW)
+    scheduler.arm(2, NOW + timedelta(hours=3), NOW)
+    # Task 1 moves out; its old one-hour reminder must not fire
+    scheduler.arm(1, NOW + timedelta(hours=10), NOW)
+
+    # Inside a day of their due dates both get their one-day reminder at once
+    assert scheduler.next_fire() == NOW
+    assert sorted(scheduler.pop_due(NOW)) == [
+        (1, NOW + timedelta(hours=10), 1440), (2, NOW + timedelta(hours=3), 1440)
+    ]
+    assert scheduler.next_fire() == NOW + timedelta(hours=2)
+    assert scheduler.pop_due(NOW + timedelta(hours=2)) == [(2, NOW + timedelta(hours=3), 60)]
+    assert scheduler.next_fire() == NOW + timedelta(hours=9)
+    assert scheduler.pop_due(NOW + timedelta(hours=9)) == [(1, NOW + timedelta(hours=10), 60)]
+    assert scheduler.next_fire() is None
+
+    scheduler.arm(3, NOW + timedelta(hours=2), NOW)
+    scheduler.disarm(3)
+    assert scheduler.pop_due(NOW + timedelta(days=1)) == []
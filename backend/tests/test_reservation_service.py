@@ -0,0 +1,113 @@
+from itertools import count
+from types import SimpleNamespace
+
+from app import db
+from app.models.event import EventGuest
+from app.models.guest_counter import EventGuestCounter
+from app.models.reservation import EventCapacity, WaitlistEntry
+from app.services import reservation_service
+
+_guest_numbers = count()
+
+def add_guest(rsvp_status, priority=None):
+    """Add a guest to event 1, on the waitlist when ``priority`` is given."""
+    guest = EventGuest(event_id=1, email=f'guest{next(_guest_numbers)}@example.com',
+                       first_name='Guest', last_name='Test', rsvp_status=rsvp_status)
+    db.session.add(guest)
+    db.session.flush()
+    if priority is not None:
+        db.session.add(WaitlistEntry(event_id=1, guest_id=guest.id, priority=priority))
+        db.session.flush()
+    return guest
+
+def full_event(capacity, waiting):
+    """Event 1 with ``capacity`` accepted guests and a waitlist of the given priorities."""
+    for _ in range(capacity):
+        add_guest('accepted')
+    reservation_service.ensure_capacity(SimpleNamespace(id=1, max_attendees=capacity))
+    guests = [add_guest('waitlisted', priority) for priority in waiting]
+    db.session.commit()
+    return guests
+
+def ledger():
+    return db.session.get(EventCapacity, 1, populate_existing=True).reserved
+
+def waitlist():
+    return [entry.guest_id for entry in WaitlistEntry.query.order_by(WaitlistEntry.id)]
+
+def test_take_seat_refuses_full_event(app):
+    """Test that seats are taken until the capacity is reached and then refused."""
+    reservation_service.ensure_capacity(SimpleNamespace(id=1, max_attendees=2))
+    assert reservation_service.take_seat(1)
+    assert reservation_service.take_seat(1)
+    assert not reservation_service.take_seat(1)
+    assert ledger() == 2
+
+    reservation_service.release_seat(1)
+    assert reservation_service.take_seat(1)
+    assert not reservation_service.take_seat(2)
+
+def test_promotion_order_is_priority_then_arrival(app):
+    """Test that freed seats go to the highest priority, earliest entries first."""
+    low, first, second, third = full_event(1, [0, 5, 5, 5])
+    table = EventCapacity.__table__
+    db.session.execute(table.update().values(capacity=3))
+
+    promoted = reservation_service.promote_waitlisted(1)
+    db.session.commit()
+
+    assert [guest.id for guest in promoted] == [first.id, second.id]
+    assert {guest.rsvp_status for guest in promoted} == {'accepted'}
+    assert waitlist() == [low.id, third.id]
+    assert ledger() == 3
+
+def test_decline_promotes_next_guest(app):
+    """Test that a released seat is handed on within the same transaction."""
+    waiting, best = full_event(2, [0, 1])
+    leaving = EventGuest.query.filter_by(rsvp_status='accepted').first()
+
+    leaving.rsvp_status = 'declined'
+    reservation_service.release_seat(1)
+    promoted = reservation_service.promote_waitlisted(1)
+    db.session.commit()
+
+    assert promoted == [best]
+    assert db.session.get(EventGuest, best.id).rsvp_status == 'accepted'
+    assert db.session.get(EventGuest, waiting.id).rsvp_status == 'waitlisted'
+    assert waitlist() == [waiting.id]
+    assert ledger() == 2
+    assert reservation_service.promote_waitlisted(1) == []
+
+def test_capacity_changed_raises_and_removes_the_limit(app):
+    """Test that a larger limit fills the new seats and no limit admits everyone."""
+    guests = full_event(1, [0, 0, 0])
+
+    promoted = reservation_service.capacity_changed(SimpleNamespace(id=1, max_attendees=2))
+    db.session.commit()
+    assert promoted == guests[:1]
+    assert ledger() == 2
+
+    promoted = reservation_service.capacity_changed(SimpleNamespace(id=1, max_attendees=None))
+    db.session.commit()
+    assert promoted == guests[1:]
+    assert {guest.rsvp_status for guest in promoted} == {'accepted'}
+    assert db.session.get(EventCapacity, 1) is None
+    assert waitlist() == []
+
+def test_reconcile_reserved_realigns_ledger(app):
+    """Test that a drifted ledger is reset from the counters and freed seats are filled."""
+    waiting = full_event(3, [0, 0])
+    # Two accepted guests are removed behind the counters' and ledger's back
+    guests = EventGuest.__table__
+    accepted = [guest.id for guest in EventGuest.query.filter_by(rsvp_status='accepted')]
+    db.session.execute(guests.delete().where(guests.c.id.in_(accepted[:2])))
+    stale = add_guest('declined')
+    db.session.add(WaitlistEntry(event_id=1, guest_id=stale.id))
+    EventGuestCounter.reconcile([1])
+
+    promoted = reservation_service.reconcile_reserved([1])
+    db.session.commit()
+
+    assert promoted == {1: waiting}
+    assert ledger() == 3
+    assert waitlist() == []
@@ -0,0 +1,98 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event as sa_event
+
+from app import db
+from app.models.event import Event, EventStaff
+from app.models.user import User, UserRole
+from app.services import staffing_service
+from app.services.staffing_service import StaffConflict
+
+ORGANIZER = SimpleNamespace(id=1, role='organizer')
+STAFF = SimpleNamespace(id=2, role='staff')
+
+@pytest.fixture
+def crew(app):
+    """Staff member 2 plus event 2 overlapping event 1 and event 3 on another day"""
+    db.session.add_all([
+        User(id=2, email='staff@example.com', password_hash='x', first_name='Sam',
+             last_name='Staff', role=UserRole.STAFF),
+        Event(id=2, title='Late show', organizer_id=1,
+              start_time=datetime(2030, 5, 1, 20), end_time=datetime(2030, 5, 1, 23)),
+        Event(id=3, title='Next day', organizer_id=1,
+              start_time=datetime(2030, 5, 2, 18), end_time=datetime(2030, 5, 2, 21)),
+    ])
+    db.session.commit()
+    return app
+
+def assign(event_id, **data):
+    return staffing_service.assign_staff(event_id, dict(staff_id=2, role='Door', **data), ORGANIZER)
+
+def test_assignment_listener_refuses_double_booking(crew):
+    """Test that overlapping assignments raise unless conflicts are allowed."""
+    db.session.add(EventStaff(event_id=1, staff_id=2, role='Door'))
+    db.session.commit()
+
+    db.session.add(EventStaff(event_id=2, staff_id=2, role='Door'))
+    with pytest.raises(StaffConflict) as raised:
+        db.session.commit()
+    db.session.rollback()
+    [conflict] = raised.value.conflicts
+    assert (conflict['first']['event_id'], conflict['second']['event_id']) == (2, 1)
+    assert conflict['overlap_start'] == '2030-05-01T20:00:00'
+    assert conflict['overlap_end'] == '2030-05-01T21:00:00'
+
+    allowed = EventStaff(event_id=2, staff_id=2, role='Door')
+    allowed.allow_conflicts = True
+    db.session.add_all([allowed, EventStaff(event_id=3, staff_id=2, role='Door')])
+    db.session.commit()
+    assert EventStaff.query.filter_by(staff_id=2).count() == 3
+
+def test_assignment_locks_the_staff_member_first(crew):
+    """Test that the member is locked before their bookings are read."""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        db.session.add(EventStaff(event_id=1, staff_id=2, role='Door'))
+        db.session.commit()
+    finally:
+        sa_event.remove(db.engine, 'before_cursor_execute', record)
+    insert = next(i for i, statement in enumerate(statements) if statement.startswith('INSERT INTO event_staff'))
+    assert statements[0].startswith('UPDATE users')
+    assert any(statement.startswith('SELECT') for statement in statements[1:insert])
+
+def test_assign_staff_reports_conflicts(crew):
+    """Test that the endpoint answers a double booking with 409 and its conflicts."""
+    assert assign(1)[1] == 201
+    body, status = assign(2)
+    assert status == 409
+    assert [conflict['second']['event_id'] for conflict in body['conflicts']] == [1]
+    assert assign(2, allow_conflicts=True)[1] == 201
+    assert staffing_service.assign_staff(1, {'staff_id': 2, 'role': 'Door'}, STAFF)[1] == 403
+    assert staffing_service.assign_staff(1, {'staff_id': 99, 'role': 'Door'}, ORGANIZER)[1] == 404
+
+def test_conflict_reports(crew):
+    """Test the member, everyone and per-event conflict reports and their permissions."""
+    assign(1)
+    assign(2, allow_conflicts=True)
+    assign(3)
+    window = {'start': '2030-05-01T00:00:00', 'end': '2030-05-03T00:00:00'}
+
+    body = staffing_service.get_staff_conflicts(STAFF, staff_id=2, **window)
+    assert [(c['first']['event_id'], c['second']['event_id']) for c in body['conflicts']] == [(1, 2)]
+    assert staffing_service.get_staff_conflicts(ORGANIZER, **window)['conflicts'] == body['conflicts']
+    assert staffing_service.get_staff_conflicts(STAFF, **window)[1] == 403
+    assert staffing_service.get_staff_conflicts(STAFF, staff_id=5, **window)[1] == 403
+    assert staffing_service.get_staff_conflicts(
+        ORGANIZER, start='2030-05-03T00:00:00', end='2030-05-01T00:00:00'
+    )[1] == 400
+
+    assert len(staffing_service.get_event_staff_conflicts(2, ORGANIZER)['conflicts']) == 1
+    assert staffing_service.get_event_staff_conflicts(3, ORGANIZER)['conflicts'] == []
+    assert staffing_service.get_event_staff_conflicts(2, STAFF)[1] == 403
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.task_graph_service import schedule, find_path, DependencyCycle
+
+def test_schedule_forward_and_backward_pass():
+    """Test earliest/latest times, slack and the critical path of a small plan."""
+    # 1 -> 2 -> 4 and 1 -> 3 -> 4, where the 3 branch is longer
+    durations = {1: 60, 2: 30, 3: 120, 4: 60, 5: 45}
+    edges = [(2, 1), (3, 1), (4, 2), (4, 3)]
+
+    times, path, total = schedule(durations, edges)
+
+    assert total == 240
+    assert path == [1, 3, 4]
+    assert times[1] == (0, 60, 0, 60)
+    assert times[3] == (60, 180, 60, 180)
+    assert times[2] == (60, 90, 150, 180)
+    assert times[4] == (180, 240, 180, 240)
+    # An unconnected task can start any time before the end
+    assert times[5] == (0, 45, 195, 240)
+
+def test_schedule_reports_cycles():
+    """Test that a cycle is reported with the tasks that form it."""
+    with pytest.raises(DependencyCycle) as error:
+        schedule({1: 10, 2: 10, 3: 10, 4: 10}, [(2, 1), (3, 2), (1, 3), (4, 1)])
+    cycle = error.value.cycle
+    assert cycle[0] == cycle[-1]
+    assert set(cycle) == {1, 2, 3}
+
+def test_schedule_empty_and_done_tasks():
+    """Test that an empty plan and zero-length tasks need no time."""
+    assert schedule({}, []) == ({}, [], 0)
+    times, path, total = schedule({1: 0, 2: 0}, [(2, 1)])
+    assert total == 0
+    assert path == [1, 2]
+
+def test_find_path_detects_would_be_cycles():
+    """Test that the upstream path used to refuse cycle-closing edges is found."""
+    depends_on = {2: {1}, 3: {2}, 5: {4}}
+    # Adding "1 depends on 3" would close 1 -> 3 -> 2 -> 1
+    assert find_path(depends_on, 3, 1) == [3, 2, 1]
+    assert find_path(depends_on, 5, 1) is None
+    assert find_path(depends_on, 1, 1) == [1]
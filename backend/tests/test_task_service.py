@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app import db
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.services.task_service import FIELD_PARSERS, _parse_update, update_statement, assignment_diff
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    tables = [db.metadata.tables[name] for name in ('users', 'venues', 'events', 'tasks')]
+    db.metadata.create_all(engine, tables=tables)
+    created = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(Task.__table__.insert(), [
+            {'id': i, 'title': f'Task {i}', 'event_id': 1, 'created_by': 1, 'status': TaskStatus.TODO,
+             'priority': TaskPriority.MEDIUM, 'due_date': created, 'created_at': created, 'updated_at': created}
+            for i in range(1, 5)
+        ])
+    return engine
+
+def test_parse_update_validates_fields():
+    """Test that bulk entries are parsed and bad values are reported by field."""
+    task_id, values = _parse_update({'id': 3, 'status': 'blocked', 'due_date': None})
+    assert task_id == 3
+    assert values == {'status': TaskStatus.BLOCKED, 'due_date': None}
+    for update, message in [
+        ({'status': 'todo'}, 'id must be a task ID'),
+        ({'id': 1}, 'Nothing to update'),
+        ({'id': 1, 'title': 'x'}, 'Cannot bulk update: title'),
+        ({'id': 1, 'priority': 'urgent'}, 'Invalid priority'),
+        ({'id': 1, 'due_date': 'next week'}, 'Invalid due_date'),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            _parse_update(update)
+    assert set(FIELD_PARSERS) == {'status', 'priority', 'due_date'}
+
+def test_update_statement_applies_per_task_values(engine):
+    """Test that one UPDATE gives each task its own values and leaves other fields alone."""
+    now = datetime(2024, 2, 1)
+    changes = {
+        1: {'status': TaskStatus.COMPLETED, 'due_date': datetime(2024, 3, 1)},
+        2: {'status': TaskStatus.BLOCKED},
+        3: {'priority': TaskPriority.HIGH, 'due_date': None},
+    }
+    with engine.begin() as connection:
+        assert connection.execute(update_statement(changes, now)).rowcount == 3
+        tasks = Task.__table__
+        rows = {row.id: row for row in connection.execute(select(tasks))}
+
+    assert (rows[1].status, rows[1].priority, rows[1].due_date) == \
+        (TaskStatus.COMPLETED, TaskPriority.MEDIUM, datetime(2024, 3, 1))
+    assert (rows[2].status, rows[2].due_date) == (TaskStatus.BLOCKED, datetime(2024, 1, 1))
+    assert (rows[3].status, rows[3].priority, rows[3].due_date) == (TaskStatus.TODO, TaskPriority.HIGH, None)
+    assert rows[4].updated_at == datetime(2024, 1, 1)
+    assert {rows[i].updated_at for i in (1, 2, 3)} == {now}
+
+def test_update_statement_uses_constant_for_shared_values(engine):
+    """Test that a value shared by every task is set without a CASE."""
+    statement = update_statement({1: {'status': TaskStatus.CANCELLED}, 2: {'status': TaskStatus.CANCELLED}},
+                                 datetime(2024, 2, 1))
+    assert 'CASE' not in str(statement)
+    with engine.begin() as connection:
+        connection.execute(statement)
+        statuses = dict(connection.execute(select(Task.__table__.c.id, Task.__table__.c.status)).all())
+    assert statuses == {1: TaskStatus.CANCELLED, 2: TaskStatus.CANCELLED, 3: TaskStatus.TODO, 4: TaskStatus.TODO}
+
+def test_assignment_diff_touches_only_changes():
+    """Test that only assignees entering or leaving a task are reported."""
+    current = {1: [10], 2: [11], 3: [12]}
+    assert assignment_diff(current, [2, 3, 4, 4, 5]) == ([4, 5], [1])
+    assert assignment_diff(current, [3, 2, 1]) == ([], [])
+    assert assignment_diff(current, []) == ([], [1, 2, 3])
+    # Adding never removes
+    assert assignment_diff(current, [5, 1], replace=False) == ([5], [])
+    assert assignment_diff({}, [7, 6]) == ([7, 6], [])
@@ -0,0 +1,48 @@
+import hashlib
+import io
+import os
+
+from werkzeug.datastructures import FileStorage
+
+from app.services import upload_service
+
+def make_file(data, filename='cover.png'):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+def test_store_upload_is_content_addressed(app):
+    """Test that uploads are stored by hash and duplicates are written once."""
+    data = os.urandom(200 * 1024)
+    digest = hashlib.sha256(data).hexdigest()
+
+    first = upload_service.store_upload(make_file(data))
+    second = upload_service.store_upload(make_file(data, 'other-name.png'))
+
+    assert first.digest == second.digest == digest
+    assert first.created and not second.created
+    assert first.url == f'/api/uploads/{digest}.png'
+    with open(first.path, 'rb') as stored:
+        assert stored.read() == data
+    assert os.listdir(os.path.join(app.config['UPLOAD_FOLDER'], 'tmp')) == []
+
+def test_resolve_falls_back_to_original(app):
+    """Test that missing variants resolve to the original and bad names to nothing."""
+    upload = upload_service.store_upload(make_file(b'not really a png'))
+
+    assert upload_service.resolve(upload.name) == (upload.path, False)
+    assert upload_service.resolve(upload.name, 160) == (upload.path, False)
+    assert upload_service.resolve(upload.name, 999) == (None, False)
+    assert upload_service.resolve('../../etc/passwd') == (None, False)
+
+    variant = upload_service.variant_path(upload.digest, 160)
+    open(variant, 'wb').close()
+    assert upload_service.resolve(upload.name, 160) == (variant, True)
+
+def test_default_width_follows_configured_widths(app):
+    """Test that list thumbnails use the largest generated width not above the default."""
+    assert upload_service.default_width() == 480
+    app.config['THUMBNAIL_WIDTHS'] = (200, 320, 800)
+    assert upload_service.default_width() == 320
+    app.config['THUMBNAIL_WIDTHS'] = (640, 1024)
+    assert upload_service.default_width() == 640
+    app.config['THUMBNAIL_WIDTHS'] = ()
+    assert upload_service.default_width() is None